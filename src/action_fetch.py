@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+ACTION_PAGE_SIZE = 1000
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+
+def action_id_timestamp(action_id):
+    return int(action_id[:8], 16)
+
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc) \
+        .strftime(DATE_FORMAT)
+
+
+def fetch_actions_page(handle, board_id, actions_filter,
+                       since=None, before=None):
+    query_params = {"filter": actions_filter, "limit": ACTION_PAGE_SIZE}
+    if since:
+        query_params["since"] = since
+    if before:
+        query_params["before"] = before
+    return handle.fetch_json(
+        '/boards/' + board_id + '/actions', query_params=query_params)
+
+
+def fetch_actions_window(handle, board_id, actions_filter, since, before):
+    window_actions = []
+    while True:
+        actions = fetch_actions_page(
+            handle, board_id, actions_filter, since, before)
+        window_actions = window_actions + actions
+        if len(actions) < ACTION_PAGE_SIZE:
+            return window_actions
+        before = actions[-1]["id"]
+
+
+def split_timestamps(since_timestamp, before_timestamp, num_of_windows):
+    window_size = (before_timestamp - since_timestamp) // max(
+        num_of_windows, 1)
+    if num_of_windows <= 1 or window_size <= 1:
+        return []
+    return [since_timestamp + window_size * index
+            for index in range(1, num_of_windows)]
+
+
+def create_date_windows(since, before, boundaries):
+    if len(boundaries) == 0:
+        return [(since, before)]
+    windows = [(since, format_timestamp(boundaries[0]))]
+    for start, end in zip(boundaries, boundaries[1:]):
+        windows.append(
+            (format_timestamp(start - 1), format_timestamp(end)))
+    windows.append((format_timestamp(boundaries[-1] - 1), before))
+    return list(reversed(windows))
+
+
+def split_date_windows(since_id, before_id, num_of_windows):
+    return create_date_windows(since_id, before_id, split_timestamps(
+        action_id_timestamp(since_id),
+        action_id_timestamp(before_id),
+        num_of_windows))
+
+
+def create_bootstrap_windows(board_id, num_of_windows, clock=time.time):
+    board_timestamp = action_id_timestamp(board_id)
+    return create_date_windows(
+        format_timestamp(board_timestamp - 1),
+        None,
+        split_timestamps(board_timestamp, int(clock()), num_of_windows))
+
+
+def fetch_windows_by_page(handle, board_id, actions_filter, windows,
+                          concurrency=1, on_page=None):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {
+            executor.submit(fetch_actions_page, handle, board_id,
+                            actions_filter, since, before): window_id
+            for window_id, (since, before) in windows.items()}
+        while len(pending) > 0:
+            done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window_id = pending.pop(future)
+                actions = future.result()
+                before = None
+                if len(actions) >= ACTION_PAGE_SIZE:
+                    before = actions[-1]["id"]
+                if on_page:
+                    on_page(window_id, actions, before)
+                if before:
+                    pending[executor.submit(
+                        fetch_actions_page, handle, board_id, actions_filter,
+                        windows[window_id][0], before)] = window_id
+
+
+def dedupe_actions(actions):
+    seen_action_ids = set()
+    unique_actions = []
+    for action in actions:
+        if action["id"] in seen_action_ids:
+            continue
+        seen_action_ids.add(action["id"])
+        unique_actions.append(action)
+    return unique_actions
+
+
+def fetch_actions_since(handle, board_id, actions_filter, since_id,
+                        concurrency=1, first_page=None):
+    if first_page is None:
+        first_page = fetch_actions_page(
+            handle, board_id, actions_filter, since_id)
+    if len(first_page) < ACTION_PAGE_SIZE:
+        return dedupe_actions(first_page)
+    windows = split_date_windows(
+        since_id, first_page[-1]["id"], concurrency)
+    print(f'Catching up on actions in {len(windows)} windows...')
+
+    def fetch_window(window):
+        return fetch_actions_window(
+            handle, board_id, actions_filter, *window)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        window_actions = [actions for actions in
+                          executor.map(fetch_window, windows)]
+    return dedupe_actions(
+        first_page + [action for actions in window_actions
+                      for action in actions])
@@ -0,0 +1,105 @@
+import json
+import os
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+CURSOR_FILE = "cursor.json"
+
+
+class Action_log:
+    def __init__(self, log_dir, segment_size=10000):
+        self.log_dir = log_dir
+        self.segment_size = segment_size
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    def segment_paths(self):
+        segment_names = sorted(
+            file_name for file_name in os.listdir(self.log_dir)
+            if file_name.startswith(SEGMENT_PREFIX) and
+            file_name.endswith(SEGMENT_SUFFIX))
+        return [os.path.join(self.log_dir, segment_name)
+                for segment_name in segment_names]
+
+    def segment_path(self, segment_number):
+        return os.path.join(
+            self.log_dir,
+            f"{SEGMENT_PREFIX}{segment_number:06d}{SEGMENT_SUFFIX}")
+
+    def read_segment(self, segment_path):
+        with open(segment_path, "r") as segment_file:
+            for line in segment_file:
+                if not line.endswith("\n") or line.strip() == "":
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping damaged line in {segment_path}")
+
+    def iter_newest_first(self):
+        for segment_path in reversed(self.segment_paths()):
+            yield from reversed(list(self.read_segment(segment_path)))
+
+    def __iter__(self):
+        return self.iter_newest_first()
+
+    def latest_action(self):
+        for segment_path in reversed(self.segment_paths()):
+            latest_action = None
+            for action in self.read_segment(segment_path):
+                latest_action = action
+            if latest_action is not None:
+                return latest_action
+        return None
+
+    def is_empty(self):
+        return self.latest_action() is None
+
+    def cursor(self):
+        try:
+            with open(os.path.join(self.log_dir, CURSOR_FILE), "r") \
+                    as cursor_file:
+                return json.load(cursor_file)["since"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            latest_action = self.latest_action()
+            return None if latest_action is None else latest_action["id"]
+
+    def save_cursor(self, action_id):
+        cursor_path = os.path.join(self.log_dir, CURSOR_FILE)
+        with open(cursor_path + ".tmp", "w") as cursor_file:
+            json.dump({"since": action_id}, cursor_file)
+        os.replace(cursor_path + ".tmp", cursor_path)
+
+    def append(self, new_action_list):
+        segment_paths = self.segment_paths()
+        if len(segment_paths) > 0:
+            segment_number = len(segment_paths) - 1
+            segment_count = sum(
+                1 for _action in self.read_segment(segment_paths[-1]))
+        else:
+            segment_number = 0
+            segment_count = 0
+        actions = list(reversed(new_action_list))
+        while len(actions) > 0:
+            if segment_count >= self.segment_size:
+                segment_number += 1
+                segment_count = 0
+            batch = actions[:self.segment_size - segment_count]
+            actions = actions[len(batch):]
+            with open(self.segment_path(segment_number), "a+") as segment_file:
+                if segment_file.tell() > 0:
+                    segment_file.seek(segment_file.tell() - 1)
+                    if segment_file.read(1) != "\n":
+                        segment_file.write("\n")
+                for action in batch:
+                    segment_file.write(json.dumps(action) + "\n")
+            segment_count += len(batch)
+        return self
+
+
+def load_action_log(actions_file, segment_size=10000):
+    action_log = Action_log(actions_file + ".d", segment_size)
+    if action_log.is_empty() and os.path.isfile(actions_file):
+        print(f"Migrating {actions_file} to {action_log.log_dir}")
+        with open(actions_file, "r") as legacy_file:
+            action_log.append(json.load(legacy_file))
+    return action_log
@@ -1,90 +1,145 @@
 import math
+import time
 
+import requests
+import trello
 
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from trello_helper import find_list
+from trello_transport import Retry_policy, NO_RETRY
+from board_snapshot import list_cards_from_index
 
 
 def perform_archival(context, config):
     archival_jobs = find_done_card_and_create_archival_jobs(
         context["board_lookup"],
         config.board_name,
-        context["action_list"],
-        config.done_list_name)
+        context["local_store"],
+        config.done_list_name,
+        context["card_index"])
     process_archival_job(
-        context["board_lookup"], config.archival_board_name, archival_jobs)
+        context["board_lookup"], config.archival_board_name, archival_jobs,
+        config.archival_concurrency, Retry_policy(
+            max_attempts=config.archival_move_attempts,
+            backoff_base=config.retry_backoff_base,
+            backoff_max=config.retry_backoff_max),
+        context["card_index"])
     return archival_jobs
 
 
 def find_done_card_and_create_archival_jobs(
-        board_lookup, board_name, action_list, done_list_name):
+        board_lookup, board_name, local_store, done_list_name, card_index):
     archival_jobs = []
-    card_action_list_lookup = create_card_action_list_lookup(action_list)
     done_list = retrieve_list_from_trello(
         board_lookup, board_name, done_list_name)
-    done_cards = done_list.list_cards()
+    done_cards = list_cards_from_index(
+        board_lookup[board_name].client, card_index, done_list.id)
     for done_card in done_cards:
         done_date = get_move_to_done_list_date(
-            card_action_list_lookup, done_card.id, done_list.id)
+            local_store, done_card.id, done_list.id)
         archival_jobs.append({"date": done_date, "card": done_card})
         print(f'Add Job Move {done_card.id} {done_card.name} to {done_date}.')
     return archival_jobs
 
 
-def create_card_action_list_lookup(action_list):
-    card_action_list_lookup = {}
-    for action in action_list:
-        if action["data"].get("card"):
-            card_id = action["data"]["card"]["id"]
-            if card_action_list_lookup.get(card_id):
-                card_action_list_lookup[card_id].append(action)
-            else:
-                card_action_list_lookup[card_id] = [action]
-    print(len(action_list))
-    print(len(card_action_list_lookup))
-    return card_action_list_lookup
+def retrieve_list_from_trello(board_lookup, board_name, list_name):
+    return find_list(board_lookup, board_name, list_name)
 
 
-def retrieve_list_from_trello(board_lookup, board_name, list_name):
-    lists = board_lookup[board_name].get_lists("all")
-    list_lookup = {list.name: list for list in lists}
-    return list_lookup[list_name]
-
-
-def get_move_to_done_list_date(card_action_list_lookup, card_id, done_list_id):
-    for action in card_action_list_lookup[card_id]:
-        if (action["type"] == "updateCard" and
-                action["data"].get("listAfter") and
-                action["data"]["listAfter"]["id"] == done_list_id):
-            return action["date"]
-        if (action["type"] == "moveCardToBoard" and
-                action["data"].get("list") and
-                action["data"]["list"]["id"] == done_list_id):
-            return action["date"]
+def get_move_to_done_list_date(local_store, card_id, done_list_id):
+    return local_store.find_move_to_list_date(card_id, done_list_id)
+
+
+def process_archival_job(board_lookup, archival_board_name, archival_jobs,
+                         concurrency=1, retry_policy=NO_RETRY,
+                         card_index=None):
+    archival_groups = group_archival_jobs_by_sprint(archival_jobs)
+    archival_moves = []
+    for start_date, sprint_jobs in archival_groups.items():
+        archival_list = create_archival_list_if_not_found(
+            board_lookup, archival_board_name, start_date)
+        for archival_job in sprint_jobs:
+            print(
+                f'Executing Move '
+                f'{archival_job["card"].id} '
+                f'{archival_job["card"].name} to '
+                f'{start_date}.')
+            archival_moves.append((
+                archival_job["card"],
+                board_lookup[archival_board_name].id,
+                archival_list.id))
+    move_results = move_cards(archival_moves, concurrency, retry_policy)
+    if card_index is not None:
+        update_moved_cards_in_index(card_index, archival_moves, move_results)
+    return move_results
+
+
+def update_moved_cards_in_index(card_index, archival_moves, move_results):
+    for (card, board_id, list_id) in archival_moves:
+        card_json = card_index.get(card.id)
+        if card_json is not None and move_results.get(card.id) is None:
+            card_json["idBoard"] = board_id
+            card_json["idList"] = list_id
+
+
+def move_card(archival_move):
+    (card, board_id, list_id) = archival_move
+    try:
+        card.change_board(board_id, list_id)
+    except (trello.ResourceUnavailable, requests.RequestException) as error:
+        return error
     return None
 
 
-def process_archival_job(board_lookup, archival_board_name, archival_jobs):
+def is_transient_move_error(error):
+    if isinstance(error, requests.RequestException):
+        return True
+    return isinstance(error, trello.ResourceUnavailable) and \
+        error._status in Retry_policy.RETRY_STATUS_CODES
+
+
+def move_cards(archival_moves, concurrency=1, retry_policy=NO_RETRY,
+               sleep=time.sleep):
+    move_results = {}
+    failed_moves = []
+    pending_moves = archival_moves
+    for attempt in range(retry_policy.max_attempts):
+        if attempt > 0:
+            print(f'Retrying {len(pending_moves)} failed card moves...')
+            sleep(retry_policy.backoff(attempt))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            errors = [error for error in
+                      executor.map(move_card, pending_moves)]
+        for (card, _board_id, _list_id), error in zip(pending_moves, errors):
+            move_results[card.id] = error
+        failed_moves += [archival_move for archival_move, error
+                         in zip(pending_moves, errors)
+                         if error is not None and
+                         not is_transient_move_error(error)]
+        pending_moves = [archival_move for archival_move, error
+                         in zip(pending_moves, errors)
+                         if is_transient_move_error(error)]
+        if len(pending_moves) == 0:
+            break
+    for (card, _board_id, _list_id) in failed_moves + pending_moves:
+        print(f'Failed Move {card.id} {card.name}: {move_results[card.id]}')
+    return move_results
+
+
+def group_archival_jobs_by_sprint(archival_jobs):
     today = datetime.now()
     current_sprint_dates = calculate_sprint_dates_for_given_date(
         "2023-08-02T00:00:00", today.isoformat())
+    archival_groups = {}
     for archival_job in archival_jobs:
         start_date, end_date = calculate_sprint_dates_for_given_date(
             "2023-08-02T00:00:00", archival_job["date"][0:23])
         if current_sprint_dates == (start_date, end_date):
             continue
-        print(
-            f'Executing Move '
-            f'{archival_job["card"].id} '
-            f'{archival_job["card"].name} to '
-            f'{start_date}.')
-        archival_list = create_archival_list_if_not_found(
-            board_lookup, archival_board_name, start_date)
-        archival_job["card"].change_board(
-            board_lookup[archival_board_name].id, archival_list.id)
-        time.sleep(1)
+        archival_groups.setdefault(start_date, []).append(archival_job)
+    return archival_groups
 
 
 def calculate_sprint_dates_for_given_date(reference_start_date, given_date):
@@ -121,4 +176,6 @@ def create_archival_list(
         board_lookup, archival_board_name, archival_list_name):
     new_list = board_lookup[archival_board_name].add_list(
         archival_list_name, "top")
+    if board_lookup.has_lists(archival_board_name):
+        board_lookup.add_list(archival_board_name, new_list)
     return new_list
@@ -0,0 +1,25 @@
+import asyncio
+import trello
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def fetch_json_concurrently(handle, requests, concurrency,
+                                  on_result=None):
+    loop = asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def fetch_one(index, uri_path, query_params):
+            try:
+                result = await loop.run_in_executor(
+                    executor,
+                    lambda: handle.fetch_json(
+                        uri_path, query_params=dict(query_params)))
+            except trello.ResourceUnavailable as error:
+                result = error
+            if on_result:
+                on_result(index, result)
+            return result
+
+        return await asyncio.gather(*[
+            fetch_one(index, uri_path, query_params)
+            for index, (uri_path, query_params) in enumerate(requests)])
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from trello import List
+from metadata_cache import STRUCTURAL_ACTION_TYPES
+from trello_helper import CARD_FIELD_PROFILES, Projected_card
+
+LIST_FIELDS = "id,name,closed,pos"
+
+
+def get_configured_board_names(config):
+    return list(dict.fromkeys(
+        [config.board_name, config.archival_board_name] +
+        get_card_board_names(config)))
+
+
+def get_card_board_names(config):
+    board_names = [config.board_name]
+    if config.root and config.root.get("tasks", {}).get("card_sync"):
+        card_sync_config = config.root["tasks"]["card_sync"]
+        board_names.append(card_sync_config["destination_board"]["name"])
+        for source_board in card_sync_config["source_boards"]:
+            board_names.append(source_board["name"])
+    return list(dict.fromkeys(board_names))
+
+
+def fetch_board_snapshot(handle, board_id,
+                         actions_filter=None, actions_since=None,
+                         include_lists=True, include_cards=True):
+    query_params = {
+        "fields": "id,name,closed,url,dateLastActivity",
+        "lists": "open" if include_lists else "none",
+        "list_fields": LIST_FIELDS,
+        "cards": "open" if include_cards else "none",
+        "card_fields": ",".join(CARD_FIELD_PROFILES["sync"]),
+        "card_attachments": "false",
+        "checklists": "none"
+    }
+    if actions_filter and actions_since:
+        query_params["actions"] = actions_filter
+        query_params["actions_since"] = actions_since
+        query_params["actions_limit"] = 1000
+    return handle.fetch_json('/boards/' + board_id, query_params=query_params)
+
+
+def fetch_board_lists(handle, board_id):
+    return handle.fetch_json(
+        '/boards/' + board_id + '/lists',
+        query_params={"filter": "open", "fields": LIST_FIELDS})
+
+
+def fetch_board_snapshot_with_cache(handle, board_id, metadata_cache,
+                                    actions_filter=None, actions_since=None,
+                                    include_cards=True):
+    cached_lists = metadata_cache.get_lists(board_id)
+    if cached_lists is not None and not (actions_filter and actions_since):
+        actions_filter = ",".join(STRUCTURAL_ACTION_TYPES)
+        actions_since = metadata_cache.lists_since(board_id)
+    snapshot = fetch_board_snapshot(
+        handle, board_id, actions_filter, actions_since,
+        include_lists=cached_lists is None, include_cards=include_cards)
+    invalidated_board_ids = metadata_cache.invalidate_from_actions(
+        snapshot.get("actions", []))
+    if cached_lists is None:
+        metadata_cache.set_lists(board_id, snapshot["lists"])
+    elif board_id in invalidated_board_ids:
+        snapshot["lists"] = fetch_board_lists(handle, board_id)
+        metadata_cache.set_lists(board_id, snapshot["lists"])
+    else:
+        snapshot["lists"] = cached_lists
+    return snapshot
+
+
+def add_lists_to_registry(board_lookup, board, lists_json):
+    board_lookup.load_board_lists(
+        board.name,
+        [List.from_json(board, list_json) for list_json in lists_json])
+
+
+def load_board_snapshots(handle, board_lookup, board_names,
+                         main_board_name=None,
+                         actions_filter=None,
+                         actions_since=None,
+                         concurrency=1,
+                         metadata_cache=None,
+                         card_board_names=None):
+    card_index = {}
+    recent_actions = None
+    boards = []
+    for board_name in board_names:
+        board = board_lookup.get(board_name)
+        if board is None:
+            print(f'Board "{board_name}" not found.')
+            continue
+        boards.append(board)
+
+    def fetch_snapshot(board):
+        board_actions = (None, None)
+        if board.name == main_board_name:
+            board_actions = (actions_filter, actions_since)
+        include_cards = card_board_names is None or \
+            board.name in card_board_names
+        if metadata_cache is not None:
+            return fetch_board_snapshot_with_cache(
+                handle, board.id, metadata_cache, *board_actions,
+                include_cards=include_cards)
+        return fetch_board_snapshot(
+            handle, board.id, *board_actions, include_cards=include_cards)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        snapshots = [snapshot for snapshot in
+                     executor.map(fetch_snapshot, boards)]
+    for board, snapshot in zip(boards, snapshots):
+        if board.name == main_board_name and actions_filter and actions_since:
+            recent_actions = snapshot.get("actions", [])
+        add_lists_to_registry(board_lookup, board, snapshot["lists"])
+        for card_json in snapshot.get("cards", []):
+            card_index[card_json["id"]] = card_json
+    return card_index, recent_actions
+
+
+def list_cards_from_index(handle, card_index, list_id):
+    return [Projected_card.from_projection(handle, card_json)
+            for card_json in card_index.values()
+            if card_json.get("idList") == list_id]
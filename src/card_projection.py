@@ -0,0 +1,80 @@
+import copy
+
+PROJECTED_ACTION_TYPES = [
+    "addMemberToCard",
+    "commentCard",
+    "moveCardToBoard",
+    "removeMemberFromCard",
+    "updateCard",
+]
+
+
+def get_action_card_id(action):
+    card = action.get("data", {}).get("card")
+    if card and card.get("id"):
+        return card["id"]
+    return None
+
+
+def project_action(card_json, action):
+    data = action["data"]
+    if action["type"] == "updateCard":
+        for field in data.get("old", {}).keys():
+            if field not in data["card"]:
+                return False
+            card_json[field] = data["card"][field]
+        if data.get("listAfter"):
+            card_json["idList"] = data["listAfter"]["id"]
+    elif action["type"] == "moveCardToBoard":
+        card_json["idBoard"] = data["board"]["id"]
+        card_json["idList"] = data["list"]["id"]
+    elif action["type"] == "addMemberToCard":
+        if "idMembers" not in card_json:
+            return False
+        if data["idMember"] not in card_json["idMembers"]:
+            card_json["idMembers"].append(data["idMember"])
+    elif action["type"] == "removeMemberFromCard":
+        if "idMembers" not in card_json:
+            return False
+        if data["idMember"] in card_json["idMembers"]:
+            card_json["idMembers"].remove(data["idMember"])
+    if action.get("date") and \
+            action["date"] > card_json.get("dateLastActivity", ""):
+        card_json["dateLastActivity"] = action["date"]
+    return True
+
+
+def project_card(card_json, card_actions, refresh_policy=None):
+    if card_json is None:
+        return None
+    for action in card_actions:
+        if refresh_policy is not None and \
+                not refresh_policy.is_relevant(action):
+            continue
+        if action["type"] not in PROJECTED_ACTION_TYPES:
+            return None
+        try:
+            if not project_action(card_json, action):
+                return None
+        except KeyError:
+            return None
+    return card_json
+
+
+def project_card_actions(card_json_lookup, action_list, refresh_policy=None):
+    card_actions_lookup = {}
+    for action in reversed(action_list):
+        card_id = get_action_card_id(action)
+        if card_id:
+            card_actions_lookup.setdefault(card_id, []).append(action)
+    card_ids_to_fetch = set()
+    for card_id, card_actions in card_actions_lookup.items():
+        card_json = project_card(
+            copy.deepcopy(card_json_lookup.get(card_id)),
+            card_actions,
+            refresh_policy)
+        if card_json is None:
+            card_ids_to_fetch.add(card_id)
+        else:
+            card_json_lookup[card_id] = card_json
+    return card_ids_to_fetch
@@ -14,6 +14,47 @@ class Daily_config:
         self.done_list_name = os.environ["DONE_LIST_NAME"]
         self.archival_board_name = os.environ["ARCHIVAL_BOARD_NAME"]
         self.automation_username = os.environ["AUTOMATION_USERNAME"]
+        self.http_pool_size = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+        self.http_connect_timeout = float(
+            os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+        self.http_read_timeout = float(
+            os.environ.get("HTTP_READ_TIMEOUT", "30"))
+        self.rate_limit_per_api_key = int(
+            os.environ.get("RATE_LIMIT_PER_API_KEY", "300"))
+        self.rate_limit_per_token = int(
+            os.environ.get("RATE_LIMIT_PER_TOKEN", "100"))
+        self.rate_limit_interval = float(
+            os.environ.get("RATE_LIMIT_INTERVAL", "10"))
+        self.retry_methods = [
+            http_method.strip().upper() for http_method in
+            os.environ.get("RETRY_METHODS", "GET").split(",")
+            if http_method.strip() != ""]
+        self.retry_max_attempts = int(
+            os.environ.get("RETRY_MAX_ATTEMPTS", "5"))
+        self.retry_backoff_base = float(
+            os.environ.get("RETRY_BACKOFF_BASE", "0.5"))
+        self.retry_backoff_max = float(
+            os.environ.get("RETRY_BACKOFF_MAX", "30"))
+        self.retry_deadline = float(
+            os.environ.get("RETRY_DEADLINE", "120"))
+        self.fetch_concurrency = int(
+            os.environ.get("FETCH_CONCURRENCY", "8"))
+        self.action_log_segment_size = int(
+            os.environ.get("ACTION_LOG_SEGMENT_SIZE", "10000"))
+        self.local_store_file = os.environ.get(
+            "LOCAL_STORE_FILE", "local_store.sqlite3")
+        self.metadata_cache_file = os.environ.get(
+            "METADATA_CACHE_FILE", "metadata_cache.json")
+        self.metadata_cache_ttl = float(
+            os.environ.get("METADATA_CACHE_TTL", "86400"))
+        self.archival_concurrency = int(
+            os.environ.get("ARCHIVAL_CONCURRENCY", "4"))
+        self.archival_move_attempts = int(
+            os.environ.get("ARCHIVAL_MOVE_ATTEMPTS", "3"))
+        self.tracked_card_fields = [
+            field.strip() for field in
+            os.environ.get("TRACKED_CARD_FIELDS", "").split(",")
+            if field.strip() != ""]
         if (os.environ.get("CONFIG_FILE") and os.environ["CONFIG_FILE"] != ""):
             self.root = json.load(open(os.environ["CONFIG_FILE"]))
         else:
@@ -1,103 +1,95 @@
 import traceback
 import json
 import trello
-from trello import TrelloClient
+from trello import List, TrelloClient
 from dotenv import load_dotenv
-import time
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+from action_fetch import ACTION_PAGE_SIZE, create_bootstrap_windows, \
+    fetch_actions_since, fetch_windows_by_page
+from action_log import load_action_log
 from archival import perform_archival
+from board_snapshot import get_configured_board_names, load_board_snapshots, \
+    fetch_board_lists, get_card_board_names
+from card_projection import project_card_actions
 from config_object import Daily_config
+from local_store import Local_store
+from metadata_cache import Metadata_cache, STRUCTURAL_ACTION_TYPES
+from refresh_policy import Refresh_policy
 from sync_cards import perform_sync_cards
-
-
-def patched_fetch_json(self,
-                       uri_path,
-                       http_method='GET',
-                       headers=None,
-                       query_params=None,
-                       post_args=None,
-                       files=None):
-    """ Fetch some JSON from Trello """
-
-    # explicit values here to avoid mutable default values
-    if headers is None:
-        headers = {}
-    if query_params is None:
-        query_params = {}
-    if post_args is None:
-        post_args = {}
-
-    # if files specified, we don't want any data
-    data = None
-    if files is None and post_args != {}:
-        data = json.dumps(post_args)
-
-    # set content type and accept headers to handle JSON
-    if http_method in ("POST", "PUT", "DELETE") and not files:
-        headers['Content-Type'] = 'application/json; charset=utf-8'
-
-    headers['Accept'] = 'application/json'
-
-    # construct the full URL without query parameters
-    if uri_path[0] == '/':
-        uri_path = uri_path[1:]
-    url = 'https://api.trello.com/1/%s' % uri_path
-
-    if self.oauth is None:
-        query_params['key'] = self.api_key
-        query_params['token'] = self.api_secret
-
-    # perform the HTTP requests, if possible uses OAuth authentication
-    response = self.http_service.request(http_method, url, params=query_params,
-                                         headers=headers, data=data,
-                                         auth=self.oauth, files=files,
-                                         proxies=self.proxies)
-
-    if response.status_code == 401:
-        raise trello.Unauthorized("%s at %s" % (response.text, url), response)
-    if response.status_code != 200:
-        raise trello.ResourceUnavailable(
-            "%s at %s" % (response.text, url), response)
-
-    return response.json()
-
-
-trello.TrelloClient.fetch_json = patched_fetch_json
+from trello_batch import fetch_cards_batched
+from trello_helper import Board_registry
+from trello_transport import create_transport, install_transport, \
+    report_transport_stats
+
+CARD_ACTION_TYPES = [
+    "addAttachmentToCard",
+    "addChecklistToCard",
+    "addMemberToCard",
+    "commentCard",
+    "convertToCardFromCheckItem",
+    "copyCard",
+    "createCard",
+    "deleteCard",
+    "emailCard",
+    "moveCardFromBoard",
+    "moveCardToBoard",
+    "removeChecklistFromCard",
+    "removeMemberFromCard",
+    "updateCard",
+    "updateCheckItemStateOnCard",
+]
+FEED_ACTION_TYPES = CARD_ACTION_TYPES + STRUCTURAL_ACTION_TYPES
+BOOTSTRAP_WINDOWS_PER_WORKER = 4
 
 
 def run():
     config = Daily_config()
     context = {}
-    context["action_list"], context["card_json_lookup"] = \
-        load_from_local(config)
+    context["action_log"], context["local_store"] = load_from_local(config)
+    context["card_json_lookup"] = context["local_store"].cards
 
     context["handle"] = init_trello_conn(config)
-    context["board_lookup"] = setup_board_lookup(context["handle"])
-    context["list_lookup"] = setup_list_lookup(context["board_lookup"])
+    context["metadata_cache"] = Metadata_cache(
+        config.metadata_cache_file, config.metadata_cache_ttl)
+    context["board_lookup"] = setup_board_lookup(
+        context["handle"],
+        get_configured_board_names(config),
+        context["metadata_cache"])
+    context["card_index"], context["recent_actions"] = \
+        setup_board_snapshots(context, config)
 
-    if len(context["action_list"]) == 0:
-        context["action_list"], _, context["card_json_lookup"] =\
-            first_time_load(context, config)
+    if context["action_log"].is_empty():
+        _, context["card_json_lookup"] = first_time_load(context, config)
     else:
-        context["action_list"], context["card_json_lookup"] = \
-            update_cards_and_actions(context, config)
+        context["card_json_lookup"] = update_cards_and_actions(context, config)
+    context["metadata_cache"].save()
 
     perform_archival(context, config)
     perform_sync_cards(context, config)
+    report_transport_stats(context["handle"])
 
 
 def load_from_local(config):
-    action_list = load_action_list(config)
-    card_json_lookup = load_card_lookup(config)
-    return action_list, card_json_lookup
+    action_log = load_action_list(config)
+    local_store = load_local_store(config, action_log)
+    return action_log, local_store
+
+
+def load_local_store(config, action_log):
+    local_store = Local_store(config.local_store_file)
+    num_of_actions = local_store.sync_actions(action_log)
+    if num_of_actions > 0:
+        print(f'{num_of_actions} Actions added to local store.')
+    if len(local_store.cards) == 0:
+        local_store.cards.update(load_card_lookup(config))
+        local_store.commit()
+    return local_store
 
 
 def load_action_list(config):
-    try:
-        actions_json = json.load(open(config.actions_file, "r"))
-    except FileNotFoundError:
-        actions_json = []
-    return actions_json
+    return load_action_log(
+        config.actions_file, config.action_log_segment_size)
 
 
 def load_card_lookup(config):
@@ -109,6 +101,7 @@ def load_card_lookup(config):
 
 
 def init_trello_conn(config):
+    install_transport(create_transport(config))
     client = TrelloClient(
         api_key=config.api_key,
         token=config.token)
@@ -117,82 +110,104 @@ def init_trello_conn(config):
 
 def first_time_load(context, config):
     print("First time setup...")
-    action_list = retrieve_all_actions_from_trello(
-        context["board_lookup"], config.board_name)
-    save_action_list(action_list, config)
+    retrieve_all_actions_from_trello(
+        context["board_lookup"],
+        config.board_name,
+        context["local_store"],
+        config.fetch_concurrency)
+    for action_list in context["local_store"].find_action_batches(
+            config.action_log_segment_size):
+        context["action_log"].append(list(reversed(action_list)))
     cards = retrieve_all_cards_from_trello(
         context["board_lookup"], config.board_name)
     card_lookup, card_json_lookup = create_card_lookup(cards)
-    save_card_lookup(card_json_lookup, config)
-    return action_list, card_lookup, card_json_lookup
+    context["card_json_lookup"].update(card_json_lookup)
+    context["local_store"].commit()
+    context["local_store"].clear_bootstrap_windows()
+    latest_action = context["local_store"].latest_action()
+    if latest_action is not None:
+        context["action_log"].save_cursor(latest_action["id"])
+    return card_lookup, context["card_json_lookup"]
+
+
+def setup_board_lookup(handle, board_names=None, metadata_cache=None):
+    boards_json = None
+    if metadata_cache is not None:
+        boards_json = metadata_cache.get_member_boards()
+    if boards_json is None or not set(board_names or []).issubset(
+            [board_json["name"] for board_json in boards_json]):
+        boards_json = handle.fetch_json(
+            '/members/me/boards',
+            query_params={"filter": "all", "fields": "id,name,closed,url"})
+        if metadata_cache is not None:
+            metadata_cache.set_member_boards(boards_json)
+    board_lookup = Board_registry(
+        handle, {board_json["name"]: board_json for board_json in boards_json})
+    for board_name in board_names or board_lookup.board_json_lookup.keys():
+        if board_name in board_lookup:
+            board_lookup.resolve(board_name)
+        else:
+            print(f'Board "{board_name}" not found.')
+    return board_lookup
 
 
-def setup_board_lookup(handle):
-    list_of_boards = handle.list_boards()
-    board_lookup = {board.name: board for board in list_of_boards}
+def setup_board_snapshots(context, config):
+    return load_board_snapshots(
+        context["handle"],
+        context["board_lookup"],
+        get_configured_board_names(config),
+        config.board_name,
+        ','.join(FEED_ACTION_TYPES),
+        context["action_log"].cursor(),
+        config.fetch_concurrency,
+        context["metadata_cache"],
+        get_card_board_names(config))
+
+
+def setup_board_lists(board_lookup, concurrency=1, metadata_cache=None):
+    def get_board_lists(board_name):
+        board = board_lookup[board_name]
+        if metadata_cache is None:
+            return board.get_lists("open")
+        lists_json = metadata_cache.get_lists(board.id)
+        if lists_json is None:
+            lists_json = fetch_board_lists(board.client, board.id)
+            metadata_cache.set_lists(board.id, lists_json)
+        return [List.from_json(board, list_json) for list_json in lists_json]
+
+    board_names = [board_name for board_name in board_lookup.keys()]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        board_lists = [lists for lists in executor.map(
+            get_board_lists, board_names)]
+    for board_name, lists in zip(board_names, board_lists):
+        board_lookup.load_board_lists(board_name, lists)
     return board_lookup
 
 
-def setup_list_lookup(board_lookup):
-    list_lookup = {
-        "board_name": {},
-        "list_id": {}
-    }
-    for board_name in board_lookup.keys():
-        board = board_lookup[board_name]
-        lists = board.get_lists("open")
-        for list in lists:
-            list_lookup["list_id"][list.id] = (list, board_name, list.name)
-            if list_lookup["board_name"].get(board_name):
-                list_lookup["board_name"][board_name][list.name] = \
-                    (list, board_name, list.name)
-            else:
-                list_lookup["board_name"][board_name] = {
-                    list.name: (list, board_name, list.name)
-                }
-    return list_lookup
-
-
-def retrieve_all_actions_from_trello(board_lookup, board_name):
-    action_list = [
-        "addAttachmentToCard",
-        "addChecklistToCard",
-        "addMemberToCard",
-        "commentCard",
-        "convertToCardFromCheckItem",
-        "copyCard",
-        "createCard",
-        "deleteCard",
-        "emailCard",
-        "moveCardFromBoard",
-        "moveCardToBoard",
-        "removeChecklistFromCard",
-        "removeMemberFromCard",
-        "updateCard",
-        "updateCheckItemStateOnCard",
-    ]
-    action_list_str = ','.join(action_list)
-    all_actions = []
-    actions = board_lookup[board_name].fetch_actions(
-        {"fields", "all", "filter", action_list_str}, action_limit=1000)
-    num_of_actions_retrieved = len(actions)
-    all_actions = all_actions + actions
-    time.sleep(1)
-    while num_of_actions_retrieved == 1000:
-        actions = board_lookup[board_name].fetch_actions(
-            {"fields", "all", "filter", action_list_str},
-            action_limit=1000,
-            before=all_actions[-1]['id'])
-        num_of_actions_retrieved = len(actions)
-        print(num_of_actions_retrieved)
-        all_actions = all_actions + actions
-        time.sleep(1)
-    return all_actions
-
-
-def save_action_list(action_list, config):
-    json.dump(action_list,
-              open(config.actions_file, "w"), indent="  ")
+def retrieve_all_actions_from_trello(board_lookup, board_name, local_store,
+                                     concurrency=1):
+    board = board_lookup[board_name]
+    windows = local_store.find_bootstrap_windows()
+    if len(windows) == 0:
+        windows = local_store.add_bootstrap_windows(create_bootstrap_windows(
+            board.id, concurrency * BOOTSTRAP_WINDOWS_PER_WORKER))
+    else:
+        print("Resuming from checkpoint...")
+    pending_windows = {window_id: (since, before)
+                       for window_id, (since, before, done) in windows.items()
+                       if not done}
+
+    def on_page(window_id, actions, before):
+        local_store.checkpoint_bootstrap_window(window_id, actions, before)
+        print(f'{len(actions)} Actions retrieved')
+
+    fetch_windows_by_page(
+        board.client,
+        board.id,
+        ','.join(FEED_ACTION_TYPES),
+        pending_windows,
+        concurrency,
+        on_page)
 
 
 def retrieve_all_cards_from_trello(board_lookup, board_name):
@@ -206,76 +221,89 @@ def create_card_lookup(cards):
     return [card_lookup, card_json_lookup]
 
 
-def save_card_lookup(card_json_lookup, config):
-    json.dump(card_json_lookup,
-              open(config.cards_file, "w"), indent="  ")
+def append_actions(context, new_action_list):
+    known_action_ids = context["local_store"].find_known_action_ids(
+        action["id"] for action in new_action_list)
+    new_action_list = [action for action in new_action_list
+                       if action["id"] not in known_action_ids]
+    context["action_log"].append(new_action_list)
+    context["local_store"].add_actions(new_action_list)
 
 
 def update_cards_and_actions(context, config):
     print("Looking for updates...")
-    new_action_list = retrieve_latest_actions_from_trello(
-        context["board_lookup"], config.board_name, context["action_list"][0]['id'])
+    new_action_list = context["recent_actions"]
+    if new_action_list is None or len(new_action_list) >= ACTION_PAGE_SIZE:
+        new_action_list = retrieve_latest_actions_from_trello(
+            context["board_lookup"],
+            config.board_name,
+            context["action_log"].cursor(),
+            config.fetch_concurrency,
+            new_action_list)
+        context["metadata_cache"].invalidate_from_actions(new_action_list)
     print(f'{len(new_action_list)} new Actions found.')
     card_json_lookup = update_card_json_lookup(
         context["handle"],
         context["card_json_lookup"],
-        new_action_list)
-    action_list = update_action_list(
-        context["action_list"], new_action_list)
-    save_action_list(action_list, config)
-    save_card_lookup(card_json_lookup, config)
-    return action_list, card_json_lookup
+        new_action_list,
+        config.fetch_concurrency,
+        Refresh_policy(config.tracked_card_fields))
+    append_actions(context, new_action_list)
+    context["local_store"].commit()
+    if len(new_action_list) > 0:
+        context["action_log"].save_cursor(new_action_list[0]["id"])
+    return card_json_lookup
 
 
 def retrieve_latest_actions_from_trello(board_lookup,
                                         board_name,
-                                        last_action_id):
-    action_list = [
-        "addAttachmentToCard",
-        "addChecklistToCard",
-        "addMemberToCard",
-        "commentCard",
-        "convertToCardFromCheckItem",
-        "copyCard",
-        "createCard",
-        "deleteCard",
-        "emailCard",
-        "moveCardFromBoard",
-        "moveCardToBoard",
-        "removeChecklistFromCard",
-        "removeMemberFromCard",
-        "updateCard",
-        "updateCheckItemStateOnCard",
-    ]
-    action_list_str = ','.join(action_list)
-    return board_lookup[board_name].fetch_actions(
-        {"fields",
-         "all",
-         "filter",
-         action_list_str},
-        action_limit=1000,
-        since=last_action_id)
+                                        last_action_id,
+                                        concurrency=1,
+                                        first_page=None):
+    board = board_lookup[board_name]
+    return fetch_actions_since(
+        board.client,
+        board.id,
+        ','.join(FEED_ACTION_TYPES),
+        last_action_id,
+        concurrency,
+        first_page)
 
 
 def update_card_json_lookup(
-        handle, card_json_lookup, new_action_list):
-    updated_card_entries = get_card_ids_from_action_list(new_action_list)
-    total_cards = len(updated_card_entries)
-    print(f'{total_cards} Cards need to be checked for update')
+        handle, card_json_lookup, new_action_list, concurrency=1,
+        refresh_policy=None):
+    card_ids_to_fetch = project_card_actions(
+        card_json_lookup, new_action_list, refresh_policy)
+    card_entries = {}
+    for card_entry in get_card_ids_from_action_list(new_action_list):
+        card_entries.setdefault(card_entry[0], card_entry)
+    updated_card_ids = sorted(card_ids_to_fetch)
+    total_cards = len(updated_card_ids)
+    print(f'{total_cards} Cards need to be checked for update, '
+          f'{len(card_entries) - total_cards} fetches avoided')
     progress_bar = tqdm(total=total_cards)
-    for updated_card_entry in updated_card_entries:
-        (updated_card_id, updated_card_name, updated_card_link) = updated_card_entry
-        progress_bar.set_description(
-            f"Processing {updated_card_id} {updated_card_link} {updated_card_name}")
-        try:
-            updated_card = handle.get_card(updated_card_id)
-            card_json_lookup[updated_card_id] = updated_card._json_obj
-        except (trello.ResourceUnavailable):
+
+    def on_result(routes, result):
+        progress_bar.set_description(f"Processed {routes[-1]}")
+        progress_bar.update(len(routes))
+
+    results = fetch_cards_batched(
+        handle,
+        updated_card_ids,
+        concurrency,
+        on_result,
+        query_params={'customFieldItems': 'true'})
+    for updated_card_id, result in zip(updated_card_ids, results):
+        (_card_id, updated_card_name, updated_card_link) = \
+            card_entries[updated_card_id]
+        if isinstance(result, trello.ResourceUnavailable):
             print(
-                f"Error getting {updated_card_id} {trello.ResourceUnavailable}")
-            print(traceback.format_exc())
-        time.sleep(1)
-        progress_bar.update(1)
+                f"Error getting {updated_card_id} {updated_card_link} "
+                f"{updated_card_name} {trello.ResourceUnavailable}")
+            print("".join(traceback.format_exception(result)))
+            continue
+        card_json_lookup[updated_card_id] = result
     progress_bar.close()
     return card_json_lookup
 
@@ -294,10 +322,6 @@ def get_card_ids_from_action_list(action_list):
     return list(set(card_ids))
 
 
-def update_action_list(action_list, new_action_list):
-    return new_action_list + action_list
-
-
 if __name__ == "__main__":
     load_dotenv()
     run()
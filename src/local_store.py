@@ -0,0 +1,330 @@
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS actions (
+        id TEXT PRIMARY KEY,
+        card_id TEXT,
+        type TEXT,
+        list_id TEXT,
+        list_after_id TEXT,
+        date TEXT,
+        json TEXT NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS actions_card_id ON actions (card_id, date)",
+    "CREATE INDEX IF NOT EXISTS actions_type ON actions (type, date)",
+    "CREATE INDEX IF NOT EXISTS actions_list_id ON actions (list_id, date)",
+    """CREATE INDEX IF NOT EXISTS actions_list_after_id
+        ON actions (list_after_id, date)""",
+    "CREATE INDEX IF NOT EXISTS actions_date ON actions (date)",
+    """CREATE TABLE IF NOT EXISTS cards (
+        id TEXT PRIMARY KEY,
+        json TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS list_entries (
+        card_id TEXT NOT NULL,
+        list_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        PRIMARY KEY (card_id, list_id))""",
+    """CREATE TABLE IF NOT EXISTS card_movements (
+        card_id TEXT PRIMARY KEY,
+        date TEXT NOT NULL,
+        username TEXT,
+        json TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS board_cursors (
+        board_id TEXT PRIMARY KEY,
+        action_id TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS card_cursors (
+        card_id TEXT PRIMARY KEY,
+        action_id TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS bootstrap_windows (
+        id INTEGER PRIMARY KEY,
+        since TEXT NOT NULL,
+        before TEXT,
+        done INTEGER NOT NULL DEFAULT 0)""",
+]
+LIST_ENTRY_COLUMN = """CASE type
+    WHEN 'updateCard' THEN list_after_id
+    WHEN 'moveCardToBoard' THEN list_id END"""
+UPSERT_LIST_ENTRY = """INSERT INTO list_entries (card_id, list_id, date)
+    VALUES (?, ?, ?)
+    ON CONFLICT (card_id, list_id)
+    DO UPDATE SET date = MAX(date, excluded.date)"""
+UPSERT_CARD_MOVEMENT = """INSERT INTO card_movements
+    (card_id, date, username, json) VALUES (?, ?, ?, ?)
+    ON CONFLICT (card_id) DO UPDATE SET
+        date = excluded.date,
+        username = excluded.username,
+        json = excluded.json
+    WHERE excluded.date > card_movements.date"""
+SYNC_BATCH_SIZE = 1000
+
+
+def get_nested_id(data, key):
+    value = data.get(key)
+    if isinstance(value, dict):
+        return value.get("id")
+    return None
+
+
+def create_action_row(action):
+    data = action.get("data", {})
+    return (action["id"],
+            get_nested_id(data, "card"),
+            action.get("type"),
+            get_nested_id(data, "list"),
+            get_nested_id(data, "listAfter"),
+            action.get("date"),
+            json.dumps(action))
+
+
+def create_list_entry_row(action):
+    data = action.get("data", {})
+    card_id = get_nested_id(data, "card")
+    if action.get("type") == "updateCard":
+        list_id = get_nested_id(data, "listAfter")
+    elif action.get("type") == "moveCardToBoard":
+        list_id = get_nested_id(data, "list")
+    else:
+        list_id = None
+    if card_id is None or list_id is None or action.get("date") is None:
+        return None
+    return (card_id, list_id, action["date"])
+
+
+def create_card_movement_row(action):
+    data = action.get("data", {})
+    card_id = get_nested_id(data, "card")
+    is_movement = action.get("type") in [
+        "moveCardFromBoard", "moveCardToBoard"] or \
+        (action.get("type") == "updateCard" and
+         data.get("listAfter") is not None)
+    if not is_movement or card_id is None or action.get("date") is None:
+        return None
+    return (card_id,
+            action["date"],
+            action.get("memberCreator", {}).get("username"),
+            json.dumps(action))
+
+
+class Card_snapshots(MutableMapping):
+    def __init__(self, local_store):
+        self.local_store = local_store
+
+    def __getitem__(self, card_id):
+        row = self.local_store.connection.execute(
+            "SELECT json FROM cards WHERE id = ?", (card_id,)).fetchone()
+        if row is None:
+            raise KeyError(card_id)
+        return json.loads(row[0])
+
+    def __setitem__(self, card_id, card_json):
+        self.local_store.connection.execute(
+            "INSERT OR REPLACE INTO cards (id, json) VALUES (?, ?)",
+            (card_id, json.dumps(card_json)))
+
+    def __delitem__(self, card_id):
+        if card_id not in self:
+            raise KeyError(card_id)
+        self.local_store.connection.execute(
+            "DELETE FROM cards WHERE id = ?", (card_id,))
+
+    def __contains__(self, card_id):
+        return self.local_store.connection.execute(
+            "SELECT 1 FROM cards WHERE id = ?", (card_id,)).fetchone() \
+            is not None
+
+    def __iter__(self):
+        for row in self.local_store.connection.execute(
+                "SELECT id FROM cards ORDER BY id"):
+            yield row[0]
+
+    def __len__(self):
+        return self.local_store.connection.execute(
+            "SELECT COUNT(*) FROM cards").fetchone()[0]
+
+
+class Local_store:
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.RLock()
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.backfill_list_entries()
+        self.backfill_card_movements()
+        self.connection.commit()
+        self.cards = Card_snapshots(self)
+
+    def backfill_list_entries(self):
+        has_list_entries = self.connection.execute(
+            "SELECT 1 FROM list_entries LIMIT 1").fetchone() is not None
+        if has_list_entries:
+            return
+        self.connection.execute(
+            "INSERT INTO list_entries (card_id, list_id, date) "
+            f"SELECT card_id, {LIST_ENTRY_COLUMN} AS entry_list_id, "
+            "MAX(date) FROM actions "
+            "WHERE card_id IS NOT NULL AND date IS NOT NULL "
+            "AND entry_list_id IS NOT NULL "
+            "GROUP BY card_id, entry_list_id")
+
+    def backfill_card_movements(self):
+        has_card_movements = self.connection.execute(
+            "SELECT 1 FROM card_movements LIMIT 1").fetchone() is not None
+        if has_card_movements:
+            return
+        for row in self.connection.execute(
+                "SELECT json FROM actions "
+                "WHERE type IN ('moveCardFromBoard', 'moveCardToBoard') "
+                "OR list_after_id IS NOT NULL").fetchall():
+            self.upsert_card_movements([json.loads(row[0])])
+
+    def upsert_card_movements(self, actions):
+        card_movement_rows = [
+            create_card_movement_row(action) for action in actions]
+        self.connection.executemany(
+            UPSERT_CARD_MOVEMENT,
+            [card_movement_row for card_movement_row in card_movement_rows
+             if card_movement_row is not None])
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def add_actions(self, actions):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO actions "
+            "(id, card_id, type, list_id, list_after_id, date, json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [create_action_row(action) for action in actions])
+        list_entry_rows = [create_list_entry_row(action) for action in actions]
+        self.connection.executemany(
+            UPSERT_LIST_ENTRY,
+            [list_entry_row for list_entry_row in list_entry_rows
+             if list_entry_row is not None])
+        self.upsert_card_movements(actions)
+        self.connection.commit()
+
+    def latest_action(self):
+        row = self.connection.execute(
+            "SELECT json FROM actions ORDER BY date DESC, id DESC LIMIT 1"
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def find_action_batches(self, batch_size):
+        last_row = ("", "")
+        while True:
+            rows = self.connection.execute(
+                "SELECT date, id, json FROM actions "
+                "WHERE (date, id) > (?, ?) ORDER BY date, id LIMIT ?",
+                (*last_row, batch_size)).fetchall()
+            if len(rows) == 0:
+                return
+            last_row = rows[-1][:2]
+            yield [json.loads(row[2]) for row in rows]
+
+    def find_bootstrap_windows(self):
+        return {row[0]: (row[1], row[2], bool(row[3]))
+                for row in self.connection.execute(
+                    "SELECT id, since, before, done FROM bootstrap_windows "
+                    "ORDER BY id")}
+
+    def add_bootstrap_windows(self, windows):
+        self.connection.executemany(
+            "INSERT INTO bootstrap_windows (since, before) VALUES (?, ?)",
+            windows)
+        self.connection.commit()
+        return self.find_bootstrap_windows()
+
+    def checkpoint_bootstrap_window(self, window_id, actions, before):
+        self.connection.execute(
+            "UPDATE bootstrap_windows SET before = COALESCE(?, before), "
+            "done = ? WHERE id = ?",
+            (before, before is None, window_id))
+        self.add_actions(actions)
+
+    def clear_bootstrap_windows(self):
+        self.connection.execute("DELETE FROM bootstrap_windows")
+        self.connection.commit()
+
+    def find_known_action_ids(self, action_ids):
+        known_action_ids = set()
+        action_ids = list(action_ids)
+        for index in range(0, len(action_ids), SYNC_BATCH_SIZE):
+            batch = action_ids[index:index + SYNC_BATCH_SIZE]
+            known_action_ids.update(row[0] for row in self.connection.execute(
+                "SELECT id FROM actions WHERE id IN (" +
+                ",".join("?" * len(batch)) + ")", batch))
+        return known_action_ids
+
+    def find_move_to_list_date(self, card_id, list_id):
+        row = self.connection.execute(
+            "SELECT date FROM list_entries WHERE card_id = ? AND list_id = ?",
+            (card_id, list_id)).fetchone()
+        return None if row is None else row[0]
+
+    def add_card_movements(self, board_id, actions):
+        with self.lock:
+            self.upsert_card_movements(actions)
+            if len(actions) > 0:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO board_cursors "
+                    "(board_id, action_id) VALUES (?, ?)",
+                    (board_id, actions[0]["id"]))
+            else:
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO board_cursors "
+                    "(board_id, action_id) VALUES (?, ?)",
+                    (board_id, board_id))
+            self.connection.commit()
+
+    def find_board_cursor(self, board_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT action_id FROM board_cursors WHERE board_id = ?",
+                (board_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def add_card_actions(self, card_id, actions):
+        with self.lock:
+            self.upsert_card_movements(actions)
+            if len(actions) > 0:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO card_cursors "
+                    "(card_id, action_id) VALUES (?, ?)",
+                    (card_id, actions[0]["id"]))
+            self.connection.commit()
+
+    def find_card_cursor(self, card_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT action_id FROM card_cursors WHERE card_id = ?",
+                (card_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def find_latest_movement(self, card_ids):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT json FROM card_movements WHERE card_id IN (" +
+                ",".join("?" * len(card_ids)) + ") "
+                "ORDER BY date DESC LIMIT 1", list(card_ids)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def sync_actions(self, action_log):
+        latest_action = self.latest_action()
+        batch = []
+        num_of_actions = 0
+        for action in action_log.iter_newest_first():
+            if latest_action is not None and \
+                    action["id"] == latest_action["id"]:
+                break
+            batch.append(action)
+            num_of_actions += 1
+            if len(batch) >= SYNC_BATCH_SIZE:
+                self.add_actions(batch)
+                batch = []
+        self.add_actions(batch)
+        return num_of_actions
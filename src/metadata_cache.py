@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+STRUCTURAL_ACTION_TYPES = [
+    "createList",
+    "updateList",
+    "updateBoard",
+    "moveListToBoard",
+]
+
+
+class Metadata_cache:
+    def __init__(self, cache_file=None, ttl=86400.0, clock=time.time):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = self.load()
+
+    def load(self):
+        entries = {"member_boards": None, "boards": {}}
+        if not self.cache_file:
+            return entries
+        try:
+            with open(self.cache_file, "r") as cache_file:
+                entries.update(json.load(cache_file))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return entries
+
+    def save(self):
+        if not self.cache_file:
+            return
+        with self.lock, open(self.cache_file, "w") as cache_file:
+            json.dump(self.entries, cache_file, indent="  ")
+
+    def is_fresh(self, entry):
+        return entry is not None and \
+            self.clock() - entry["fetched_at"] < self.ttl
+
+    def get_member_boards(self):
+        with self.lock:
+            entry = self.entries["member_boards"]
+            return entry["boards"] if self.is_fresh(entry) else None
+
+    def set_member_boards(self, boards_json):
+        with self.lock:
+            self.entries["member_boards"] = {
+                "fetched_at": self.clock(),
+                "boards": boards_json
+            }
+
+    def get_lists(self, board_id):
+        with self.lock:
+            entry = self.entries["boards"].get(board_id)
+            return entry["lists"] if self.is_fresh(entry) else None
+
+    def set_lists(self, board_id, lists_json):
+        with self.lock:
+            self.entries["boards"][board_id] = {
+                "fetched_at": self.clock(),
+                "lists": lists_json
+            }
+
+    def lists_since(self, board_id):
+        with self.lock:
+            fetched_at = self.entries["boards"][board_id]["fetched_at"]
+        return datetime.fromtimestamp(fetched_at, timezone.utc) \
+            .strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def invalidate_from_actions(self, actions):
+        invalidated_board_ids = set()
+        with self.lock:
+            for action in actions:
+                if action["type"] not in STRUCTURAL_ACTION_TYPES:
+                    continue
+                for board_key in ["board", "boardSource", "boardTarget"]:
+                    board = action["data"].get(board_key)
+                    if board and board.get("id"):
+                        self.entries["boards"].pop(board["id"], None)
+                        invalidated_board_ids.add(board["id"])
+                if action["type"] == "updateBoard":
+                    self.entries["member_boards"] = None
+        return invalidated_board_ids
@@ -0,0 +1,111 @@
+import threading
+import time
+
+
+class Token_bucket:
+    def __init__(self, capacity, interval, now):
+        self.capacity = float(capacity)
+        self.interval = float(interval)
+        self.tokens = float(capacity)
+        self.updated_at = now
+        self.blocked_until = now
+
+    def refill(self, now):
+        elapsed = max(now - self.updated_at, 0)
+        self.tokens = min(
+            self.capacity,
+            self.tokens + elapsed * self.capacity / self.interval)
+        self.updated_at = now
+
+    def wait_time(self, now):
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) * self.interval / self.capacity
+
+    def take(self):
+        self.tokens -= 1
+
+    def resize(self, capacity, interval):
+        self.capacity = float(capacity)
+        self.interval = float(interval)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def limit_remaining(self, remaining):
+        self.tokens = min(self.tokens, float(remaining))
+
+    def block_until(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 0)
+
+
+class Rate_limiter:
+    RATE_LIMIT_HEADERS = {
+        "api_key": "x-rate-limit-api-key-",
+        "token": "x-rate-limit-api-token-"
+    }
+
+    def __init__(self,
+                 api_key_limit=300,
+                 token_limit=100,
+                 interval=10.0,
+                 clock=time.monotonic,
+                 sleep=time.sleep):
+        self.limits = {"api_key": api_key_limit, "token": token_limit}
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def get_buckets(self, api_key, token, now):
+        buckets = []
+        for (kind, value) in [("api_key", api_key), ("token", token)]:
+            if (kind, value) not in self.buckets:
+                self.buckets[(kind, value)] = Token_bucket(
+                    self.limits[kind], self.interval, now)
+            buckets.append(self.buckets[(kind, value)])
+        return buckets
+
+    def acquire(self, api_key, token):
+        while True:
+            with self.lock:
+                now = self.clock()
+                buckets = self.get_buckets(api_key, token, now)
+                wait = max(bucket.wait_time(now) for bucket in buckets)
+                if wait <= 0:
+                    for bucket in buckets:
+                        bucket.take()
+                    return
+            self.sleep(wait)
+
+    def update_from_response(self, api_key, token, response):
+        headers = response.headers
+        with self.lock:
+            now = self.clock()
+            api_key_bucket, token_bucket = self.get_buckets(
+                api_key, token, now)
+            for (kind, bucket) in [("api_key", api_key_bucket),
+                                   ("token", token_bucket)]:
+                prefix = self.RATE_LIMIT_HEADERS[kind]
+                limit = headers.get(prefix + "max")
+                interval_ms = headers.get(prefix + "interval-ms")
+                remaining = headers.get(prefix + "remaining")
+                if limit and interval_ms:
+                    bucket.resize(int(limit), int(interval_ms) / 1000.0)
+                if remaining is not None:
+                    bucket.limit_remaining(int(remaining))
+            if response.status_code == 429:
+                retry_after = parse_retry_after(
+                    headers.get("Retry-After"), self.interval)
+                for bucket in [api_key_bucket, token_bucket]:
+                    bucket.block_until(now + retry_after)
+
+
+def parse_retry_after(retry_after, default):
+    try:
+        return max(float(retry_after), 0)
+    except (TypeError, ValueError):
+        return default
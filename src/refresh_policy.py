@@ -0,0 +1,52 @@
+ALL_FIELDS = "*"
+ACTION_FIELDS = {
+    "addAttachmentToCard": ["idAttachmentCover", "badges"],
+    "addChecklistToCard": ["idChecklists", "badges"],
+    "addMemberToCard": ["idMembers"],
+    "commentCard": ["badges"],
+    "convertToCardFromCheckItem": [ALL_FIELDS],
+    "copyCard": [ALL_FIELDS],
+    "createCard": [ALL_FIELDS],
+    "deleteCard": [ALL_FIELDS],
+    "emailCard": [ALL_FIELDS],
+    "moveCardFromBoard": ["idBoard", "idList"],
+    "moveCardToBoard": ["idBoard", "idList"],
+    "removeChecklistFromCard": ["idChecklists", "badges"],
+    "removeMemberFromCard": ["idMembers"],
+    "updateCheckItemStateOnCard": ["badges"],
+}
+DEFAULT_TRACKED_FIELDS = [
+    "closed",
+    "customFieldItems",
+    "desc",
+    "due",
+    "dueComplete",
+    "idBoard",
+    "idLabels",
+    "idList",
+    "idMembers",
+    "labels",
+    "name",
+    "start",
+]
+
+
+class Refresh_policy:
+    def __init__(self, tracked_fields=None, action_fields=None):
+        self.tracked_fields = set(tracked_fields or DEFAULT_TRACKED_FIELDS)
+        self.action_fields = dict(ACTION_FIELDS)
+        self.action_fields.update(action_fields or {})
+
+    def affected_fields(self, action):
+        if action["type"] == "updateCard":
+            affected_fields = set(action["data"].get("old", {}).keys())
+            if action["data"].get("listAfter"):
+                affected_fields.add("idList")
+            return affected_fields
+        return set(self.action_fields.get(action["type"], [ALL_FIELDS]))
+
+    def is_relevant(self, action):
+        affected_fields = self.affected_fields(action)
+        return ALL_FIELDS in affected_fields or \
+            ALL_FIELDS in self.tracked_fields or \
+            len(affected_fields & self.tracked_fields) > 0
@@ -1,9 +1,27 @@
 import json
 import datetime
-from trello_helper import find_list, lookup_board_with_id
+import time
+import trello
+from concurrent.futures import ThreadPoolExecutor
+from action_fetch import fetch_actions_since, fetch_actions_window
+from board_snapshot import list_cards_from_index
+from trello_batch import fetch_cards_batched, fetch_card_actions_batched
+from trello_helper import find_list, lookup_board_with_id, \
+    create_card_stub, card_projection_query, Projected_card, \
+    CARD_FIELD_PROFILES
+
+FULL_SYNC_INTERVAL = 604800
+MOVEMENT_ACTION_TYPES = [
+    "moveCardFromBoard",
+    "moveCardToBoard",
+    "updateCard",
+]
 
 
 def perform_sync_cards(context, config):
+    ingest_card_movements(context, config)
+    context["status_tables"] = compile_status_tables(
+        config, context["board_lookup"])
     context["card_sync_lookup"] = \
         load_card_sync_lookup(config)
     context["card_sync_lookup"] = add_new_sync_cards(context, config)
@@ -12,6 +30,34 @@ def perform_sync_cards(context, config):
     save_card_sync_lookup(context["card_sync_lookup"], config)
 
 
+def ingest_card_movements(context, config):
+    local_store = context.get("local_store")
+    if local_store is None:
+        return
+    card_sync_config = config.root["tasks"]["card_sync"]
+    boards = [context["board_lookup"][board_config["name"]] for board_config
+              in [card_sync_config["destination_board"]] +
+              card_sync_config["source_boards"]]
+    board_cursors = [local_store.find_board_cursor(board.id)
+                     for board in boards]
+    action_filter = ','.join(MOVEMENT_ACTION_TYPES)
+
+    def fetch_movements(board_and_cursor):
+        (board, board_cursor) = board_and_cursor
+        if board_cursor is None:
+            return fetch_actions_window(
+                board.client, board.id, action_filter, None, None)
+        return fetch_actions_since(
+            board.client, board.id, action_filter, board_cursor)
+
+    with ThreadPoolExecutor(max_workers=config.fetch_concurrency) as executor:
+        board_movements = [movements for movements in executor.map(
+            fetch_movements, zip(boards, board_cursors))]
+    for board, movements in zip(boards, board_movements):
+        print(f'{len(movements)} movements ingested for "{board.name}"')
+        local_store.add_card_movements(board.id, movements)
+
+
 def load_card_sync_lookup(config):
     try:
         card_sync_lookup = json.load(
@@ -32,7 +78,8 @@ def add_new_sync_cards(context, config):
             context["board_lookup"],
             source_board["name"],
             source_board["list_names"]["todo"])
-        for source_card in source_list.list_cards():
+        for source_card in list_cards_from_index(
+                context["handle"], context["card_index"], source_list.id):
             source_cards.append(source_card)
 
     placeholder_list = find_list(
@@ -44,11 +91,18 @@ def add_new_sync_cards(context, config):
     for new_card in new_cards:
         print(f"Creating placeholder for {new_card.id}, \"{new_card.name}\"")
         placeholder_card = create_placeholder_card(new_card, placeholder_list)
+        add_card_to_index(context["card_index"], placeholder_card)
         context['card_sync_lookup'] = add_lookup(
             context['card_sync_lookup'], new_card, placeholder_card)
     return context["card_sync_lookup"]
 
 
+def add_card_to_index(card_index, card):
+    card_index[card.id] = {
+        field: card._json_obj.get(field)
+        for field in CARD_FIELD_PROFILES["sync"]}
+
+
 def find_new_cards(card_sync_lookup, list_of_cards):
     new_cards = []
     for card in list_of_cards:
@@ -75,14 +129,52 @@ def save_card_sync_lookup(card_sync_lookup, config):
               open(config.root["tasks"]["card_sync"]["persistence"]["json_file"], "w"), indent="  ")
 
 
+def get_pair_activity(context, source_card_id, placeholder_card_id):
+    return [(context["card_index"].get(card_id) or {}).get("dateLastActivity")
+            for card_id in [source_card_id, placeholder_card_id]]
+
+
+def is_pair_unchanged(source_card_entry, pair_activity):
+    return None not in pair_activity and \
+        source_card_entry.get("activity") == pair_activity
+
+
+def is_full_sync_due(card_sync_lookup, config, now):
+    full_sync_interval = config.root["tasks"]["card_sync"].get(
+        "full_sync_interval", FULL_SYNC_INTERVAL)
+    last_full_sync = card_sync_lookup.get("last_full_sync")
+    return last_full_sync is None or now - last_full_sync >= full_sync_interval
+
+
 def sync_all_cards(context, config):
+    now = time.time()
     source_cards = context["card_sync_lookup"]["source"]
+    card_pairs = [(source_card_id, source_cards[source_card_id]["placeholder"])
+                  for source_card_id in source_cards.keys()]
+    full_sync = is_full_sync_due(context["card_sync_lookup"], config, now)
+    if not full_sync:
+        changed_card_pairs = [
+            card_pair for card_pair in card_pairs
+            if not is_pair_unchanged(
+                source_cards[card_pair[0]],
+                get_pair_activity(context, *card_pair))]
+        print(f'{len(card_pairs) - len(changed_card_pairs)} '
+              'unchanged card pairs skipped')
+        card_pairs = changed_card_pairs
+
+    def sync_card_pair(card_pair):
+        (source_card_id, placeholder_card_id) = card_pair
+        return sync_one_card(context, config, source_card_id,
+                             placeholder_card_id)
+
+    with ThreadPoolExecutor(max_workers=config.fetch_concurrency) as executor:
+        results = [job for job in executor.map(sync_card_pair, card_pairs)]
     jobs = []
-    for source_card_id in source_cards.keys():
-        placeholder_card_id = source_cards[source_card_id]["placeholder"]
-        job = sync_one_card(context, config, source_card_id,
-                            placeholder_card_id)
-        if (job != None):
+    for card_pair, job in zip(card_pairs, results):
+        if job == None:
+            source_cards[card_pair[0]]["activity"] = get_pair_activity(
+                context, *card_pair)
+        else:
             jobs.append(job)
     for job in jobs:
         (card, new_status) = job
@@ -91,17 +183,59 @@ def sync_all_cards(context, config):
             continue
         print(f'Executing update card "{card.name}" to "{new_status}"')
         update_card_status(context, config, card, new_status)
+    if full_sync:
+        context["card_sync_lookup"]["last_full_sync"] = now
     return context["card_sync_lookup"]
 
 
+def get_cards(handle, card_ids, card_index=None):
+    card_index = card_index or {}
+    missing_card_ids = [card_id for card_id in card_ids
+                        if card_index.get(card_id) is None]
+    fetched_cards = {}
+    if len(missing_card_ids) > 0:
+        for card_id, result in zip(missing_card_ids, fetch_cards_batched(
+                handle, missing_card_ids,
+                query_params=card_projection_query("sync"))):
+            if isinstance(result, trello.ResourceUnavailable):
+                if result._status != 404:
+                    raise result
+                print(f"Card not found {result}")
+                fetched_cards[card_id] = None
+            else:
+                fetched_cards[card_id] = result
+    cards = []
+    for card_id in card_ids:
+        card_json = card_index.get(card_id) or fetched_cards[card_id]
+        cards.append(None if card_json is None else
+                     Projected_card.from_projection(handle, card_json))
+    return cards
+
+
+def status_from_board_index(config):
+    return config.root["tasks"]["card_sync"].get(
+        "status_from_board_index", False)
+
+
 def sync_one_card(context, config, source_card_id, placeholder_card_id):
     handle = context["handle"]
-    source_card = handle.get_card(source_card_id)
-    placeholder_card = handle.get_card(placeholder_card_id)
+    if status_from_board_index(config) and (
+            context["card_index"].get(source_card_id) is None or
+            context["card_index"].get(placeholder_card_id) is None):
+        print(
+            f'Add job unlink "{source_card_id}" and "{placeholder_card_id}"')
+        return (create_card_stub(handle, source_card_id), "not_found")
+    source_card, placeholder_card = get_cards(
+        handle, [source_card_id, placeholder_card_id],
+        context["card_index"])
+    if source_card is None or placeholder_card is None:
+        print(
+            f'Add job unlink "{source_card_id}" and "{placeholder_card_id}"')
+        return (create_card_stub(handle, source_card_id), "not_found")
     source_status = get_card_status(context, config, source_card)
     placeholder_status = get_card_status(context, config, placeholder_card)
     latest_movement = find_latest_card_movement(
-        config, source_card, placeholder_card)
+        config, source_card, placeholder_card, context.get("local_store"))
 
     if (source_status != placeholder_status):
         if placeholder_status == "not_found":
@@ -118,15 +252,16 @@ def sync_one_card(context, config, source_card_id, placeholder_card_id):
                     f'on {placeholder_card.list_id}, status {placeholder_status}')
                 raise Exception("Movement action not found!")
 
-            print("---")
-            print(f"Source: {source_status}")
-            print(f"Placeholder: {placeholder_status}")
-            print(latest_movement["id"])
-            print(latest_movement["data"]["card"]["name"])
-            print(latest_movement["data"]["board"]["name"])
-            print(latest_movement["data"]["listBefore"]["name"])
-            print(latest_movement["data"]["listAfter"]["name"])
-            print(latest_movement)
+            print("\n".join(str(line) for line in [
+                "---",
+                f"Source: {source_status}",
+                f"Placeholder: {placeholder_status}",
+                latest_movement["id"],
+                latest_movement["data"]["card"]["name"],
+                latest_movement["data"]["board"]["name"],
+                latest_movement["data"]["listBefore"]["name"],
+                latest_movement["data"]["listAfter"]["name"],
+                latest_movement]))
 
             if (latest_movement["data"]["card"]["id"] == source_card.id):
                 print(
@@ -139,58 +274,51 @@ def sync_one_card(context, config, source_card_id, placeholder_card_id):
     return None
 
 
+def compile_status_tables(config, board_lookup):
+    card_sync_config = config.root["tasks"]["card_sync"]
+    list_name_statuses = {}
+    for board_config in [card_sync_config["destination_board"]] + \
+            card_sync_config["source_boards"]:
+        for status in ["todo", "in_progress", "done"]:
+            list_name_statuses.setdefault(
+                (board_config["name"], board_config["list_names"][status]),
+                status)
+    status_tables = {
+        "list_id": {},
+        "board_status": {}
+    }
+    for (list, board_name, list_name) in board_lookup.list_entries():
+        status = list_name_statuses.get((board_name, list_name))
+        if status is not None:
+            status_tables["list_id"][list.id] = (board_name, status)
+    for (board_name, list_name), status in list_name_statuses.items():
+        list = board_lookup.find_list(board_name, list_name)
+        if list is not None:
+            status_tables["board_status"].setdefault(
+                (board_name, status), list)
+    return status_tables
+
+
+def get_status_tables(context, config):
+    if context.get("status_tables") is None:
+        context["status_tables"] = compile_status_tables(
+            config, context["board_lookup"])
+    return context["status_tables"]
+
+
 def get_card_status(context, config, card):
-    list_id = card.list_id
-    list_lookup_entry = context["list_lookup"]["list_id"].get(list_id)
-    if (list_lookup_entry == None):
+    status_entry = get_status_tables(context, config)["list_id"].get(
+        card.list_id)
+    if (status_entry == None):
         return "not_found"
-    (_list, list_board_name, list_name) = list_lookup_entry
-
-    destination_board_config = config.root["tasks"]["card_sync"]["destination_board"]
-    source_board_config_list = config.root["tasks"]["card_sync"]["source_boards"]
-
-    if (destination_board_config["name"] == list_board_name):
-        todo_list_name = destination_board_config["list_names"]["todo"]
-        in_progress_list_name = destination_board_config["list_names"]["in_progress"]
-        done_list_name = destination_board_config["list_names"]["done"]
-        if (list_name == todo_list_name):
-            return "todo"
-        if (list_name == in_progress_list_name):
-            return "in_progress"
-        if (list_name == done_list_name):
-            return "done"
-    else:
-        for source_board_config in source_board_config_list:
-            if (source_board_config["name"] == list_board_name):
-                todo_list_name = source_board_config["list_names"]["todo"]
-                in_progress_list_name = source_board_config["list_names"]["in_progress"]
-                done_list_name = source_board_config["list_names"]["done"]
-                if (list_name == todo_list_name):
-                    return "todo"
-                if (list_name == in_progress_list_name):
-                    return "in_progress"
-                if (list_name == done_list_name):
-                    return "done"
-    return "not_found"
+    (_board_name, status) = status_entry
+    return status
 
 
 def update_card_status(context, config, card, new_status):
-    list_lookup = context["list_lookup"]
-    board_lookup = context["board_lookup"]
-    board = lookup_board_with_id(board_lookup, card.board_id)
-
-    destination_board_config = config.root["tasks"]["card_sync"]["destination_board"]
-    source_board_config_list = config.root["tasks"]["card_sync"]["source_boards"]
-
-    if (destination_board_config["name"] == board.name):
-        list_name = destination_board_config["list_names"][new_status]
-    else:
-        for source_board_config in source_board_config_list:
-            if (source_board_config["name"] == board.name):
-                list_name = source_board_config["list_names"][new_status]
-
-    (list, _list_board_name,
-     _list_name) = list_lookup["board_name"][board.name][list_name]
+    board = lookup_board_with_id(context["board_lookup"], card.board_id)
+    list = get_status_tables(context, config)["board_status"][
+        (board.name, new_status)]
     card.change_list(list.id)
 
 
@@ -207,21 +335,46 @@ def remove_card_sync(context, card):
     return card_sync_lookup
 
 
-def find_latest_card_movement(config, source_card, placeholder_card):
-    action_list = [
-        "moveCardFromBoard",
-        "moveCardToBoard",
-        "updateCard",
-    ]
-    action_list_str = ','.join(action_list)
-    action_filter = {
-        "fields",
-        "all",
-        "filter",
-        action_list_str}
+def refresh_card_movements(local_store, cards):
+    card_ids = [card.id for card in cards]
+    card_actions_list = fetch_card_actions_batched(
+        cards[0].client,
+        card_ids,
+        ','.join(MOVEMENT_ACTION_TYPES),
+        since_ids=[local_store.find_card_cursor(card_id)
+                   for card_id in card_ids])
+    for card_id, card_actions in zip(card_ids, card_actions_list):
+        if isinstance(card_actions, trello.ResourceUnavailable):
+            raise card_actions
+        local_store.add_card_actions(card_id, card_actions)
+
+
+def find_latest_card_movement(config, source_card, placeholder_card,
+                              local_store=None):
+    if local_store is not None:
+        uncovered_cards = [
+            card for card in [source_card, placeholder_card]
+            if local_store.find_board_cursor(card.board_id) is None]
+        if len(uncovered_cards) > 0:
+            refresh_card_movements(local_store, uncovered_cards)
+        latest_move = local_store.find_latest_movement(
+            [source_card.id, placeholder_card.id])
+        if (latest_move != None and
+                latest_move["memberCreator"]["username"] ==
+                config.automation_username):
+            return None
+        return latest_move
+
+    action_filter = ','.join(MOVEMENT_ACTION_TYPES)
 
     latest_move = None
-    source_actions = source_card.fetch_actions(action_filter=action_filter)
+    source_actions, placeholder_actions = fetch_card_actions_batched(
+        source_card.client,
+        [source_card.id, placeholder_card.id],
+        action_filter)
+    for actions in [source_actions, placeholder_actions]:
+        if isinstance(actions, trello.ResourceUnavailable):
+            raise actions
     source_actions_filtered = [
         source_action for source_action in source_actions if (
             source_action["type"] == "moveCardFromBoard" or
@@ -233,8 +386,6 @@ def find_latest_card_movement(config, source_card, placeholder_card):
     if (num_of_source_actions > 0):
         latest_move = source_actions_filtered[0]
 
-    placeholder_actions = placeholder_card.fetch_actions(
-        action_filter=action_filter)
     placeholder_actions_filtered = [
         placeholder_action for placeholder_action in placeholder_actions if (
             placeholder_action["type"] == "moveCardFromBoard" or
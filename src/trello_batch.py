@@ -0,0 +1,98 @@
+import asyncio
+import trello
+from urllib.parse import quote
+from async_fetch import fetch_json_concurrently
+
+BATCH_SIZE = 10
+
+
+class Batch_item_response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+def create_route(uri_path, query_params=None):
+    if not query_params:
+        return uri_path
+    # commas separate the routes of a batch, so they are escaped within one
+    query = "&".join(
+        f"{key}={quote(str(value), safe='')}"
+        for key, value in query_params.items())
+    return f"{uri_path}?{query}"
+
+
+def split_batch_item(route, item):
+    if "200" in item:
+        return item["200"]
+    if "statusCode" in item:
+        status_code = item["statusCode"]
+        message = item.get("message", item.get("name", ""))
+    else:
+        status_code, message = next(iter(item.items()))
+    return trello.ResourceUnavailable(
+        "%s at %s" % (message, route),
+        Batch_item_response(int(status_code), message))
+
+
+def chunk(items, size=BATCH_SIZE):
+    return [items[index:index + size]
+            for index in range(0, len(items), size)]
+
+
+def fetch_batch(handle, routes):
+    try:
+        items = handle.fetch_json(
+            '/batch', query_params={'urls': ','.join(routes)})
+    except trello.ResourceUnavailable as error:
+        return [error] * len(routes)
+    return [split_batch_item(route, item)
+            for route, item in zip(routes, items)]
+
+
+def fetch_routes_batched(handle, routes, concurrency=1, on_result=None):
+    batches = chunk(routes)
+    if len(batches) <= 1:
+        results = [fetch_batch(handle, batch) for batch in batches]
+        if on_result:
+            for batch, result in zip(batches, results):
+                on_result(batch, result)
+        return [item for result in results for item in result]
+
+    def on_batch_result(index, result):
+        if on_result:
+            on_result(batches[index], result)
+
+    results = asyncio.run(fetch_json_concurrently(
+        handle,
+        [('/batch', {'urls': ','.join(batch)}) for batch in batches],
+        concurrency,
+        on_batch_result))
+    items = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, trello.ResourceUnavailable):
+            items.extend([result] * len(batch))
+        else:
+            items.extend([split_batch_item(route, item)
+                          for route, item in zip(batch, result)])
+    return items
+
+
+def fetch_cards_batched(handle, card_ids, concurrency=1, on_result=None,
+                        query_params=None):
+    routes = [create_route('/cards/' + card_id, query_params)
+              for card_id in card_ids]
+    return fetch_routes_batched(handle, routes, concurrency, on_result)
+
+
+def fetch_card_actions_batched(handle, card_ids, action_filter,
+                               action_limit=50, since_ids=None):
+    since_ids = since_ids or [None] * len(card_ids)
+    routes = []
+    for card_id, since_id in zip(card_ids, since_ids):
+        query_params = {'filter': action_filter, 'limit': action_limit}
+        if since_id:
+            query_params['since'] = since_id
+        routes.append(create_route('/cards/' + card_id + '/actions',
+                                   query_params))
+    return fetch_routes_batched(handle, routes)
@@ -1,9 +1,101 @@
+from trello import Board, Card
+
+CARD_FIELD_PROFILES = {
+    "sync": ["id", "idList", "idBoard", "name", "shortUrl", "dateLastActivity"]
+}
+
+
+class Projected_card(Card):
+    @classmethod
+    def from_projection(cls, handle, card_json):
+        card = cls(Board(client=handle, board_id=card_json.get("idBoard")),
+                   card_json["id"],
+                   name=card_json.get("name", ""))
+        card._json_obj = card_json
+        card.idList = card_json.get("idList")
+        card.idBoard = card_json.get("idBoard")
+        card.shortUrl = card_json.get("shortUrl")
+        return card
+
+
+class Board_lookup(dict):
+    def __init__(self, handle, board_json_lookup):
+        super().__init__()
+        self.handle = handle
+        self.board_json_lookup = board_json_lookup
+
+    def __missing__(self, board_name):
+        return self.resolve(board_name)
+
+    def resolve(self, board_name):
+        if dict.__contains__(self, board_name):
+            return dict.__getitem__(self, board_name)
+        board_json = self.board_json_lookup.get(board_name)
+        if board_json is None:
+            raise KeyError(board_name)
+        board = Board.from_json(self.handle, json_obj=board_json)
+        self[board_name] = board
+        return board
+
+    def __contains__(self, board_name):
+        return dict.__contains__(self, board_name) or \
+            board_name in self.board_json_lookup
+
+    def get(self, board_name, default=None):
+        if board_name in self:
+            return self[board_name]
+        return default
+
+
+class Board_registry(Board_lookup):
+    def __init__(self, handle, board_json_lookup):
+        super().__init__(handle, board_json_lookup)
+        self.board_ids = {
+            board_json["id"]: board_name
+            for board_name, board_json in board_json_lookup.items()}
+        self.list_lookup = {"board_name": {}, "list_id": {}}
+
+    def __setitem__(self, board_name, board):
+        super().__setitem__(board_name, board)
+        self.board_ids[board.id] = board_name
+
+    def has_lists(self, board_name):
+        return board_name in self.list_lookup["board_name"]
+
+    def board_with_id(self, board_id):
+        board_name = self.board_ids.get(board_id)
+        return None if board_name is None else self[board_name]
+
+    def find_list(self, board_name, list_name):
+        list_lookup_entry = self.list_lookup["board_name"].get(
+            board_name, {}).get(list_name)
+        return None if list_lookup_entry is None else list_lookup_entry[0]
+
+    def list_entries(self):
+        return list(self.list_lookup["list_id"].values())
+
+    def load_board_lists(self, board_name, lists):
+        for list, _, _ in self.list_lookup["board_name"].get(
+                board_name, {}).values():
+            self.list_lookup["list_id"].pop(list.id, None)
+        self.list_lookup["board_name"][board_name] = {}
+        for list in lists:
+            self.add_list(board_name, list)
+
+    def add_list(self, board_name, list):
+        list_lookup_entry = (list, board_name, list.name)
+        self.list_lookup["list_id"][list.id] = list_lookup_entry
+        self.list_lookup["board_name"].setdefault(
+            board_name, {})[list.name] = list_lookup_entry
+
+
 def find_list(board_lookup, board_name, list_name):
     if board_name not in board_lookup:
         return None
-    lists = board_lookup[board_name].get_lists("open")
-    list_lookup = {list.name: list for list in lists}
-    return list_lookup.get(list_name)
+    if not board_lookup.has_lists(board_name):
+        board_lookup.load_board_lists(
+            board_name, board_lookup[board_name].get_lists("open"))
+    return board_lookup.find_list(board_name, list_name)
 
 
 def get_card(handle, card_id):
@@ -15,8 +107,16 @@ def get_card_actions(card, action_filter="createCard"):
 
 
 def lookup_board_with_id(board_lookup, board_id):
-    boards = board_lookup.values()
-    for board in boards:
-        if (board.id == board_id):
-            return board
-    return None
+    return board_lookup.board_with_id(board_id)
+
+
+def card_projection_query(profile):
+    return {
+        "fields": ",".join(CARD_FIELD_PROFILES[profile]),
+        "attachments": "false",
+        "checklists": "none"
+    }
+
+
+def create_card_stub(handle, card_id):
+    return Card(Board(client=handle), card_id)
@@ -0,0 +1,195 @@
+import json
+import random
+import threading
+import time
+import requests
+import trello
+from requests.adapters import HTTPAdapter
+from rate_limiter import Rate_limiter
+
+
+class Retry_policy:
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 max_attempts=1,
+                 backoff_base=0.5,
+                 backoff_max=30.0,
+                 deadline=120.0,
+                 random=random.random):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.random = random
+
+    def backoff(self, attempt):
+        ceiling = min(self.backoff_max,
+                      self.backoff_base * (2 ** (attempt - 1)))
+        return self.random() * ceiling
+
+
+NO_RETRY = Retry_policy()
+
+
+class Trello_transport:
+    def __init__(self,
+                 pool_size=10,
+                 connect_timeout=5.0,
+                 read_timeout=30.0,
+                 rate_limiter=None,
+                 retry_policies=None,
+                 clock=time.monotonic,
+                 sleep=time.sleep):
+        self.timeout = (connect_timeout, read_timeout)
+        self.rate_limiter = rate_limiter if rate_limiter else Rate_limiter()
+        self.retry_policies = retry_policies if retry_policies \
+            else {"GET": Retry_policy(max_attempts=5)}
+        self.clock = clock
+        self.sleep = sleep
+        self.retry_counters = {"retries": 0, "give_ups": 0}
+        self.counter_lock = threading.Lock()
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def request(self, http_method, url, credentials=None, **kwargs):
+        policy = self.retry_policies.get(http_method, NO_RETRY)
+        started_at = self.clock()
+        attempt = 1
+        while True:
+            if credentials:
+                self.rate_limiter.acquire(*credentials)
+            try:
+                response = self.session.request(
+                    http_method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not self.should_retry(policy, attempt, started_at):
+                    raise
+            else:
+                if credentials:
+                    self.rate_limiter.update_from_response(
+                        *credentials, response)
+                if response.status_code not in policy.RETRY_STATUS_CODES:
+                    return response
+                if not self.should_retry(policy, attempt, started_at):
+                    return response
+            remaining = policy.deadline - (self.clock() - started_at)
+            self.sleep(max(min(policy.backoff(attempt), remaining), 0))
+            attempt += 1
+
+    def should_retry(self, policy, attempt, started_at):
+        if policy.max_attempts <= 1:
+            return False
+        elapsed = self.clock() - started_at
+        with self.counter_lock:
+            if attempt >= policy.max_attempts or elapsed >= policy.deadline:
+                self.retry_counters["give_ups"] += 1
+                return False
+            self.retry_counters["retries"] += 1
+        return True
+
+    def connection_stats(self):
+        num_requests = 0
+        num_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools[pool_key]
+            num_requests += pool.num_requests
+            num_connections += pool.num_connections
+        return {
+            "requests": num_requests,
+            "connections": num_connections,
+            "reused": max(num_requests - num_connections, 0)
+        }
+
+
+def fetch_json(self,
+               uri_path,
+               http_method='GET',
+               headers=None,
+               query_params=None,
+               post_args=None,
+               files=None):
+    """ Fetch some JSON from Trello """
+
+    # explicit values here to avoid mutable default values
+    if headers is None:
+        headers = {}
+    if query_params is None:
+        query_params = {}
+    if post_args is None:
+        post_args = {}
+
+    # if files specified, we don't want any data
+    data = None
+    if files is None and post_args != {}:
+        data = json.dumps(post_args)
+
+    # set content type and accept headers to handle JSON
+    if http_method in ("POST", "PUT", "DELETE") and not files:
+        headers['Content-Type'] = 'application/json; charset=utf-8'
+
+    headers['Accept'] = 'application/json'
+
+    # construct the full URL without query parameters
+    if uri_path[0] == '/':
+        uri_path = uri_path[1:]
+    url = 'https://api.trello.com/1/%s' % uri_path
+
+    if self.oauth is None:
+        query_params['key'] = self.api_key
+        query_params['token'] = self.api_secret
+
+    # perform the HTTP requests over the shared keep-alive session,
+    # within the rate budget of this API key and token
+    credentials = (self.api_key, self.resource_owner_key or self.api_secret)
+    response = self.transport.request(http_method, url, params=query_params,
+                                      headers=headers, data=data,
+                                      auth=self.oauth, files=files,
+                                      proxies=self.proxies,
+                                      credentials=credentials)
+
+    if response.status_code == 401:
+        raise trello.Unauthorized("%s at %s" % (response.text, url), response)
+    if response.status_code != 200:
+        raise trello.ResourceUnavailable(
+            "%s at %s" % (response.text, url), response)
+
+    return response.json()
+
+
+def create_transport(config):
+    return Trello_transport(
+        pool_size=config.http_pool_size,
+        connect_timeout=config.http_connect_timeout,
+        read_timeout=config.http_read_timeout,
+        rate_limiter=Rate_limiter(
+            api_key_limit=config.rate_limit_per_api_key,
+            token_limit=config.rate_limit_per_token,
+            interval=config.rate_limit_interval),
+        retry_policies={
+            http_method: Retry_policy(
+                max_attempts=config.retry_max_attempts,
+                backoff_base=config.retry_backoff_base,
+                backoff_max=config.retry_backoff_max,
+                deadline=config.retry_deadline)
+            for http_method in config.retry_methods})
+
+
+def install_transport(transport):
+    trello.TrelloClient.transport = transport
+    trello.TrelloClient.fetch_json = fetch_json
+    return transport
+
+
+def report_transport_stats(handle):
+    stats = handle.transport.connection_stats()
+    stats.update(handle.transport.retry_counters)
+    print(f'{stats["requests"]} HTTP requests sent over '
+          f'{stats["connections"]} connections, '
+          f'{stats["reused"]} reused.')
+    print(f'{stats["retries"]} retries, {stats["give_ups"]} gave up.')
+    return stats
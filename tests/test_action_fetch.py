@@ -0,0 +1,143 @@
+from action_fetch import \
+    action_id_timestamp, \
+    format_timestamp, \
+    fetch_actions_page, \
+    split_date_windows, \
+    create_bootstrap_windows, \
+    fetch_windows_by_page, \
+    dedupe_actions, \
+    fetch_actions_since
+
+
+def create_action_id(timestamp, counter=0):
+    return f"{timestamp:08x}{counter:016x}"
+
+
+def create_actions(first_timestamp, last_timestamp):
+    return [{"id": create_action_id(timestamp),
+             "date": format_timestamp(timestamp)}
+            for timestamp in range(last_timestamp, first_timestamp - 1, -1)]
+
+
+def create_handle(mocker, actions):
+    def fetch_json(uri_path, query_params):
+        page = []
+        for action in actions:
+            since = query_params.get("since")
+            before = query_params.get("before")
+            if since and since.endswith("Z") and \
+                    action["date"] <= since:
+                continue
+            if since and not since.endswith("Z") and action["id"] <= since:
+                continue
+            if before and before.endswith("Z") and \
+                    action["date"] >= before:
+                continue
+            if before and not before.endswith("Z") and \
+                    action["id"] >= before:
+                continue
+            page.append(action)
+        return page[:query_params["limit"]]
+    return mocker.Mock(**{"fetch_json.side_effect": fetch_json})
+
+
+class Test_action_id_timestamp:
+    def test_timestamp_from_id_prefix(self):
+        assert action_id_timestamp("64ca1e00" + "0" * 16) == 1690967552
+        assert action_id_timestamp(create_action_id(300, 5)) == 300
+
+
+class Test_fetch_actions_page:
+    def test_fetch_one_page(self, mocker):
+        handle = mocker.Mock(**{"fetch_json.return_value": ["action"]})
+        assert fetch_actions_page(
+            handle, "board-id", "updateCard", "since-id", "before-id") == \
+            ["action"]
+        handle.fetch_json.assert_called_once_with(
+            '/boards/board-id/actions',
+            query_params={"filter": "updateCard", "limit": 1000,
+                          "since": "since-id", "before": "before-id"})
+
+
+class Test_split_date_windows:
+    def test_single_window(self):
+        assert split_date_windows(
+            create_action_id(0), create_action_id(100), 1) == \
+            [(create_action_id(0), create_action_id(100))]
+
+    def test_newest_window_first_with_overlap(self):
+        assert split_date_windows(
+            create_action_id(0), create_action_id(300), 3) == [
+            (format_timestamp(199), create_action_id(300)),
+            (format_timestamp(99), format_timestamp(200)),
+            (create_action_id(0), format_timestamp(100))]
+
+
+class Test_create_bootstrap_windows:
+    def test_from_board_creation_to_now(self):
+        assert create_bootstrap_windows(
+            create_action_id(100), 2, clock=lambda: 300.5) == [
+            (format_timestamp(199), None),
+            (format_timestamp(99), format_timestamp(200))]
+
+
+class Test_fetch_windows_by_page:
+    def test_report_each_page_until_window_is_done(self, mocker):
+        actions = create_actions(1, 2500)
+        handle = create_handle(mocker, actions)
+        on_page = mocker.Mock()
+        windows = {
+            1: (format_timestamp(1999), None),
+            2: (format_timestamp(0), format_timestamp(2000))}
+
+        fetch_windows_by_page(
+            handle, "board-id", "updateCard", windows, 2, on_page)
+
+        pages = {call.args[0]: [] for call in on_page.call_args_list}
+        for (window_id, page, before) in \
+                [call.args for call in on_page.call_args_list]:
+            pages[window_id].append((len(page), before))
+        assert pages == {
+            1: [(501, None)],
+            2: [(1000, create_action_id(1000)), (999, None)]}
+
+
+class Test_dedupe_actions:
+    def test_keep_first_occurrence(self):
+        assert dedupe_actions(
+            [{"id": "b"}, {"id": "a"}, {"id": "b", "dup": True}]) == \
+            [{"id": "b"}, {"id": "a"}]
+
+
+class Test_fetch_actions_since:
+    def test_single_page(self, mocker):
+        actions = create_actions(1, 10)
+        handle = create_handle(mocker, actions + create_actions(0, 0))
+
+        assert fetch_actions_since(
+            handle, "board-id", "updateCard", create_action_id(0)) == actions
+        handle.fetch_json.assert_called_once()
+
+    def test_reuse_partial_first_page(self, mocker):
+        handle = mocker.Mock()
+        first_page = create_actions(1, 2)
+        assert fetch_actions_since(
+            handle, "board-id", "updateCard", create_action_id(0),
+            first_page=first_page) == first_page
+        handle.fetch_json.assert_not_called()
+
+    def test_page_back_to_cursor(self, mocker):
+        actions = create_actions(1, 2500)
+        handle = create_handle(mocker, actions + create_actions(0, 0))
+
+        assert fetch_actions_since(
+            handle, "board-id", "updateCard", create_action_id(0)) == actions
+        assert handle.fetch_json.call_count == 3
+
+    def test_concurrent_windows_are_gap_free(self, mocker):
+        actions = create_actions(1, 5000)
+        handle = create_handle(mocker, actions + create_actions(0, 0))
+
+        assert fetch_actions_since(
+            handle, "board-id", "updateCard", create_action_id(0), 4) == \
+            actions
@@ -0,0 +1,89 @@
+import json
+import os
+from action_log import Action_log, load_action_log
+
+
+def create_actions(first_id, last_id):
+    return [{"id": f"action-{action_id}"}
+            for action_id in range(last_id, first_id - 1, -1)]
+
+
+class Test_Action_log:
+    def test_empty_log(self, fs):
+        action_log = Action_log("/actions.json.d")
+        assert action_log.is_empty()
+        assert action_log.latest_action() is None
+        assert list(action_log) == []
+
+    def test_append_newest_last(self, fs):
+        action_log = Action_log("/actions.json.d")
+        action_log.append(create_actions(1, 2))
+        action_log.append(create_actions(3, 3))
+
+        assert action_log.latest_action() == {"id": "action-3"}
+        assert [action["id"] for action in action_log] == \
+            ["action-3", "action-2", "action-1"]
+
+    def test_roll_over_segments(self, fs):
+        action_log = Action_log("/actions.json.d", segment_size=2)
+        action_log.append(create_actions(1, 3))
+        action_log.append(create_actions(4, 5))
+
+        assert action_log.segment_paths() == [
+            "/actions.json.d/segment-000000.jsonl",
+            "/actions.json.d/segment-000001.jsonl",
+            "/actions.json.d/segment-000002.jsonl"]
+        assert open("/actions.json.d/segment-000001.jsonl").read() == \
+            '{"id": "action-3"}\n{"id": "action-4"}\n'
+        assert [action["id"] for action in action_log] == \
+            ["action-5", "action-4", "action-3", "action-2", "action-1"]
+
+    def test_skip_partially_written_line(self, fs):
+        fs.create_file(
+            "/actions.json.d/segment-000000.jsonl",
+            contents='{"id": "action-1"}\n{"id": "act')
+        action_log = Action_log("/actions.json.d")
+        assert action_log.latest_action() == {"id": "action-1"}
+
+        action_log.append(create_actions(2, 2))
+
+        assert [action["id"] for action in action_log] == \
+            ["action-2", "action-1"]
+
+
+class Test_load_action_log:
+    def test_migrate_json_file(self, fs):
+        fs.create_file("/actions.json",
+                       contents=json.dumps(create_actions(1, 3)))
+
+        action_log = load_action_log("/actions.json", segment_size=2)
+
+        assert [action["id"] for action in action_log] == \
+            ["action-3", "action-2", "action-1"]
+        assert os.path.isfile("/actions.json")
+
+    def test_do_not_migrate_twice(self, fs):
+        fs.create_file("/actions.json",
+                       contents=json.dumps(create_actions(1, 3)))
+        load_action_log("/actions.json")
+
+        action_log = load_action_log("/actions.json")
+
+        assert len(list(action_log)) == 3
+
+
+class Test_cursor:
+    def test_default_to_latest_action(self, fs):
+        action_log = Action_log("/actions.json.d")
+        assert action_log.cursor() is None
+        action_log.append(create_actions(1, 2))
+        assert action_log.cursor() == "action-2"
+
+    def test_saved_cursor(self, fs):
+        action_log = Action_log("/actions.json.d")
+        action_log.append(create_actions(1, 2))
+        action_log.save_cursor("action-1")
+
+        assert Action_log("/actions.json.d").cursor() == "action-1"
+        assert [action["id"] for action in action_log] == \
+            ["action-2", "action-1"]
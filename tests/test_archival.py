@@ -1,5 +1,10 @@
 from datetime import datetime
+import requests
+import trello
 import archival
+from local_store import Local_store
+from trello_helper import Board_registry
+from trello_transport import Retry_policy
 
 
 class Test_perform_archival:
@@ -7,20 +12,24 @@ class Test_perform_archival:
         mocked_config = mocker.Mock()
 
         handle = "handle"
-        action_list = []
+        local_store = mocker.Mock()
         board_one = mocker.Mock()
         board_name = "board-one-name"
         board_lookup = {board_name: board_one}
 
         context = {
             "handle": handle,
-            "action_list": action_list,
-            "board_lookup": board_lookup
+            "local_store": local_store,
+            "board_lookup": board_lookup,
+            "card_index": "card_index"
         }
 
         mocked_config.archival_board_name = "ABC"
         mocked_config.board_name = "DEF"
         mocked_config.done_list_name = "GHI"
+        mocked_config.archival_move_attempts = 3
+        mocked_config.retry_backoff_base = 0.5
+        mocked_config.retry_backoff_max = 30.0
         archival_jobs = [123, 456]
 
         mocked_find_done_card_and_create_archival_jobs = mocker.patch(
@@ -33,9 +42,14 @@ class Test_perform_archival:
         archival.perform_archival(context, mocked_config)
 
         mocked_find_done_card_and_create_archival_jobs.assert_called_once_with(
-            board_lookup, "DEF", action_list, "GHI")
-        mocked_process_archival_job.assert_called_once_with(
-            board_lookup, "ABC", archival_jobs)
+            board_lookup, "DEF", local_store, "GHI", "card_index")
+        mocked_process_archival_job.assert_called_once()
+        (args, _kwargs) = mocked_process_archival_job.call_args
+        assert args[:4] == (board_lookup, "ABC", archival_jobs,
+                            mocked_config.archival_concurrency)
+        assert (args[4].max_attempts, args[4].backoff_base,
+                args[4].backoff_max) == (3, 0.5, 30.0)
+        assert args[5] == "card_index"
 
 
 class Test_find_done_card_and_create_archival_jobs:
@@ -47,34 +61,32 @@ class Test_find_done_card_and_create_archival_jobs:
         done_card = mocker.Mock()
         done_card.id = "card-123"
 
-        action_list = []
-        card_action_list_lookup = {
-            "card123": [{"id": "action-id-123", "data": {"card": None}}]}
+        local_store = mocker.Mock()
 
         done_list_name = "Done"
         done_list = mocker.Mock()
-        done_list.list_cards.return_value = [done_card]
         done_list.id = "list-id-456"
 
-        mocked_create_card_action_list_lookup = mocker.patch(
-            "archival.create_card_action_list_lookup",
-            return_value=card_action_list_lookup)
         mocked_retrieve_list_from_trello = mocker.patch(
             "archival.retrieve_list_from_trello",
             return_value=done_list)
         mocked_get_move_to_done_list_date = mocker.patch(
             "archival.get_move_to_done_list_date",
             return_value="done_date")
+        mocked_list_cards_from_index = mocker.patch(
+            "archival.list_cards_from_index",
+            return_value=[done_card])
 
         archival_jobs = archival.find_done_card_and_create_archival_jobs(
-            board_lookup, board_name, action_list, done_list_name)
+            board_lookup, board_name, local_store, done_list_name,
+            "card_index")
 
-        mocked_create_card_action_list_lookup.assert_called_once_with(
-            action_list)
         mocked_retrieve_list_from_trello.assert_called_once_with(
             board_lookup, board_name, done_list_name)
+        mocked_list_cards_from_index.assert_called_once_with(
+            board_one.client, "card_index", done_list.id)
         mocked_get_move_to_done_list_date.assert_called_once_with(
-            card_action_list_lookup, done_card.id, done_list.id)
+            local_store, done_card.id, done_list.id)
 
         assert archival_jobs == [{'date': 'done_date', 'card': done_card}]
 
@@ -165,40 +177,139 @@ class Test_process_archival_job:
         mocked_create_archival_list_if_not_found.assert_not_called()
         card.change_board.assert_not_called()
 
+    def test_resolve_archival_list_once_per_sprint(self, mocker):
+        board_one = mocker.Mock()
+        board_one.id = "board-id-456"
+        board_lookup = {"board-one-name": board_one}
+        cards = [mocker.Mock(), mocker.Mock(), mocker.Mock()]
+        archival_jobs = [
+            {"date": "2023-08-10T11:07:49.365Z", "card": cards[0]},
+            {"date": "2023-08-20T11:07:49.365Z", "card": cards[1]},
+            {"date": "2023-08-03T11:07:49.365Z", "card": cards[2]}]
+        sprint_lists = {
+            "2023-08-02T00:00:00": mocker.Mock(id="list-id-1"),
+            "2023-08-16T00:00:00": mocker.Mock(id="list-id-2")}
 
-class Test_create_card_action_list_lookup:
-    def test_create_card_action_list_lookup(self, mocker):
-        card_one = {
-            "id": "card-one-id-123"}
+        mocked_datetime = mocker.Mock()
+        mocked_datetime.now.return_value = datetime.fromisoformat(
+            "2023-09-19T11:07:49.365")
+        mocked_datetime.fromisoformat = datetime.fromisoformat
+        mocker.patch("archival.datetime", mocked_datetime)
+        mocked_create_archival_list_if_not_found = mocker.patch(
+            "archival.create_archival_list_if_not_found",
+            side_effect=lambda board_lookup, board_name, list_name:
+                sprint_lists[list_name])
 
-        action_one = {
-            "id": "action-one-id-234",
-            "data": {
-                "card": card_one}}
-        action_two = {
-            "id": "action-two-id-345",
-            "data": {
-                "card": card_one}}
-        action_list = [action_one, action_two]
+        archival.process_archival_job(
+            board_lookup, "board-one-name", archival_jobs)
+
+        assert mocked_create_archival_list_if_not_found.call_args_list == [
+            mocker.call(board_lookup, "board-one-name",
+                        "2023-08-02T00:00:00"),
+            mocker.call(board_lookup, "board-one-name",
+                        "2023-08-16T00:00:00")]
+        cards[0].change_board.assert_called_once_with(
+            "board-id-456", "list-id-1")
+        cards[1].change_board.assert_called_once_with(
+            "board-id-456", "list-id-2")
+        cards[2].change_board.assert_called_once_with(
+            "board-id-456", "list-id-1")
+
+
+class Test_update_moved_cards_in_index:
+    def test_update_only_moved_cards(self, mocker):
+        moved_card = mocker.Mock(id="card-1")
+        failed_card = mocker.Mock(id="card-2")
+        card_index = {
+            "card-1": {"id": "card-1", "idBoard": "board-id",
+                       "idList": "done-list-id"},
+            "card-2": {"id": "card-2", "idBoard": "board-id",
+                       "idList": "done-list-id"}
+        }
 
-        expected_card_action_list_lookup = {
-            card_one["id"]: [action_one, action_two]
+        archival.update_moved_cards_in_index(
+            card_index,
+            [(moved_card, "archive-id", "sprint-list-id"),
+             (failed_card, "archive-id", "sprint-list-id")],
+            {"card-1": None, "card-2": Exception("failed")})
+
+        assert card_index == {
+            "card-1": {"id": "card-1", "idBoard": "archive-id",
+                       "idList": "sprint-list-id"},
+            "card-2": {"id": "card-2", "idBoard": "board-id",
+                       "idList": "done-list-id"}
         }
 
-        assert archival.create_card_action_list_lookup(
-            action_list) == expected_card_action_list_lookup
 
-    def test_empty_action_list(self, mocker):
-        action_list = []
-        assert archival.create_card_action_list_lookup(
-            action_list) == {}
+class Test_move_cards:
+    def create_card(self, mocker, card_id, failures=0, status_code=429):
+        card = mocker.Mock()
+        card.id = card_id
+        card.change_board.side_effect = \
+            [trello.ResourceUnavailable(
+                "busy", mocker.Mock(status_code=status_code))] * \
+            failures + [None]
+        return card
+
+    def test_move_cards_concurrently(self, mocker):
+        cards = [self.create_card(mocker, f"card-{index}")
+                 for index in range(5)]
+
+        assert archival.move_cards(
+            [(card, "board-id", "list-id") for card in cards], 3) == \
+            {card.id: None for card in cards}
+
+        for card in cards:
+            card.change_board.assert_called_once_with("board-id", "list-id")
+
+    def test_retry_failed_moves(self, mocker):
+        moved_card = self.create_card(mocker, "card-1")
+        retried_card = self.create_card(mocker, "card-2", failures=1)
+        failed_card = self.create_card(mocker, "card-3", failures=3)
+
+        sleep = mocker.Mock()
+
+        move_results = archival.move_cards(
+            [(card, "board-id", "list-id")
+             for card in [moved_card, retried_card, failed_card]], 2,
+            Retry_policy(max_attempts=3, backoff_base=1.0,
+                         random=lambda: 1.0), sleep)
+
+        assert move_results["card-1"] is None
+        assert move_results["card-2"] is None
+        assert isinstance(move_results["card-3"], trello.ResourceUnavailable)
+        assert moved_card.change_board.call_count == 1
+        assert retried_card.change_board.call_count == 2
+        assert failed_card.change_board.call_count == 3
+        assert sleep.call_args_list == [mocker.call(1.0), mocker.call(2.0)]
+
+    def test_retry_only_transient_failures(self, mocker):
+        missing_card = self.create_card(
+            mocker, "card-1", failures=1, status_code=404)
+        timed_out_card = mocker.Mock()
+        timed_out_card.id = "card-2"
+        timed_out_card.change_board.side_effect = [
+            requests.Timeout("timed out"), None]
+        sleep = mocker.Mock()
+
+        move_results = archival.move_cards(
+            [(card, "board-id", "list-id")
+             for card in [missing_card, timed_out_card]], 1,
+            Retry_policy(max_attempts=3), sleep)
+
+        assert move_results["card-1"]._status == 404
+        assert move_results["card-2"] is None
+        assert missing_card.change_board.call_count == 1
+        assert timed_out_card.change_board.call_count == 2
+        sleep.assert_called_once()
 
 
 class Test_retrieve_list_from_trello:
     def test_retrieve_list_from_trello(self, mocker):
         board_one = mocker.Mock()
         board_name = "board-one-name"
-        board_lookup = {"board-one-name": board_one}
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup[board_name] = board_one
         done_list_name = "done"
 
         list_one = mocker.Mock()
@@ -215,65 +326,98 @@ class Test_retrieve_list_from_trello:
         assert archival.retrieve_list_from_trello(
             board_lookup, board_name, done_list_name) == list_two
 
-        board_one.get_lists.assert_called_once_with("all")
+        board_one.get_lists.assert_called_once_with("open")
+
+    def test_retrieve_list_from_registry(self, mocker):
+        done_list = mocker.Mock()
+        done_list.name = "done"
+        board_one = mocker.Mock()
+        board_registry = Board_registry(mocker.Mock(), {})
+        board_registry["board-one-name"] = board_one
+        board_registry.load_board_lists("board-one-name", [done_list])
+
+        assert archival.retrieve_list_from_trello(
+            board_registry, "board-one-name", "done") == done_list
+
+        board_one.get_lists.assert_not_called()
+
+
+def create_local_store(card_id, actions):
+    local_store = Local_store(":memory:")
+    local_store.add_actions([
+        dict(action, id=f"action-{index}",
+             data=dict(action["data"], card={"id": card_id}))
+        for index, action in enumerate(actions)])
+    return local_store
 
 
 class Test_get_move_to_done_list_date:
     def test_date_found(self, mocker):
         card_id = "card-id-123"
         done_list_id = "done-list-id-456"
-        move_date = "move-date"
-        other_date = "other-date"
-        card_action_list_lookup = {
-            card_id: [{
-                "type": "updateCard",
-                "data": {
-                    "listAfter": {
-                        "id": "not-this-list"}},
-                      "date": other_date},
-                      {
-                "type": "updateCard",
-                "data": {
-                    "listAfter": {
-                        "id": done_list_id}},
-                      "date": move_date}]}
+        move_date = "2023-08-02T00:00:00.000Z"
+        other_date = "2023-08-03T00:00:00.000Z"
+        local_store = create_local_store(card_id, [{
+            "type": "updateCard",
+            "data": {
+                "listAfter": {
+                    "id": "not-this-list"}},
+            "date": other_date},
+            {
+            "type": "updateCard",
+            "data": {
+                "listAfter": {
+                    "id": done_list_id}},
+            "date": move_date}])
         assert archival.get_move_to_done_list_date(
-            card_action_list_lookup, card_id, done_list_id) == move_date
+            local_store, card_id, done_list_id) == move_date
 
     def test_date_found_for_moveCardToBoard_type(self, mocker):
         card_id = "card-id-123"
         done_list_id = "done-list-id-456"
-        move_date = "move-date"
-        other_date = "other-date"
-        card_action_list_lookup = {
-            card_id: [{
-                "type": "updateCard",
-                "data": {
-                    "listAfter": {
-                        "id": "not-this-list"}},
-                      "date": other_date},
-                      {
-                "type": "moveCardToBoard",
-                "data": {
-                    "list": {
-                        "id": done_list_id}},
-                      "date": move_date}]}
+        move_date = "2023-08-02T00:00:00.000Z"
+        other_date = "2023-08-03T00:00:00.000Z"
+        local_store = create_local_store(card_id, [{
+            "type": "updateCard",
+            "data": {
+                "listAfter": {
+                    "id": "not-this-list"}},
+            "date": other_date},
+            {
+            "type": "moveCardToBoard",
+            "data": {
+                "list": {
+                    "id": done_list_id}},
+            "date": move_date}])
+        assert archival.get_move_to_done_list_date(
+            local_store, card_id, done_list_id) == move_date
+
+    def test_latest_move_wins(self, mocker):
+        card_id = "card-id-123"
+        done_list_id = "done-list-id-456"
+        local_store = create_local_store(card_id, [{
+            "type": "updateCard",
+            "data": {"listAfter": {"id": done_list_id}},
+            "date": "2023-08-02T00:00:00.000Z"},
+            {
+            "type": "updateCard",
+            "data": {"listAfter": {"id": done_list_id}},
+            "date": "2023-08-09T00:00:00.000Z"}])
         assert archival.get_move_to_done_list_date(
-            card_action_list_lookup, card_id, done_list_id) == move_date
+            local_store, card_id, done_list_id) == "2023-08-09T00:00:00.000Z"
 
     def test_date_not_found(self, mocker):
         card_id = "card-id-123"
         done_list_id = "done-list-id-456"
-        other_date = "other-date"
-        card_action_list_lookup = {
-            card_id: [{
-                "type": "updateCard",
-                "data": {
-                    "listAfter": {
-                        "id": "not-this-list"}},
-                      "date": other_date}]}
+        other_date = "2023-08-03T00:00:00.000Z"
+        local_store = create_local_store(card_id, [{
+            "type": "updateCard",
+            "data": {
+                "listAfter": {
+                    "id": "not-this-list"}},
+            "date": other_date}])
         assert archival.get_move_to_done_list_date(
-            card_action_list_lookup, card_id, done_list_id) is None
+            local_store, card_id, done_list_id) is None
 
 
 class Test_calculate_sprint_dates_for_given_date:
@@ -434,8 +578,25 @@ class Test_create_archival_list:
         board_one = mocker.Mock()
         archival_board_name = "board-one-name"
         archival_list_name = "new-archival-list-name"
-        board_lookup = {"board-one-name": board_one}
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup["board-one-name"] = board_one
         board_one.add_list.return_value = new_list
         assert archival.create_archival_list(
             board_lookup, archival_board_name, archival_list_name) == new_list
         board_one.add_list.assert_called_once_with(archival_list_name, "top")
+
+    def test_register_archival_list(self, mocker):
+        new_list = mocker.Mock()
+        new_list.id = "new-list-id"
+        new_list.name = "new-archival-list-name"
+        board_one = mocker.Mock()
+        board_one.add_list.return_value = new_list
+        board_registry = Board_registry(mocker.Mock(), {})
+        board_registry["board-one-name"] = board_one
+        board_registry.load_board_lists("board-one-name", [])
+
+        archival.create_archival_list(
+            board_registry, "board-one-name", "new-archival-list-name")
+
+        assert board_registry.find_list(
+            "board-one-name", "new-archival-list-name") == new_list
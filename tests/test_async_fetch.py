@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+import trello
+from async_fetch import fetch_json_concurrently
+
+
+class Test_fetch_json_concurrently:
+    def test_results_are_returned_in_request_order(self, mocker):
+        handle = mocker.Mock()
+        delays = {"/cards/a": 0.03, "/cards/b": 0.0, "/cards/c": 0.01}
+
+        def fetch_json(uri_path, query_params):
+            time.sleep(delays[uri_path])
+            return {"path": uri_path, "query": query_params}
+
+        handle.fetch_json.side_effect = fetch_json
+
+        results = asyncio.run(fetch_json_concurrently(
+            handle,
+            [("/cards/a", {"x": 1}), ("/cards/b", {}), ("/cards/c", {})],
+            3))
+
+        assert results == [
+            {"path": "/cards/a", "query": {"x": 1}},
+            {"path": "/cards/b", "query": {}},
+            {"path": "/cards/c", "query": {}}]
+
+    def test_concurrency_is_bounded(self, mocker):
+        handle = mocker.Mock()
+        lock = threading.Lock()
+        in_flight = {"now": 0, "max": 0}
+
+        def fetch_json(uri_path, query_params):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            time.sleep(0.01)
+            with lock:
+                in_flight["now"] -= 1
+            return {}
+
+        handle.fetch_json.side_effect = fetch_json
+
+        asyncio.run(fetch_json_concurrently(
+            handle, [("/cards/" + str(i), {}) for i in range(12)], 3))
+
+        assert in_flight["max"] <= 3
+
+    def test_errors_are_returned_per_request(self, mocker):
+        handle = mocker.Mock()
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': '404'}))
+
+        def fetch_json(uri_path, query_params):
+            if uri_path == "/cards/missing":
+                raise error
+            return {"id": "found"}
+
+        handle.fetch_json.side_effect = fetch_json
+        on_result = mocker.Mock()
+
+        results = asyncio.run(fetch_json_concurrently(
+            handle, [("/cards/missing", {}), ("/cards/found", {})], 2,
+            on_result))
+
+        assert results == [error, {"id": "found"}]
+        assert on_result.call_count == 2
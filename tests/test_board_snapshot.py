@@ -0,0 +1,290 @@
+from trello_helper import Board_registry
+from board_snapshot import \
+    get_configured_board_names, \
+    get_card_board_names, \
+    fetch_board_snapshot, \
+    fetch_board_lists, \
+    fetch_board_snapshot_with_cache, \
+    add_lists_to_registry, \
+    load_board_snapshots, \
+    list_cards_from_index
+
+
+def create_board(mocker, board_id, name):
+    board = mocker.Mock()
+    board.id = board_id
+    board.name = name
+    return board
+
+
+def create_board_registry(mocker, boards):
+    board_lookup = Board_registry(mocker.Mock(), {})
+    for board in boards:
+        board_lookup[board.name] = board
+    return board_lookup
+
+
+def create_list_json(list_id, name):
+    return {"id": list_id, "name": name, "closed": False, "pos": 1}
+
+
+class Test_get_configured_board_names:
+    def test_without_card_sync(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "main"
+        mocked_config.archival_board_name = "archive"
+        mocked_config.root = {"tasks": {}}
+        assert get_configured_board_names(mocked_config) == ["main", "archive"]
+
+    def test_with_card_sync_deduplicated(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "main"
+        mocked_config.archival_board_name = "archive"
+        mocked_config.root = {"tasks": {"card_sync": {
+            "destination_board": {"name": "main"},
+            "source_boards": [{"name": "team-a"}, {"name": "team-b"}]
+        }}}
+        assert get_configured_board_names(mocked_config) == \
+            ["main", "archive", "team-a", "team-b"]
+
+
+class Test_get_card_board_names:
+    def test_exclude_archival_board(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "main"
+        mocked_config.archival_board_name = "archive"
+        mocked_config.root = {"tasks": {"card_sync": {
+            "destination_board": {"name": "team-c"},
+            "source_boards": [{"name": "team-a"}]
+        }}}
+        assert get_card_board_names(mocked_config) == \
+            ["main", "team-c", "team-a"]
+
+
+class Test_fetch_board_snapshot:
+    def test_fetch_lists_and_cards(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = "snapshot"
+
+        assert fetch_board_snapshot(handle, "board-id") == "snapshot"
+
+        handle.fetch_json.assert_called_once_with(
+            "/boards/board-id", query_params={
+                "fields": "id,name,closed,url,dateLastActivity",
+                "lists": "open",
+                "list_fields": "id,name,closed,pos",
+                "cards": "open",
+                "card_fields":
+                    "id,idList,idBoard,name,shortUrl,dateLastActivity",
+                "card_attachments": "false",
+                "checklists": "none"
+            })
+
+    def test_fetch_without_cards(self, mocker):
+        handle = mocker.Mock()
+
+        fetch_board_snapshot(handle, "board-id", include_cards=False)
+
+        query_params = handle.fetch_json.call_args.kwargs["query_params"]
+        assert query_params["cards"] == "none"
+
+    def test_fetch_recent_actions(self, mocker):
+        handle = mocker.Mock()
+
+        fetch_board_snapshot(handle, "board-id", "updateCard", "action-id")
+
+        query_params = handle.fetch_json.call_args.kwargs["query_params"]
+        assert query_params["actions"] == "updateCard"
+        assert query_params["actions_since"] == "action-id"
+        assert query_params["actions_limit"] == 1000
+
+
+class Test_fetch_board_lists:
+    def test_fetch_open_lists(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = "lists"
+
+        assert fetch_board_lists(handle, "board-id") == "lists"
+
+        handle.fetch_json.assert_called_once_with(
+            "/boards/board-id/lists",
+            query_params={"filter": "open", "fields": "id,name,closed,pos"})
+
+
+class Test_fetch_board_snapshot_with_cache:
+    def test_fetch_and_cache_lists(self, mocker):
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_lists.return_value = None
+        metadata_cache.invalidate_from_actions.return_value = set()
+        mocked_fetch_board_snapshot = mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            return_value={"lists": ["list"], "cards": []})
+
+        assert fetch_board_snapshot_with_cache(
+            "handle", "board-id", metadata_cache, "updateCard", "action-id") \
+            == {"lists": ["list"], "cards": []}
+
+        mocked_fetch_board_snapshot.assert_called_once_with(
+            "handle", "board-id", "updateCard", "action-id",
+            include_lists=True, include_cards=True)
+        metadata_cache.set_lists.assert_called_once_with("board-id", ["list"])
+
+    def test_use_cached_lists(self, mocker):
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_lists.return_value = ["cached-list"]
+        metadata_cache.lists_since.return_value = "2024-01-01T00:00:00.000Z"
+        metadata_cache.invalidate_from_actions.return_value = set()
+        mocked_fetch_board_snapshot = mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            return_value={"cards": [], "actions": []})
+        mocked_fetch_board_lists = mocker.patch(
+            "board_snapshot.fetch_board_lists")
+
+        assert fetch_board_snapshot_with_cache(
+            "handle", "board-id", metadata_cache)["lists"] == ["cached-list"]
+
+        mocked_fetch_board_snapshot.assert_called_once_with(
+            "handle", "board-id",
+            "createList,updateList,updateBoard,moveListToBoard",
+            "2024-01-01T00:00:00.000Z",
+            include_lists=False, include_cards=True)
+        mocked_fetch_board_lists.assert_not_called()
+        metadata_cache.set_lists.assert_not_called()
+
+    def test_refetch_lists_after_structural_change(self, mocker):
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_lists.return_value = ["cached-list"]
+        metadata_cache.invalidate_from_actions.return_value = {"board-id"}
+        mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            return_value={"cards": [], "actions": ["createList"]})
+        mocked_fetch_board_lists = mocker.patch(
+            "board_snapshot.fetch_board_lists",
+            return_value=["new-list"])
+
+        assert fetch_board_snapshot_with_cache(
+            "handle", "board-id", metadata_cache,
+            "updateCard,createList", "action-id")["lists"] == ["new-list"]
+
+        metadata_cache.invalidate_from_actions.assert_called_once_with(
+            ["createList"])
+        mocked_fetch_board_lists.assert_called_once_with(
+            "handle", "board-id")
+        metadata_cache.set_lists.assert_called_once_with(
+            "board-id", ["new-list"])
+
+
+class Test_add_lists_to_registry:
+    def test_add_lists(self, mocker):
+        board = create_board(mocker, "board-id", "main")
+        board_lookup = create_board_registry(mocker, [board])
+
+        add_lists_to_registry(board_lookup, board, [
+            create_list_json("list-1", "Todo"),
+            create_list_json("list-2", "Done")])
+
+        todo_list = board_lookup.find_list("main", "Todo")
+        assert todo_list.id == "list-1"
+        assert todo_list.board == board
+        assert board_lookup.find_list("main", "Done").id == "list-2"
+        assert board_lookup.has_lists("main")
+
+
+class Test_load_board_snapshots:
+    def test_load_configured_boards(self, mocker):
+        handle = mocker.Mock()
+        main_board = create_board(mocker, "main-id", "main")
+        other_board = create_board(mocker, "other-id", "other")
+        board_lookup = create_board_registry(mocker, [
+            main_board,
+            other_board,
+            create_board(mocker, "unused-id", "unused")])
+        mocked_fetch_board_snapshot = mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            side_effect=[
+                {"lists": [create_list_json("list-1", "Todo")],
+                 "cards": [{"id": "card-1", "idList": "list-1"}],
+                 "actions": [{"id": "action-2"}]},
+                {"lists": [create_list_json("list-2", "Todo")],
+                 "cards": [{"id": "card-2", "idList": "list-2"}]}])
+
+        card_index, recent_actions = load_board_snapshots(
+            handle, board_lookup, ["main", "other", "missing"], "main",
+            "updateCard", "action-1")
+
+        mocked_fetch_board_snapshot.assert_has_calls([
+            mocker.call(handle, "main-id", "updateCard", "action-1",
+                        include_cards=True),
+            mocker.call(handle, "other-id", None, None, include_cards=True)])
+        assert sorted(
+            (list.id, board_name) for (list, board_name, _)
+            in board_lookup.list_entries()) == \
+            [("list-1", "main"), ("list-2", "other")]
+        assert not board_lookup.has_lists("unused")
+        assert card_index == {
+            "card-1": {"id": "card-1", "idList": "list-1"},
+            "card-2": {"id": "card-2", "idList": "list-2"}
+        }
+        assert recent_actions == [{"id": "action-2"}]
+
+    def test_no_recent_actions_without_since(self, mocker):
+        board_lookup = create_board_registry(
+            mocker, [create_board(mocker, "main-id", "main")])
+        mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            return_value={"lists": [], "cards": []})
+
+        assert load_board_snapshots(
+            mocker.Mock(), board_lookup, ["main"], "main",
+            "updateCard", None)[1] is None
+
+    def test_load_with_metadata_cache(self, mocker):
+        board_lookup = create_board_registry(
+            mocker, [create_board(mocker, "main-id", "main")])
+        mocked_fetch_board_snapshot_with_cache = mocker.patch(
+            "board_snapshot.fetch_board_snapshot_with_cache",
+            return_value={"lists": [], "cards": [], "actions": []})
+
+        load_board_snapshots(
+            "handle", board_lookup, ["main"], "main",
+            "updateCard", "action-id", metadata_cache="metadata_cache")
+
+        mocked_fetch_board_snapshot_with_cache.assert_called_once_with(
+            "handle", "main-id", "metadata_cache", "updateCard", "action-id",
+            include_cards=True)
+
+    def test_skip_cards_of_boards_without_card_use(self, mocker):
+        board_lookup = create_board_registry(mocker, [
+            create_board(mocker, "main-id", "main"),
+            create_board(mocker, "archive-id", "archive")])
+        mocked_fetch_board_snapshot = mocker.patch(
+            "board_snapshot.fetch_board_snapshot",
+            side_effect=[
+                {"lists": [], "cards": [{"id": "card-1"}]},
+                {"lists": [create_list_json("list-2", "Sprint")]}])
+
+        card_index, _ = load_board_snapshots(
+            "handle", board_lookup, ["main", "archive"], "main",
+            card_board_names=["main"])
+
+        mocked_fetch_board_snapshot.assert_has_calls([
+            mocker.call("handle", "main-id", None, None, include_cards=True),
+            mocker.call("handle", "archive-id", None, None,
+                        include_cards=False)])
+        assert list(card_index.keys()) == ["card-1"]
+        assert board_lookup.find_list("archive", "Sprint").id == "list-2"
+
+
+class Test_list_cards_from_index:
+    def test_filter_cards_by_list(self, mocker):
+        handle = mocker.Mock()
+        card_index = {
+            "card-1": {"id": "card-1", "idList": "list-1", "name": "One"},
+            "card-2": {"id": "card-2", "idList": "list-2", "name": "Two"}
+        }
+
+        cards = list_cards_from_index(handle, card_index, "list-1")
+
+        assert [card.id for card in cards] == ["card-1"]
+        assert cards[0].name == "One"
+        assert cards[0].client == handle
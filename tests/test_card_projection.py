@@ -0,0 +1,109 @@
+from card_projection import \
+    project_action, \
+    project_card, \
+    project_card_actions
+
+
+def create_action(action_type, data, date="2023-08-02T00:00:00.000Z"):
+    return {"id": f"{action_type}-id", "type": action_type, "date": date,
+            "data": data}
+
+
+class Test_project_action:
+    def test_update_changed_fields(self):
+        card_json = {"id": "card-1", "name": "One", "due": None,
+                     "closed": False}
+        assert project_action(card_json, create_action("updateCard", {
+            "card": {"id": "card-1", "name": "Uno",
+                     "due": "2023-09-01T00:00:00.000Z", "closed": True},
+            "old": {"name": "One", "due": None, "closed": False}}))
+        assert card_json == {
+            "id": "card-1", "name": "Uno",
+            "due": "2023-09-01T00:00:00.000Z", "closed": True,
+            "dateLastActivity": "2023-08-02T00:00:00.000Z"}
+
+    def test_move_between_lists(self):
+        card_json = {"id": "card-1", "idList": "list-1"}
+        assert project_action(card_json, create_action("updateCard", {
+            "card": {"id": "card-1", "idList": "list-2"},
+            "old": {"idList": "list-1"},
+            "listBefore": {"id": "list-1"},
+            "listAfter": {"id": "list-2"}}))
+        assert card_json["idList"] == "list-2"
+
+    def test_unknown_new_value(self):
+        card_json = {"id": "card-1", "desc": "Old"}
+        assert not project_action(card_json, create_action("updateCard", {
+            "card": {"id": "card-1"},
+            "old": {"desc": "Old"}}))
+
+    def test_move_card_to_board(self):
+        card_json = {"id": "card-1", "idBoard": "board-1", "idList": "list-1"}
+        assert project_action(card_json, create_action("moveCardToBoard", {
+            "card": {"id": "card-1"},
+            "board": {"id": "board-2"},
+            "boardSource": {"id": "board-1"},
+            "list": {"id": "list-2"}}))
+        assert card_json["idBoard"] == "board-2"
+        assert card_json["idList"] == "list-2"
+
+    def test_members(self):
+        card_json = {"id": "card-1", "idMembers": ["member-1"]}
+        assert project_action(card_json, create_action(
+            "addMemberToCard", {"card": {"id": "card-1"},
+                                "idMember": "member-2"}))
+        assert project_action(card_json, create_action(
+            "removeMemberFromCard", {"card": {"id": "card-1"},
+                                     "idMember": "member-1"}))
+        assert card_json["idMembers"] == ["member-2"]
+
+
+class Test_project_card:
+    def test_update_existing_snapshot(self):
+        card_json = project_card({"id": "card-1", "name": "One"}, [
+            create_action("updateCard", {
+                "card": {"id": "card-1", "name": "Uno"},
+                "old": {"name": "One"}})])
+        assert card_json["name"] == "Uno"
+        assert card_json["dateLastActivity"] == "2023-08-02T00:00:00.000Z"
+
+    def test_created_card_is_fetched(self):
+        assert project_card(None, [
+            create_action("createCard", {
+                "card": {"id": "card-1", "name": "One"},
+                "board": {"id": "board-1"},
+                "list": {"id": "list-1"}}, "2023-08-01T00:00:00.000Z"),
+            create_action("updateCard", {
+                "card": {"id": "card-1", "name": "Uno"},
+                "old": {"name": "One"}})]) is None
+
+    def test_unknown_card(self):
+        assert project_card(None, [create_action("commentCard", {
+            "card": {"id": "card-1"}})]) is None
+
+    def test_unprojected_action_type(self):
+        assert project_card({"id": "card-1"}, [
+            create_action("addChecklistToCard", {
+                "card": {"id": "card-1"}})]) is None
+
+
+class Test_project_card_actions:
+    def test_apply_oldest_first_and_report_cards_to_fetch(self):
+        card_json_lookup = {
+            "card-1": {"id": "card-1", "name": "One"},
+            "card-2": {"id": "card-2", "name": "Two"}}
+        card_ids_to_fetch = project_card_actions(card_json_lookup, [
+            create_action("updateCard", {
+                "card": {"id": "card-1", "name": "Three"},
+                "old": {"name": "Two"}}, "2023-08-03T00:00:00.000Z"),
+            create_action("updateCard", {
+                "card": {"id": "card-1", "name": "Two"},
+                "old": {"name": "One"}}, "2023-08-02T00:00:00.000Z"),
+            create_action("updateCard", {
+                "card": {"id": "card-2", "name": "Two"},
+                "old": {"name": "Two", "desc": ""}}),
+            create_action("createList", {"list": {"id": "list-1"}})])
+
+        assert card_ids_to_fetch == {"card-2"}
+        assert card_json_lookup["card-1"]["name"] == "Three"
+        assert card_json_lookup["card-2"] == {"id": "card-2", "name": "Two"}
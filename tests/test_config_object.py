@@ -15,8 +15,28 @@ class Test_config_class:
             os.environ["DONE_LIST_NAME"] = "6"
             os.environ["ARCHIVAL_BOARD_NAME"] = "7"
             os.environ["AUTOMATION_USERNAME"] = "8"
-            if (os.environ.get("CONFIG_FILE") != None):
-                os.environ.pop("CONFIG_FILE")
+            for optional_key in ["CONFIG_FILE",
+                                 "HTTP_POOL_SIZE",
+                                 "HTTP_CONNECT_TIMEOUT",
+                                 "HTTP_READ_TIMEOUT",
+                                 "RATE_LIMIT_PER_API_KEY",
+                                 "RATE_LIMIT_PER_TOKEN",
+                                 "RATE_LIMIT_INTERVAL",
+                                 "RETRY_METHODS",
+                                 "RETRY_MAX_ATTEMPTS",
+                                 "RETRY_BACKOFF_BASE",
+                                 "RETRY_BACKOFF_MAX",
+                                 "RETRY_DEADLINE",
+                                 "FETCH_CONCURRENCY",
+                                 "METADATA_CACHE_FILE",
+                                 "METADATA_CACHE_TTL",
+                                 "ACTION_LOG_SEGMENT_SIZE",
+                                 "LOCAL_STORE_FILE",
+                                 "ARCHIVAL_CONCURRENCY",
+                                 "ARCHIVAL_MOVE_ATTEMPTS",
+                                 "TRACKED_CARD_FIELDS"]:
+                if (os.environ.get(optional_key) != None):
+                    os.environ.pop(optional_key)
             config = Daily_config()
             mocked_load_dotenv.assert_called_once()
             assert config.actions_file == "1"
@@ -28,6 +48,52 @@ class Test_config_class:
             assert config.archival_board_name == "7"
             assert config.automation_username == "8"
             assert config.root is None
+            assert config.http_pool_size == 10
+            assert config.http_connect_timeout == 5.0
+            assert config.http_read_timeout == 30.0
+            assert config.rate_limit_per_api_key == 300
+            assert config.rate_limit_per_token == 100
+            assert config.rate_limit_interval == 10.0
+            assert config.retry_methods == ["GET"]
+            assert config.retry_max_attempts == 5
+            assert config.retry_backoff_base == 0.5
+            assert config.retry_backoff_max == 30.0
+            assert config.retry_deadline == 120.0
+            assert config.fetch_concurrency == 8
+            assert config.metadata_cache_file == "metadata_cache.json"
+            assert config.metadata_cache_ttl == 86400.0
+            assert config.action_log_segment_size == 10000
+            assert config.local_store_file == "local_store.sqlite3"
+            assert config.archival_concurrency == 4
+            assert config.archival_move_attempts == 3
+            assert config.tracked_card_fields == []
+
+        def test_load_tracked_card_fields_from_env_file(self, mocker):
+            mocker.patch("config_object.load_dotenv")
+            os.environ["TRACKED_CARD_FIELDS"] = "name, idList,"
+            config = Daily_config()
+            os.environ.pop("TRACKED_CARD_FIELDS")
+            assert config.tracked_card_fields == ["name", "idList"]
+
+        def test_load_retry_methods_from_env_file(self, mocker):
+            mocker.patch("config_object.load_dotenv")
+            os.environ["RETRY_METHODS"] = "get, delete"
+            config = Daily_config()
+            os.environ.pop("RETRY_METHODS")
+            assert config.retry_methods == ["GET", "DELETE"]
+
+        def test_load_http_settings_from_env_file(self, mocker):
+            mocker.patch("config_object.load_dotenv")
+            os.environ["HTTP_POOL_SIZE"] = "4"
+            os.environ["HTTP_CONNECT_TIMEOUT"] = "1.5"
+            os.environ["HTTP_READ_TIMEOUT"] = "12"
+            config = Daily_config()
+            os.environ.pop("HTTP_POOL_SIZE")
+            os.environ.pop("HTTP_CONNECT_TIMEOUT")
+            os.environ.pop("HTTP_READ_TIMEOUT")
+            assert config.http_pool_size == 4
+            assert config.http_connect_timeout == 1.5
+            assert config.http_read_timeout == 12.0
 
         def test_load_structured_config_from_json_file(self, fs, mocker):
             config_json = {
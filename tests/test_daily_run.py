@@ -2,20 +2,27 @@ import os
 import pytest
 import trello
 import daily_run
+from local_store import Local_store
+from trello_helper import Board_registry
+from refresh_policy import Refresh_policy
 
 
 class Test_load_action_list:
-    def test_empty_file(self, mocker):
+    def test_empty_file(self, fs, mocker):
+        fs.create_file("/data/actions.json", contents="[]")
         mocked_config = mocker.Mock()
-        mocked_config.actions_file = \
-            os.getcwd() + "/tests/empty_action_list.json"
-        assert daily_run.load_action_list(mocked_config) == []
-
-    def test_file_not_found(self, mocker):
+        mocked_config.actions_file = "/data/actions.json"
+        mocked_config.action_log_segment_size = 10
+        action_log = daily_run.load_action_list(mocked_config)
+        assert action_log.is_empty()
+        assert action_log.log_dir == "/data/actions.json.d"
+
+    def test_file_not_found(self, fs, mocker):
+        fs.create_dir("/data")
         mocked_config = mocker.Mock()
-        mocked_config.actions_file = \
-            os.getcwd() + "/tests/not_found_action_list.json"
-        assert daily_run.load_action_list(mocked_config) == []
+        mocked_config.actions_file = "/data/actions.json"
+        mocked_config.action_log_segment_size = 10
+        assert list(daily_run.load_action_list(mocked_config)) == []
 
 
 class Test_load_card_lookup:
@@ -50,11 +57,15 @@ class Test_load_card_lookup:
 class Test_init_trello_conn:
     def test_should_return_a_trello_client(self, mocker):
         mocked_config = mocker.Mock()
+        mocker.patch("daily_run.create_transport")
+        mocker.patch("daily_run.install_transport")
         handle = daily_run.init_trello_conn(mocked_config)
         assert isinstance(handle, trello.trelloclient.TrelloClient)
 
     def test_should_retrieve_credentials_from_config_object(self, mocker):
         mocked_config = mocker.Mock()
+        mocker.patch("daily_run.create_transport")
+        mocker.patch("daily_run.install_transport")
         mocker.patch("daily_run.TrelloClient.__init__", return_value=None)
         mocked_config.api_key = "ABC"
         mocked_config.token = "DEF"
@@ -63,23 +74,90 @@ class Test_init_trello_conn:
             api_key="ABC",
             token="DEF")
 
+    def test_should_install_shared_transport(self, mocker):
+        mocked_config = mocker.Mock()
+        transport = mocker.Mock()
+        mocked_create_transport = mocker.patch(
+            "daily_run.create_transport",
+            return_value=transport)
+        mocked_install_transport = mocker.patch(
+            "daily_run.install_transport")
+        daily_run.init_trello_conn(mocked_config)
+        mocked_create_transport.assert_called_once_with(mocked_config)
+        mocked_install_transport.assert_called_once_with(transport)
+
+
+def create_board_json(board_id, name):
+    return {"id": board_id, "name": name, "closed": False,
+            "url": f"https://trello.com/b/{board_id}"}
+
 
 class Test_setup_board_lookup:
     def test_setup_board_lookup(self, mocker):
         handle = mocker.Mock()
-        board_one = mocker.Mock()
-        board_two = mocker.Mock()
-        board_one.name = "board-one-name"
-        board_two.name = "board-two-name"
+        handle.fetch_json.return_value = [
+            create_board_json("board-one-id", "board-one-name"),
+            create_board_json("board-two-id", "board-two-name")]
+
+        board_lookup = daily_run.setup_board_lookup(handle)
+
+        handle.fetch_json.assert_called_once_with(
+            '/members/me/boards',
+            query_params={"filter": "all", "fields": "id,name,closed,url"})
+        assert sorted(board_lookup.keys()) == \
+            ["board-one-name", "board-two-name"]
+        assert board_lookup["board-one-name"].id == "board-one-id"
+        assert board_lookup["board-two-name"].client == handle
+
+    def test_resolve_only_configured_boards(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [
+            create_board_json("board-one-id", "board-one-name"),
+            create_board_json("board-two-id", "board-two-name")]
+
+        board_lookup = daily_run.setup_board_lookup(
+            handle, ["board-one-name", "missing-board"])
+
+        assert list(board_lookup.keys()) == ["board-one-name"]
+        assert "board-two-name" in board_lookup
+        assert board_lookup.get("board-two-name").id == "board-two-id"
+        assert list(board_lookup.keys()) == [
+            "board-one-name", "board-two-name"]
+        assert board_lookup.get("missing-board") is None
+        assert handle.fetch_json.call_count == 1
+
+    def test_use_cached_member_boards(self, mocker):
+        handle = mocker.Mock()
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_member_boards.return_value = [
+            create_board_json("board-one-id", "board-one-name")]
+
+        board_lookup = daily_run.setup_board_lookup(
+            handle, ["board-one-name"], metadata_cache)
+
+        handle.fetch_json.assert_not_called()
+        assert board_lookup["board-one-name"].id == "board-one-id"
+
+    def test_refresh_cache_when_configured_board_missing(self, mocker):
+        handle = mocker.Mock()
+        boards_json = [
+            create_board_json("board-one-id", "board-one-name"),
+            create_board_json("board-two-id", "board-two-name")]
+        handle.fetch_json.return_value = boards_json
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_member_boards.return_value = [
+            create_board_json("board-one-id", "board-one-name")]
+
+        board_lookup = daily_run.setup_board_lookup(
+            handle, ["board-one-name", "board-two-name"], metadata_cache)
 
-        handle.list_boards.return_value = [board_one, board_two]
-        assert daily_run.setup_board_lookup(handle) == {
-            "board-one-name": board_one,
-            "board-two-name": board_two}
+        handle.fetch_json.assert_called_once()
+        metadata_cache.set_member_boards.assert_called_once_with(boards_json)
+        assert board_lookup["board-two-name"].id == "board-two-id"
 
 
-class Test_setup_list_lookup:
-    def test_returns_name_and_id_lookup(self, mocker):
+class Test_setup_board_lists:
+    def test_fill_registry_lists(self, mocker):
         board_a_list1 = mocker.Mock()
         board_a_list1.id = "a123_id"
         board_a_list1.name = "a123_name"
@@ -88,6 +166,7 @@ class Test_setup_list_lookup:
         board_a_list2.name = "a456_name"
         board_a_lists = [board_a_list1, board_a_list2]
         board_a = mocker.Mock()
+        board_a.id = "board_a_id"
         board_a.get_lists.return_value = board_a_lists
         board_a.name = "board_a_name"
 
@@ -99,115 +178,141 @@ class Test_setup_list_lookup:
         board_b_list2.name = "b456_name"
         board_b_lists = [board_b_list1, board_b_list2]
         board_b = mocker.Mock()
+        board_b.id = "board_b_id"
         board_b.get_lists.return_value = board_b_lists
         board_b.name = "board_b_name"
 
-        board_lookup = {
-            "board_a_name": board_a,
-            "board_b_name": board_b
-        }
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup["board_a_name"] = board_a
+        board_lookup["board_b_name"] = board_b
 
-        expected_list_lookup = {
-            "board_name": {
-                "board_a_name": {
-                    "a123_name": (board_a_list1, board_a.name, board_a_list1.name),
-                    "a456_name": (board_a_list2, board_a.name, board_a_list2.name)
-                },
-                "board_b_name": {
-                    "b123_name": (board_b_list1, board_b.name, board_b_list1.name),
-                    "b456_name": (board_b_list2, board_b.name, board_b_list2.name)
-                }
-            },
-            "list_id": {
-                "a123_id": (board_a_list1, board_a.name, board_a_list1.name),
-                "a456_id": (board_a_list2, board_a.name, board_a_list2.name),
-                "b123_id": (board_b_list1, board_b.name, board_b_list1.name),
-                "b456_id": (board_b_list2, board_b.name, board_b_list2.name)
-            }
-        }
+        expected_list_entries = [
+            (board_a_list1, board_a.name, board_a_list1.name),
+            (board_a_list2, board_a.name, board_a_list2.name),
+            (board_b_list1, board_b.name, board_b_list1.name),
+            (board_b_list2, board_b.name, board_b_list2.name)
+        ]
 
-        assert daily_run.setup_list_lookup(
-            board_lookup) == expected_list_lookup
+        assert daily_run.setup_board_lists(board_lookup) == board_lookup
+        assert board_lookup.list_entries() == expected_list_entries
+        assert board_lookup.find_list("board_b_name", "b456_name") == \
+            board_b_list2
+        daily_run.setup_board_lists(board_lookup, 4)
+        assert board_lookup.list_entries() == expected_list_entries
+
+    def test_use_cached_lists(self, mocker):
+        board = mocker.Mock()
+        board.id = "board-id"
+        board.name = "board_name"
+        metadata_cache = mocker.Mock()
+        metadata_cache.get_lists.side_effect = [
+            None, [{"id": "list-id", "name": "Todo", "closed": False, "pos": 1}]]
+        mocked_fetch_board_lists = mocker.patch(
+            "daily_run.fetch_board_lists",
+            return_value=[{"id": "list-id", "name": "Todo",
+                           "closed": False, "pos": 1}])
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup["board_name"] = board
+
+        for _ in range(2):
+            daily_run.setup_board_lists(board_lookup, 1, metadata_cache)
+            [(list, board_name, list_name)] = board_lookup.list_entries()
+            assert list.board == board
+            assert (board_name, list_name) == ("board_name", "Todo")
+
+        mocked_fetch_board_lists.assert_called_once_with(
+            board.client, "board-id")
+        metadata_cache.set_lists.assert_called_once()
+        board.get_lists.assert_not_called()
 
 
 class Test_retrieve_all_actions_from_trello:
-    def test_less_than_1000_actions(self, mocker):
-        action_list = [
-            "addAttachmentToCard",
-            "addChecklistToCard",
-            "addMemberToCard",
-            "commentCard",
-            "convertToCardFromCheckItem",
-            "copyCard",
-            "createCard",
-            "deleteCard",
-            "emailCard",
-            "moveCardFromBoard",
-            "moveCardToBoard",
-            "removeChecklistFromCard",
-            "removeMemberFromCard",
-            "updateCard",
-            "updateCheckItemStateOnCard",
-        ]
-        action_list_str = ','.join(action_list)
-
+    def test_checkpoint_each_window_page(self, mocker):
+        pages = {
+            "2023-01-02T00:00:00.000Z": [
+                {"id": "action-3", "date": "2023-01-03T00:00:00.000Z"}],
+            "2023-01-01T00:00:00.000Z": [
+                {"id": "action-2", "date": "2023-01-02T00:00:00.000Z"},
+                {"id": "action-1", "date": "2023-01-01T00:00:00.000Z"}]
+        }
         board_one = mocker.Mock()
-
-        results = [{"id": "action-one-id"}, {"id": "action-two-id"}]
-        board_one.fetch_actions.return_value = results
-
-        board_name = "board-one-name"
-        board_lookup = {"board-one-name": board_one}
-
-        actions = daily_run.retrieve_all_actions_from_trello(
-            board_lookup, board_name)
-
-        board_one.fetch_actions.assert_called_once_with(
-            {"fields", "all", "filter", action_list_str},
-            action_limit=1000)
-        assert actions == results
+        board_one.id = "board-one-id"
+        board_one.client.fetch_json.side_effect = \
+            lambda uri_path, query_params: pages[query_params["since"]]
+        local_store = Local_store(":memory:")
+        mocked_create_bootstrap_windows = mocker.patch(
+            "daily_run.create_bootstrap_windows", return_value=[
+                ("2023-01-02T00:00:00.000Z", None),
+                ("2023-01-01T00:00:00.000Z", "2023-01-02T00:00:00.000Z")])
+
+        daily_run.retrieve_all_actions_from_trello(
+            {"board-one-name": board_one}, "board-one-name", local_store, 2)
+
+        mocked_create_bootstrap_windows.assert_called_once_with(
+            "board-one-id", 2 * daily_run.BOOTSTRAP_WINDOWS_PER_WORKER)
+        assert [action["id"] for actions in
+                local_store.find_action_batches(10)
+                for action in actions] == \
+            ["action-1", "action-2", "action-3"]
+        assert all(done for (_since, _before, done)
+                   in local_store.find_bootstrap_windows().values())
 
     def test_more_than_1000_actions(self, mocker):
-        action_list = [
-            "addAttachmentToCard",
-            "addChecklistToCard",
-            "addMemberToCard",
-            "commentCard",
-            "convertToCardFromCheckItem",
-            "copyCard",
-            "createCard",
-            "deleteCard",
-            "emailCard",
-            "moveCardFromBoard",
-            "moveCardToBoard",
-            "removeChecklistFromCard",
-            "removeMemberFromCard",
-            "updateCard",
-            "updateCheckItemStateOnCard",
-        ]
-        action_list_str = ','.join(action_list)
-
+        actions = [{"id": f"action-{index:04d}",
+                    "date": f"2023-01-01T00:00:00.{index:04d}Z"}
+                   for index in range(1001, 0, -1)]
         board_one = mocker.Mock()
-
-        results_one = \
-            [{"id": "action-one-id"}, {"id": "action-two-id"}] * 499 + \
-            [{"id": "action-nine-nine-nine-id"}, {"id": "action-thousand-id"}]
-        results_two = [{"id": "action-thousand-one-id"}]
-        board_one.fetch_actions.side_effect = [results_one, results_two]
-
-        board_name = "board-one-name"
-        board_lookup = {"board-one-name": board_one}
-
-        actions = daily_run.retrieve_all_actions_from_trello(
-            board_lookup, board_name)
-
-        board_one.fetch_actions.assert_has_calls([
-            mocker.call({"fields", "all", "filter", action_list_str},
-                        action_limit=1000),
-            mocker.call({"fields", "all", "filter", action_list_str},
-                        action_limit=1000, before='action-thousand-id')])
-        assert actions == results_one + results_two
-
+        board_one.id = "board-one-id"
+        board_one.client.fetch_json.side_effect = [
+            actions[:1000], actions[1000:]]
+        local_store = Local_store(":memory:")
+        mocker.patch(
+            "daily_run.create_bootstrap_windows",
+            return_value=[("2023-01-01T00:00:00.000Z", None)])
+
+        daily_run.retrieve_all_actions_from_trello(
+            {"board-one-name": board_one}, "board-one-name", local_store)
+
+        assert board_one.client.fetch_json.call_args_list[1].kwargs[
+            "query_params"]["before"] == "action-0002"
+        assert sum(len(actions) for actions
+                   in local_store.find_action_batches(1000)) == 1001
+
+    def test_resume_from_checkpoint(self, mocker):
+        board_one = mocker.Mock()
+        board_one.id = "board-one-id"
+        board_one.client.fetch_json.return_value = [
+            {"id": "action-1", "date": "2023-01-01T00:00:00.000Z"}]
+        local_store = Local_store(":memory:")
+        windows = local_store.add_bootstrap_windows([
+            ("2023-01-02T00:00:00.000Z", None),
+            ("2023-01-01T00:00:00.000Z", "2023-01-02T00:00:00.000Z")])
+        first_window_id, second_window_id = windows.keys()
+        local_store.checkpoint_bootstrap_window(first_window_id, [
+            {"id": "action-3", "date": "2023-01-03T00:00:00.000Z"}], None)
+        local_store.checkpoint_bootstrap_window(second_window_id, [
+            {"id": "action-2", "date": "2023-01-02T00:00:00.000Z"}],
+            "action-2")
+        mocked_create_bootstrap_windows = mocker.patch(
+            "daily_run.create_bootstrap_windows")
+
+        daily_run.retrieve_all_actions_from_trello(
+            {"board-one-name": board_one}, "board-one-name", local_store)
+
+        mocked_create_bootstrap_windows.assert_not_called()
+        board_one.client.fetch_json.assert_called_once_with(
+            '/boards/board-one-id/actions', query_params={
+                "filter": ",".join(daily_run.FEED_ACTION_TYPES),
+                "limit": 1000,
+                "since": "2023-01-01T00:00:00.000Z",
+                "before": "action-2"})
+        assert [action["id"] for actions in
+                local_store.find_action_batches(10)
+                for action in actions] == \
+            ["action-1", "action-2", "action-3"]
+
+
+class Test_retrieve_latest_actions_from_trello:
     def test_retrieve_latest_actions_from_trello(self, mocker):
         action_list = [
             "addAttachmentToCard",
@@ -225,24 +330,29 @@ class Test_retrieve_all_actions_from_trello:
             "removeMemberFromCard",
             "updateCard",
             "updateCheckItemStateOnCard",
+            "createList",
+            "updateList",
+            "updateBoard",
+            "moveListToBoard",
         ]
         action_list_str = ','.join(action_list)
 
         board_one = mocker.Mock()
-
+        board_one.client = "handle"
+        board_one.id = "board-one-id"
         results = [{"id": "action-one-id"}, {"id": "action-two-id"}]
-        board_one.fetch_actions.return_value = results
+        mocked_fetch_actions_since = mocker.patch(
+            "daily_run.fetch_actions_since", return_value=results)
 
         board_name = "board-one-name"
         board_lookup = {"board-one-name": board_one}
 
         actions = daily_run.retrieve_latest_actions_from_trello(
-            board_lookup, board_name, "last_action_id")
+            board_lookup, board_name, "last_action_id", 4)
 
-        board_one.fetch_actions.assert_called_once_with(
-            {"fields", "all", "filter", action_list_str},
-            action_limit=1000,
-            since="last_action_id")
+        mocked_fetch_actions_since.assert_called_once_with(
+            "handle", "board-one-id", action_list_str, "last_action_id", 4,
+            None)
         assert actions == results
 
 
@@ -265,38 +375,6 @@ class Test_retrieve_all_cards_from_trello:
         assert results == expected_result
 
 
-class Test_save_card_lookup:
-    def test_save_card(self, mocker):
-        mocked_config = mocker.Mock()
-        mocked_config.cards_file = "cards.json"
-        mocked_open = mocker.patch("daily_run.open", return_value="Mock FP")
-        mocked_json_dump = mocker.patch(
-            "daily_run.json.dump", return_value=None)
-        daily_run.save_card_lookup({}, mocked_config)
-        mocked_open.assert_called_once_with(
-            "cards.json", "w")
-        mocked_json_dump.assert_called_once_with(
-            {},
-            "Mock FP",
-            indent="  ")
-
-
-class Test_save_action_list:
-    def test_save_action_list(self, mocker):
-        mocked_config = mocker.Mock()
-        mocked_config.actions_file = "actions.json"
-        mocked_open = mocker.patch("daily_run.open", return_value="Mock FP")
-        mocked_json_dump = mocker.patch(
-            "daily_run.json.dump", return_value=None)
-        assert daily_run.save_action_list([], mocked_config) is None
-        mocked_open.assert_called_once_with(
-            "actions.json", "w")
-        mocked_json_dump.assert_called_once_with(
-            [],
-            "Mock FP",
-            indent="  ")
-
-
 class Test_create_card_lookup:
     def test_create(self, mocker):
         card_one = mocker.Mock()
@@ -319,69 +397,138 @@ class Test_create_card_lookup:
 
 
 class Test_load_from_local:
-    def test_retrieves_from_local_json_file(self, mocker):
+    def test_retrieves_action_log_and_local_store(self, mocker):
         mocked_config = mocker.Mock()
-        action_list = [123, 456]
-        card_json_lookup = {"abc": 123, "def": 456}
+        action_log = [123, 456]
         mocked_load_action_list = mocker.patch(
             "daily_run.load_action_list",
-            return_value=action_list)
-        mocked_load_card_lookup = mocker.patch(
-            "daily_run.load_card_lookup",
-            return_value=card_json_lookup)
+            return_value=action_log)
+        mocked_load_local_store = mocker.patch(
+            "daily_run.load_local_store",
+            return_value="local_store")
 
         result = daily_run.load_from_local(mocked_config)
 
-        assert result[0] == action_list
-        assert result[1] == card_json_lookup
+        assert result == (action_log, "local_store")
         mocked_load_action_list.assert_called_once_with(mocked_config)
-        mocked_load_card_lookup.assert_called_once_with(mocked_config)
+        mocked_load_local_store.assert_called_once_with(
+            mocked_config, action_log)
+
+
+class Test_load_local_store:
+    def test_sync_actions_and_import_cards(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.local_store_file = ":memory:"
+        action_log = mocker.Mock()
+        action_log.iter_newest_first.return_value = iter([
+            {"id": "action-2", "type": "updateCard", "data": {},
+             "date": "2023-08-02T00:00:00.000Z"},
+            {"id": "action-1", "type": "updateCard", "data": {},
+             "date": "2023-08-01T00:00:00.000Z"}])
+        mocker.patch(
+            "daily_run.load_card_lookup",
+            return_value={"abc": {"id": "abc"}})
+
+        local_store = daily_run.load_local_store(mocked_config, action_log)
+
+        assert [action["id"] for actions in local_store.find_action_batches(10)
+                for action in actions] == ["action-1", "action-2"]
+        assert local_store.latest_action()["id"] == "action-2"
+        assert dict(local_store.cards) == {"abc": {"id": "abc"}}
+
+    def test_keep_cards_already_in_store(self, mocker):
+        mocked_config = mocker.Mock()
+        local_store = mocker.Mock()
+        local_store.sync_actions.return_value = 0
+        local_store.cards = {"abc": {"id": "abc"}}
+        mocker.patch("daily_run.Local_store", return_value=local_store)
+        mocked_load_card_lookup = mocker.patch("daily_run.load_card_lookup")
+
+        assert daily_run.load_local_store(mocked_config, "action_log") == \
+            local_store
+
+        local_store.sync_actions.assert_called_once_with("action_log")
+        mocked_load_card_lookup.assert_not_called()
+
+
+class Test_append_actions:
+    def test_append_to_log_and_store(self, mocker):
+        context = {
+            "action_log": mocker.Mock(),
+            "local_store": mocker.Mock(**{
+                "find_known_action_ids.return_value": set()})
+        }
+        daily_run.append_actions(context, [{"id": "action"}])
+        context["action_log"].append.assert_called_once_with(
+            [{"id": "action"}])
+        context["local_store"].add_actions.assert_called_once_with(
+            [{"id": "action"}])
+
+    def test_skip_known_actions(self, mocker):
+        context = {
+            "action_log": mocker.Mock(),
+            "local_store": mocker.Mock(**{
+                "find_known_action_ids.return_value": {"action-1"}})
+        }
+        daily_run.append_actions(
+            context, [{"id": "action-2"}, {"id": "action-1"}])
+        context["action_log"].append.assert_called_once_with(
+            [{"id": "action-2"}])
+        context["local_store"].add_actions.assert_called_once_with(
+            [{"id": "action-2"}])
 
 
 class Test_first_time_load:
     def test_retrieve_all_actions_cards_and_save_them(self, mocker):
         mocked_config = mocker.Mock()
         mocked_config.board_name = "board-one"
+        mocked_config.fetch_concurrency = 4
+        mocked_config.action_log_segment_size = 2
         handle = "handle"
         board_lookup = {"board-one": 123}
-        action_list = [123, 456]
         cards = [789, 987]
         card_lookup = {"card_lookup": 123}
         card_json_lookup = {"card_json_lookup": 456}
+        local_store = Local_store(":memory:")
         context = {
-            "card_json_lookup": card_json_lookup,
-            "action_list": action_list,
+            "card_json_lookup": {},
+            "action_log": mocker.Mock(),
+            "local_store": local_store,
             "handle": handle,
             "board_lookup": board_lookup
         }
 
+        def retrieve_all_actions_from_trello(
+                board_lookup, board_name, local_store, concurrency):
+            local_store.add_actions([
+                {"id": f"action-{index}",
+                 "date": f"2023-01-0{index}T00:00:00.000Z",
+                 "type": "updateCard", "data": {}}
+                for index in [3, 2, 1]])
+
         mocked_retrieve_all_actions_from_trello = mocker.patch(
             "daily_run.retrieve_all_actions_from_trello",
-            return_value=action_list)
-        mocked_save_action_list = mocker.patch(
-            "daily_run.save_action_list",
-            return_value=None)
+            side_effect=retrieve_all_actions_from_trello)
         mocked_retrieve_all_cards_from_trello = mocker.patch(
             "daily_run.retrieve_all_cards_from_trello",
             return_value=cards)
         mocked_create_card_lookup = mocker.patch(
             "daily_run.create_card_lookup",
             return_value=[card_lookup, card_json_lookup])
-        mocked_save_card_lookup = mocker.patch(
-            "daily_run.save_card_lookup",
-            return_value=None)
 
-        daily_run.first_time_load(context, mocked_config)
+        assert daily_run.first_time_load(context, mocked_config) == \
+            (card_lookup, card_json_lookup)
 
         mocked_retrieve_all_actions_from_trello.assert_called_once_with(
-            board_lookup, "board-one")
-        mocked_save_action_list.assert_called_once_with(
-            action_list, mocked_config)
+            board_lookup, "board-one", local_store, 4)
+        assert [[action["id"] for action in call.args[0]] for call in
+                context["action_log"].append.call_args_list] == \
+            [["action-2", "action-1"], ["action-3"]]
         mocked_retrieve_all_cards_from_trello.assert_called_once_with(
             board_lookup, "board-one")
         mocked_create_card_lookup.assert_called_once_with(cards)
-        mocked_save_card_lookup.assert_called_once_with(
-            card_json_lookup, mocked_config)
+        assert local_store.find_bootstrap_windows() == {}
+        context["action_log"].save_cursor.assert_called_once_with("action-3")
 
 
 class Test_get_card_ids_from_action_list:
@@ -511,13 +658,10 @@ class Test_update_card_json_lookup:
         mocked_get_card_ids_from_action_list = mocker.patch(
             "daily_run.get_card_ids_from_action_list",
             return_value=updated_card_entries)
-
-        card_one = mocker.Mock()
-        card_one._json_obj = {"id": "xyz"}
-        card_two = mocker.Mock()
-        card_two._json_obj = {"id": "opq"}
-        card_three = mocker.Mock()
-        card_three._json_obj = {"id": "abc", "updates": "existing"}
+        mocker.patch(
+            "daily_run.project_card_actions",
+            return_value={updated_card_id for (updated_card_id, _name, _link)
+                          in updated_card_entries})
 
         progress_bar = mocker.Mock()
         mocked_tqdm = mocker.patch(
@@ -525,19 +669,104 @@ class Test_update_card_json_lookup:
             return_value=progress_bar)
         mocked_tqdm.set_description.return_value = None
 
-        handle.get_card.side_effect = [card_one, card_two, card_three]
+        mocked_fetch_cards_batched = mocker.patch(
+            "daily_run.fetch_cards_batched",
+            return_value=[
+                {"id": "abc", "updates": "existing"},
+                {"id": "opq"},
+                {"id": "xyz"}])
 
         results = daily_run.update_card_json_lookup(
-            handle, card_json_lookup, new_action_list)
+            handle, card_json_lookup, new_action_list, 2)
 
         mocked_get_card_ids_from_action_list.assert_called_once_with(
             new_action_list)
-        mocked_tqdm.assert_called()
-        assert handle.mock_calls == [
-            mocker.call.get_card('xyz'),
-            mocker.call.get_card('opq'),
-            mocker.call.get_card('abc')]
+        mocked_tqdm.assert_called_once_with(total=3)
+        mocked_fetch_cards_batched.assert_called_once_with(
+            handle, ["abc", "opq", "xyz"], 2, mocker.ANY,
+            query_params={'customFieldItems': 'true'})
         assert results == expected_card_json_lookup
+        assert list(results.keys()) == ["abc", "def", "opq", "xyz"]
+
+    def test_fetch_only_cards_that_cannot_be_projected(self, mocker):
+        handle = mocker.Mock()
+        new_action_list = [
+            {"id": "action-2", "type": "commentCard",
+             "date": "2023-08-02T00:00:00.000Z",
+             "data": {"card": {"id": "abc", "name": "abc-name"}}},
+            {"id": "action-1", "type": "addChecklistToCard",
+             "date": "2023-08-01T00:00:00.000Z",
+             "data": {"card": {"id": "def", "name": "def-name"}}}]
+        card_json_lookup = {"abc": {"id": "abc"}, "def": {"id": "def"}}
+        mocker.patch("daily_run.tqdm")
+        mocked_fetch_cards_batched = mocker.patch(
+            "daily_run.fetch_cards_batched",
+            return_value=[{"id": "def", "idChecklists": ["checklist"]}])
+
+        results = daily_run.update_card_json_lookup(
+            handle, card_json_lookup, new_action_list)
+
+        mocked_fetch_cards_batched.assert_called_once_with(
+            handle, ["def"], 1, mocker.ANY,
+            query_params={'customFieldItems': 'true'})
+        assert results == {
+            "abc": {"id": "abc",
+                    "dateLastActivity": "2023-08-02T00:00:00.000Z"},
+            "def": {"id": "def", "idChecklists": ["checklist"]}}
+
+    def test_skip_fetch_for_untracked_changes(self, mocker, capsys):
+        handle = mocker.Mock()
+        new_action_list = [
+            {"id": "action-2", "type": "updateCheckItemStateOnCard",
+             "date": "2023-08-02T00:00:00.000Z",
+             "data": {"card": {"id": "abc", "name": "abc-name"}}},
+            {"id": "action-1", "type": "addChecklistToCard",
+             "date": "2023-08-01T00:00:00.000Z",
+             "data": {"card": {"id": "def", "name": "def-name"}}}]
+        card_json_lookup = {"abc": {"id": "abc"}, "def": {"id": "def"}}
+        mocker.patch("daily_run.tqdm")
+        mocked_fetch_cards_batched = mocker.patch(
+            "daily_run.fetch_cards_batched", return_value=[])
+
+        results = daily_run.update_card_json_lookup(
+            handle, card_json_lookup, new_action_list, 1,
+            Refresh_policy(["name", "idList"]))
+
+        mocked_fetch_cards_batched.assert_called_once_with(
+            handle, [], 1, mocker.ANY,
+            query_params={'customFieldItems': 'true'})
+        assert results == {"abc": {"id": "abc"}, "def": {"id": "def"}}
+        assert "0 Cards need to be checked for update, 2 fetches avoided" \
+            in capsys.readouterr().out
+
+    def test_count_each_card_once(self, mocker, capsys):
+        handle = mocker.Mock()
+        new_action_list = [
+            {"id": "action-3", "type": "commentCard",
+             "date": "2023-08-03T00:00:00.000Z",
+             "data": {"card": {"id": "abc", "name": "abc-renamed"}}},
+            {"id": "action-2", "type": "commentCard",
+             "date": "2023-08-02T00:00:00.000Z",
+             "data": {"card": {"id": "abc", "name": "abc-name"}}},
+            {"id": "action-1", "type": "addChecklistToCard",
+             "date": "2023-08-01T00:00:00.000Z",
+             "data": {"card": {"id": "def", "name": "def-name"}}},
+            {"id": "action-0", "type": "addChecklistToCard",
+             "date": "2023-08-01T00:00:00.000Z",
+             "data": {"card": {"id": "def", "name": "def-old-name"}}}]
+        card_json_lookup = {"abc": {"id": "abc"}, "def": {"id": "def"}}
+        mocker.patch("daily_run.tqdm")
+        mocked_fetch_cards_batched = mocker.patch(
+            "daily_run.fetch_cards_batched", return_value=[{"id": "def"}])
+
+        daily_run.update_card_json_lookup(
+            handle, card_json_lookup, new_action_list)
+
+        mocked_fetch_cards_batched.assert_called_once_with(
+            handle, ["def"], 1, mocker.ANY,
+            query_params={'customFieldItems': 'true'})
+        assert "1 Cards need to be checked for update, 1 fetches avoided" \
+            in capsys.readouterr().out
 
     def test_exception_during_lookup(self, mocker):
         handle = mocker.Mock()
@@ -552,9 +781,10 @@ class Test_update_card_json_lookup:
         mocked_get_card_ids_from_action_list = mocker.patch(
             "daily_run.get_card_ids_from_action_list",
             return_value=updated_card_entries)
-
-        card_one = mocker.Mock()
-        card_one._json_obj = {"id": "xyz"}
+        mocker.patch(
+            "daily_run.project_card_actions",
+            return_value={updated_card_id for (updated_card_id, _name, _link)
+                          in updated_card_entries})
 
         progress_bar = mocker.Mock()
         mocked_tqdm = mocker.patch(
@@ -562,7 +792,7 @@ class Test_update_card_json_lookup:
             return_value=progress_bar)
         mocked_tqdm.set_description.return_value = None
 
-        handle.get_card.side_effect = trello.ResourceUnavailable(
+        handle.fetch_json.side_effect = trello.ResourceUnavailable(
             "error message", type('obj', (object,), {'status_code': '404'}))
 
         results = daily_run.update_card_json_lookup(
@@ -571,35 +801,37 @@ class Test_update_card_json_lookup:
         mocked_get_card_ids_from_action_list.assert_called_once_with(
             new_action_list)
         mocked_tqdm.assert_called()
+        progress_bar.update.assert_called_once_with(1)
         assert handle.mock_calls == [
-            mocker.call.get_card('xyz')]
+            mocker.call.fetch_json(
+                '/batch',
+                query_params={'urls': '/cards/xyz?customFieldItems=true'})]
         assert results == expected_card_json_lookup
 
 
-class Test_update_action_list:
-    def test_update_action_list(self, mocker):
-        action_list = [{"id": 123}, {"id": 456}]
-        new_action_list = [{"id": 789}]
-        results = daily_run.update_action_list(action_list, new_action_list)
-        assert results == [{"id": 789}, {"id": 123}, {"id": 456}]
-
-
 class Test_update_cards_and_actions:
     def test_retrieve_new_actions_cards_append_or_update_and_save(
             self, mocker):
         mocked_config = mocker.Mock()
         mocked_config.board_name = "board-one"
+        mocked_config.fetch_concurrency = 4
+        mocked_config.tracked_card_fields = []
         handle = "handle"
         board_lookup = {"board-one": 123}
-        action_list = [{"id": 123}, {"id": 456}]
+        action_log = mocker.Mock()
+        action_log.cursor.return_value = "action-1"
         card_json_lookup = {"abc": {"id": "abc"}, "def": {"id": "def"}}
-        new_action_list = [789]
+        new_action_list = [{"id": "action-2"}]
 
         context = {
             "handle": handle,
             "card_json_lookup": card_json_lookup,
-            "action_list": action_list,
-            "board_lookup": board_lookup
+            "action_log": action_log,
+            "local_store": mocker.Mock(**{
+                "find_known_action_ids.return_value": set()}),
+            "board_lookup": board_lookup,
+            "recent_actions": None,
+            "metadata_cache": mocker.Mock()
         }
 
         mocked_retrieve_latest_actions_from_trello = mocker.patch(
@@ -608,48 +840,165 @@ class Test_update_cards_and_actions:
         mocked_update_card_json_lookup = mocker.patch(
             "daily_run.update_card_json_lookup",
             return_value=card_json_lookup)
-        mocked_update_action_list = mocker.patch(
-            "daily_run.update_action_list",
-            return_value=action_list)
-        mocked_save_action_list = mocker.patch(
-            "daily_run.save_action_list",
-            return_value=None)
-        mocked_save_card_lookup = mocker.patch(
-            "daily_run.save_card_lookup",
-            return_value=None)
 
-        daily_run.update_cards_and_actions(
-            context, mocked_config)
+        assert daily_run.update_cards_and_actions(
+            context, mocked_config) == card_json_lookup
 
         mocked_retrieve_latest_actions_from_trello.assert_called_once_with(
-            board_lookup, "board-one", action_list[0]["id"])
+            board_lookup, "board-one", "action-1", 4, None)
+        context["metadata_cache"].invalidate_from_actions \
+            .assert_called_once_with(new_action_list)
         mocked_update_card_json_lookup.assert_called_once_with(
-            handle, card_json_lookup, new_action_list)
-        mocked_update_action_list.assert_called_once_with(
-            action_list, new_action_list)
-        mocked_save_action_list.assert_called_once_with(
-            action_list, mocked_config)
-        mocked_save_card_lookup.assert_called_once_with(
-            card_json_lookup, mocked_config)
+            handle, card_json_lookup, new_action_list, 4, mocker.ANY)
+        action_log.append.assert_called_once_with(new_action_list)
+        context["local_store"].add_actions.assert_called_once_with(
+            new_action_list)
+        context["local_store"].commit.assert_called_once()
+        action_log.save_cursor.assert_called_once_with("action-2")
+
+    def test_use_recent_actions_from_board_snapshot(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 4
+        mocked_config.tracked_card_fields = []
+        action_log = mocker.Mock()
+        card_json_lookup = {}
+        new_action_list = [{"id": 789}]
+        context = {
+            "handle": "handle",
+            "card_json_lookup": card_json_lookup,
+            "action_log": action_log,
+            "local_store": mocker.Mock(**{
+                "find_known_action_ids.return_value": set()}),
+            "board_lookup": {},
+            "recent_actions": new_action_list
+        }
+        mocked_retrieve_latest_actions_from_trello = mocker.patch(
+            "daily_run.retrieve_latest_actions_from_trello")
+        mocked_update_card_json_lookup = mocker.patch(
+            "daily_run.update_card_json_lookup",
+            return_value=card_json_lookup)
+
+        assert daily_run.update_cards_and_actions(
+            context, mocked_config) == card_json_lookup
+
+        mocked_retrieve_latest_actions_from_trello.assert_not_called()
+        action_log.append.assert_called_once_with(new_action_list)
+        mocked_update_card_json_lookup.assert_called_once_with(
+            "handle", card_json_lookup, new_action_list, 4, mocker.ANY)
+
+    def test_page_past_full_board_snapshot(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "board-one"
+        mocked_config.fetch_concurrency = 4
+        mocked_config.tracked_card_fields = []
+        action_log = mocker.Mock()
+        action_log.cursor.return_value = "action-0"
+        recent_actions = [{"id": f"action-{index}"}
+                          for index in range(1000, 0, -1)]
+        new_action_list = [{"id": "action-1001"}] + recent_actions
+        context = {
+            "handle": "handle",
+            "card_json_lookup": {},
+            "action_log": action_log,
+            "local_store": mocker.Mock(**{
+                "find_known_action_ids.return_value": set()}),
+            "board_lookup": {"board-one": "board"},
+            "recent_actions": recent_actions,
+            "metadata_cache": mocker.Mock()
+        }
+        mocked_retrieve_latest_actions_from_trello = mocker.patch(
+            "daily_run.retrieve_latest_actions_from_trello",
+            return_value=new_action_list)
+        mocker.patch("daily_run.update_card_json_lookup", return_value={})
+
+        daily_run.update_cards_and_actions(context, mocked_config)
+
+        mocked_retrieve_latest_actions_from_trello.assert_called_once_with(
+            {"board-one": "board"}, "board-one", "action-0", 4,
+            recent_actions)
+        action_log.append.assert_called_once_with(new_action_list)
+        action_log.save_cursor.assert_called_once_with("action-1001")
+
+
+class Test_setup_board_snapshots:
+    def test_load_snapshots_since_last_action(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "board-one"
+        context = {
+            "handle": "handle",
+            "board_lookup": "board_lookup",
+            "action_log": mocker.Mock(**{
+                "cursor.return_value": "action-2"}),
+            "metadata_cache": "metadata_cache"
+        }
+        mocker.patch(
+            "daily_run.get_configured_board_names",
+            return_value=["board-one", "archive"])
+        mocker.patch(
+            "daily_run.get_card_board_names",
+            return_value=["board-one"])
+        mocked_load_board_snapshots = mocker.patch(
+            "daily_run.load_board_snapshots",
+            return_value=("card_index", "recent_actions"))
+
+        assert daily_run.setup_board_snapshots(context, mocked_config) == \
+            ("card_index", "recent_actions")
+
+        mocked_load_board_snapshots.assert_called_once_with(
+            "handle", "board_lookup", ["board-one", "archive"], "board-one",
+            ",".join(daily_run.FEED_ACTION_TYPES), "action-2",
+            mocked_config.fetch_concurrency, "metadata_cache", ["board-one"])
+
+    def test_no_actions_since_without_local_actions(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.board_name = "board-one"
+        context = {
+            "handle": "handle",
+            "board_lookup": "board_lookup",
+            "action_log": mocker.Mock(**{
+                "cursor.return_value": None}),
+            "metadata_cache": "metadata_cache"
+        }
+        mocker.patch(
+            "daily_run.get_configured_board_names",
+            return_value=["board-one"])
+        mocker.patch(
+            "daily_run.get_card_board_names",
+            return_value=["board-one"])
+        mocked_load_board_snapshots = mocker.patch(
+            "daily_run.load_board_snapshots",
+            return_value=("card_index", None))
+
+        daily_run.setup_board_snapshots(context, mocked_config)
+
+        assert mocked_load_board_snapshots.call_args.args[5] is None
 
 
 class Test_run:
     def test_empty_action_list(self, mocker):
         mocked_config = mocker.Mock()
         handle = "handle"
-        action_list = []
+        action_log = mocker.Mock()
+        action_log.is_empty.return_value = True
         card_json_lookup = {}
+        local_store = mocker.Mock()
+        local_store.cards = card_json_lookup
 
         board_one = mocker.Mock()
         board_name = "board-one-name"
-        board_lookup = {board_name: board_one}
+        board_lookup = mocker.MagicMock()
+        board_lookup.__getitem__.side_effect = {board_name: board_one}.get
+        metadata_cache = mocker.Mock()
 
         context = {
             "handle": handle,
             "card_json_lookup": card_json_lookup,
-            "action_list": action_list,
+            "action_log": action_log,
+            "local_store": local_store,
             "board_lookup": board_lookup,
-            "list_lookup": "list_lookup"
+            "metadata_cache": metadata_cache,
+            "card_index": "card_index",
+            "recent_actions": "recent_actions"
         }
 
         mocked_create_daily_config = mocker.patch(
@@ -657,19 +1006,25 @@ class Test_run:
             return_value=mocked_config)
         mocked_load_from_local = mocker.patch(
             "daily_run.load_from_local",
-            return_value=[action_list, card_json_lookup])
+            return_value=[action_log, local_store])
         mocked_init_trello_conn = mocker.patch(
             "daily_run.init_trello_conn",
             return_value="handle")
+        mocker.patch(
+            "daily_run.get_configured_board_names",
+            return_value=[board_name])
+        mocked_metadata_cache = mocker.patch(
+            "daily_run.Metadata_cache",
+            return_value=metadata_cache)
         mocked_setup_board_lookup = mocker.patch(
             "daily_run.setup_board_lookup",
             return_value=board_lookup)
-        mocked_setup_list_lookup = mocker.patch(
-            "daily_run.setup_list_lookup",
-            return_value="list_lookup")
+        mocked_setup_board_snapshots = mocker.patch(
+            "daily_run.setup_board_snapshots",
+            return_value=("card_index", "recent_actions"))
         mocked_first_time_load = mocker.patch(
             "daily_run.first_time_load",
-            return_value=(action_list, {}, card_json_lookup))
+            return_value=({}, card_json_lookup))
         mocked_update_cards_and_actions = mocker.patch(
             "daily_run.update_cards_and_actions",
             return_value=None)
@@ -679,14 +1034,22 @@ class Test_run:
         mocked_perform_sync_cards = mocker.patch(
             "daily_run.perform_sync_cards",
             return_value=None)
+        mocked_report_transport_stats = mocker.patch(
+            "daily_run.report_transport_stats",
+            return_value=None)
 
         daily_run.run()
 
         mocked_create_daily_config.assert_called_once()
         mocked_load_from_local.assert_called_once_with(mocked_config)
         mocked_init_trello_conn.assert_called_once_with(mocked_config)
-        mocked_setup_board_lookup.assert_called_once_with(handle)
-        mocked_setup_list_lookup.assert_called_once_with(board_lookup)
+        mocked_metadata_cache.assert_called_once_with(
+            mocked_config.metadata_cache_file,
+            mocked_config.metadata_cache_ttl)
+        mocked_setup_board_lookup.assert_called_once_with(
+            handle, [board_name], metadata_cache)
+        mocked_setup_board_snapshots.assert_called_once_with(
+            context, mocked_config)
         mocked_first_time_load.assert_called_once_with(
             context,
             mocked_config)
@@ -695,23 +1058,33 @@ class Test_run:
             context, mocked_config)
         mocked_perform_sync_cards.assert_called_once_with(
             context, mocked_config)
+        mocked_report_transport_stats.assert_called_once_with(handle)
+        metadata_cache.save.assert_called_once()
 
     def test_non_empty_action_list(self, mocker):
         mocked_config = mocker.Mock()
         handle = "handle"
-        action_list = [123]
+        action_log = mocker.Mock()
+        action_log.is_empty.return_value = False
         card_json_lookup = {}
+        local_store = mocker.Mock()
+        local_store.cards = card_json_lookup
 
         board_one = mocker.Mock()
         board_name = "board-one-name"
-        board_lookup = {board_name: board_one}
+        board_lookup = mocker.MagicMock()
+        board_lookup.__getitem__.side_effect = {board_name: board_one}.get
+        metadata_cache = mocker.Mock()
 
         context = {
             "handle": handle,
-            "action_list": action_list,
+            "action_log": action_log,
+            "local_store": local_store,
             "card_json_lookup": card_json_lookup,
             "board_lookup": board_lookup,
-            "list_lookup": "list_lookup"
+            "metadata_cache": metadata_cache,
+            "card_index": "card_index",
+            "recent_actions": "recent_actions"
         }
 
         mocked_create_daily_config = mocker.patch(
@@ -719,36 +1092,50 @@ class Test_run:
             return_value=mocked_config)
         mocked_load_from_local = mocker.patch(
             "daily_run.load_from_local",
-            return_value=[action_list, card_json_lookup])
+            return_value=[action_log, local_store])
         mocked_init_trello_conn = mocker.patch(
             "daily_run.init_trello_conn",
             return_value="handle")
+        mocker.patch(
+            "daily_run.get_configured_board_names",
+            return_value=[board_name])
+        mocked_metadata_cache = mocker.patch(
+            "daily_run.Metadata_cache",
+            return_value=metadata_cache)
         mocked_setup_board_lookup = mocker.patch(
             "daily_run.setup_board_lookup",
             return_value=board_lookup)
-        mocked_setup_list_lookup = mocker.patch(
-            "daily_run.setup_list_lookup",
-            return_value="list_lookup")
+        mocked_setup_board_snapshots = mocker.patch(
+            "daily_run.setup_board_snapshots",
+            return_value=("card_index", "recent_actions"))
         mocked_first_time_load = mocker.patch(
             "daily_run.first_time_load",
             return_value=None)
         mocked_update_cards_and_actions = mocker.patch(
             "daily_run.update_cards_and_actions",
-            return_value=[action_list, card_json_lookup])
+            return_value=card_json_lookup)
         mocked_perform_archival = mocker.patch(
             "daily_run.perform_archival",
             return_value=None)
         mocked_perform_sync_cards = mocker.patch(
             "daily_run.perform_sync_cards",
             return_value=None)
+        mocked_report_transport_stats = mocker.patch(
+            "daily_run.report_transport_stats",
+            return_value=None)
 
         daily_run.run()
 
         mocked_create_daily_config.assert_called_once()
         mocked_load_from_local.assert_called_once_with(mocked_config)
         mocked_init_trello_conn.assert_called_once_with(mocked_config)
-        mocked_setup_board_lookup.assert_called_once_with(handle)
-        mocked_setup_list_lookup.assert_called_once_with(board_lookup)
+        mocked_metadata_cache.assert_called_once_with(
+            mocked_config.metadata_cache_file,
+            mocked_config.metadata_cache_ttl)
+        mocked_setup_board_lookup.assert_called_once_with(
+            handle, [board_name], metadata_cache)
+        mocked_setup_board_snapshots.assert_called_once_with(
+            context, mocked_config)
         mocked_update_cards_and_actions.assert_called_once_with(
             context, mocked_config)
         mocked_first_time_load.assert_not_called()
@@ -756,3 +1143,5 @@ class Test_run:
             context, mocked_config)
         mocked_perform_sync_cards.assert_called_once_with(
             context, mocked_config)
+        mocked_report_transport_stats.assert_called_once_with(handle)
+        metadata_cache.save.assert_called_once()
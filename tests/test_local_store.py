@@ -0,0 +1,239 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from action_log import Action_log
+from local_store import Local_store, create_action_row, \
+    create_list_entry_row
+
+
+def create_action(action_id, date, action_type="updateCard", data=None):
+    return {"id": action_id, "type": action_type, "date": date,
+            "data": data if data is not None else {}}
+
+
+def find_action_ids(local_store):
+    return [action["id"] for actions in local_store.find_action_batches(100)
+            for action in actions]
+
+
+class Test_create_action_row:
+    def test_extract_indexed_columns(self):
+        action = create_action(
+            "action-1", "2023-08-02T00:00:00.000Z", data={
+                "card": {"id": "card-1"},
+                "list": {"id": "list-1"},
+                "listAfter": {"id": "list-2"}})
+        assert create_action_row(action)[:6] == (
+            "action-1", "card-1", "updateCard", "list-1", "list-2",
+            "2023-08-02T00:00:00.000Z")
+
+    def test_missing_nested_ids(self):
+        action = create_action("action-1", "2023-08-02T00:00:00.000Z")
+        assert create_action_row(action)[1:5] == (
+            None, "updateCard", None, None)
+
+
+class Test_create_list_entry_row:
+    def test_update_card_uses_list_after(self):
+        action = create_action(
+            "action-1", "2023-08-02T00:00:00.000Z", data={
+                "card": {"id": "card-1"},
+                "listBefore": {"id": "list-1"},
+                "listAfter": {"id": "list-2"}})
+        assert create_list_entry_row(action) == \
+            ("card-1", "list-2", "2023-08-02T00:00:00.000Z")
+
+    def test_move_card_to_board_uses_list(self):
+        action = create_action(
+            "action-1", "2023-08-02T00:00:00.000Z", "moveCardToBoard", {
+                "card": {"id": "card-1"},
+                "list": {"id": "list-1"}})
+        assert create_list_entry_row(action) == \
+            ("card-1", "list-1", "2023-08-02T00:00:00.000Z")
+
+    def test_other_actions_have_no_entry(self):
+        assert create_list_entry_row(create_action(
+            "action-1", "2023-08-02T00:00:00.000Z", "commentCard", {
+                "card": {"id": "card-1"},
+                "list": {"id": "list-1"}})) is None
+        assert create_list_entry_row(create_action(
+            "action-1", "2023-08-02T00:00:00.000Z", "updateCard", {
+                "card": {"id": "card-1"},
+                "list": {"id": "list-1"}})) is None
+
+
+class Test_Local_store:
+    def test_add_actions_ignores_duplicates(self):
+        local_store = Local_store(":memory:")
+        action = create_action("action-1", "2023-08-02T00:00:00.000Z")
+        local_store.add_actions([action])
+        local_store.add_actions([action])
+        assert find_action_ids(local_store) == ["action-1"]
+
+    def test_latest_action(self):
+        local_store = Local_store(":memory:")
+        assert local_store.latest_action() is None
+        local_store.add_actions([
+            create_action("action-1", "2023-08-01T00:00:00.000Z"),
+            create_action("action-3", "2023-08-03T00:00:00.000Z"),
+            create_action("action-2", "2023-08-02T00:00:00.000Z")])
+        assert local_store.latest_action()["id"] == "action-3"
+
+    def test_find_action_batches_oldest_first(self):
+        local_store = Local_store(":memory:")
+        local_store.add_actions([
+            create_action("action-3", "2023-08-03T00:00:00.000Z"),
+            create_action("action-1", "2023-08-01T00:00:00.000Z"),
+            create_action("action-2", "2023-08-01T00:00:00.000Z")])
+        assert [[action["id"] for action in actions] for actions in
+                local_store.find_action_batches(2)] == \
+            [["action-1", "action-2"], ["action-3"]]
+
+    def test_persist_to_file(self, tmp_path):
+        db_file = str(tmp_path / "store.sqlite3")
+        local_store = Local_store(db_file)
+        local_store.add_actions([
+            create_action("action-1", "2023-08-01T00:00:00.000Z")])
+        local_store.cards["card-1"] = {"id": "card-1"}
+        local_store.commit()
+        local_store.close()
+
+        reopened_store = Local_store(db_file)
+        assert find_action_ids(reopened_store) == ["action-1"]
+        assert reopened_store.cards["card-1"] == {"id": "card-1"}
+
+    def test_sync_actions_from_log(self, tmp_path):
+        action_log = Action_log(str(tmp_path / "actions.d"), segment_size=2)
+        action_log.append([
+            create_action("action-2", "2023-08-02T00:00:00.000Z"),
+            create_action("action-1", "2023-08-01T00:00:00.000Z")])
+        local_store = Local_store(":memory:")
+
+        assert local_store.sync_actions(action_log) == 2
+
+        action_log.append([
+            create_action("action-4", "2023-08-04T00:00:00.000Z"),
+            create_action("action-3", "2023-08-03T00:00:00.000Z")])
+
+        assert local_store.sync_actions(action_log) == 2
+        assert local_store.sync_actions(action_log) == 0
+        assert find_action_ids(local_store) == \
+            ["action-1", "action-2", "action-3", "action-4"]
+
+
+class Test_list_entries:
+    def test_keep_latest_entry_date(self):
+        local_store = Local_store(":memory:")
+        move = {"card": {"id": "card-1"}, "listAfter": {"id": "done"}}
+        local_store.add_actions([
+            create_action("action-2", "2023-08-09T00:00:00.000Z", data=move)])
+        local_store.add_actions([
+            create_action("action-1", "2023-08-02T00:00:00.000Z", data=move)])
+
+        assert local_store.find_move_to_list_date("card-1", "done") == \
+            "2023-08-09T00:00:00.000Z"
+        assert local_store.find_move_to_list_date("card-1", "todo") is None
+
+    def test_backfill_existing_store(self, tmp_path):
+        db_file = str(tmp_path / "store.sqlite3")
+        local_store = Local_store(db_file)
+        local_store.add_actions([
+            create_action("action-1", "2023-08-02T00:00:00.000Z", data={
+                "card": {"id": "card-1"}, "listAfter": {"id": "done"}}),
+            create_action("action-2", "2023-08-03T00:00:00.000Z",
+                          "moveCardToBoard", {
+                              "card": {"id": "card-2"},
+                              "list": {"id": "done"}})])
+        local_store.connection.execute("DELETE FROM list_entries")
+        local_store.commit()
+        local_store.close()
+
+        reopened_store = Local_store(db_file)
+
+        assert reopened_store.find_move_to_list_date("card-1", "done") == \
+            "2023-08-02T00:00:00.000Z"
+        assert reopened_store.find_move_to_list_date("card-2", "done") == \
+            "2023-08-03T00:00:00.000Z"
+
+
+class Test_card_movements:
+    def create_move(self, action_id, card_id, date, username="user"):
+        return {"id": action_id, "type": "updateCard", "date": date,
+                "memberCreator": {"username": username},
+                "data": {"card": {"id": card_id},
+                         "listAfter": {"id": "list-1"}}}
+
+    def test_keep_latest_movement_per_card(self):
+        local_store = Local_store(":memory:")
+        local_store.add_card_movements("board-1", [
+            self.create_move("action-3", "card-1", "2023-08-03"),
+            create_action("action-2", "2023-08-04", "commentCard",
+                          {"card": {"id": "card-1"}}),
+            self.create_move("action-1", "card-2", "2023-08-01")])
+        local_store.add_card_movements("board-1", [
+            self.create_move("action-0", "card-1", "2023-08-02")])
+
+        assert local_store.find_latest_movement(["card-1"])["id"] == \
+            "action-3"
+        assert local_store.find_latest_movement(
+            ["card-1", "card-2"])["id"] == "action-3"
+        assert local_store.find_latest_movement(["card-3"]) is None
+        assert local_store.find_board_cursor("board-1") == "action-0"
+        assert local_store.find_board_cursor("board-2") is None
+
+    def test_cursor_for_board_without_movements(self):
+        local_store = Local_store(":memory:")
+        local_store.add_card_movements("board-1", [])
+        assert local_store.find_board_cursor("board-1") == "board-1"
+
+        local_store.add_card_movements("board-1", [
+            self.create_move("action-1", "card-1", "2023-08-01")])
+        local_store.add_card_movements("board-1", [])
+        assert local_store.find_board_cursor("board-1") == "action-1"
+
+    def test_card_cursor(self):
+        local_store = Local_store(":memory:")
+        assert local_store.find_card_cursor("card-1") is None
+        local_store.add_card_actions("card-1", [
+            self.create_move("action-2", "card-1", "2023-08-02"),
+            self.create_move("action-1", "card-1", "2023-08-01")])
+        local_store.add_card_actions("card-1", [])
+
+        assert local_store.find_card_cursor("card-1") == "action-2"
+        assert local_store.find_latest_movement(["card-1"])["id"] == \
+            "action-2"
+
+    def test_lookup_from_worker_thread(self):
+        local_store = Local_store(":memory:")
+        local_store.add_card_movements("board-1", [
+            self.create_move("action-1", "card-1", "2023-08-01")])
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(
+                local_store.find_latest_movement, ["card-1"]
+            ).result()["id"] == "action-1"
+
+    def test_index_movements_of_added_actions(self):
+        local_store = Local_store(":memory:")
+        local_store.add_actions([
+            create_action("action-1", "2023-08-01", "moveCardToBoard",
+                          {"card": {"id": "card-1"},
+                           "list": {"id": "list-1"}})])
+        assert local_store.find_latest_movement(["card-1"])["id"] == \
+            "action-1"
+
+
+class Test_Card_snapshots:
+    def test_mapping(self):
+        cards = Local_store(":memory:").cards
+        cards["card-2"] = {"id": "card-2"}
+        cards.update({"card-1": {"id": "card-1", "name": "One"}})
+        cards["card-2"] = {"id": "card-2", "name": "Two"}
+
+        assert len(cards) == 2
+        assert "card-1" in cards
+        assert list(cards) == ["card-1", "card-2"]
+        assert cards["card-2"] == {"id": "card-2", "name": "Two"}
+
+        del cards["card-1"]
+        assert "card-1" not in cards
+        with pytest.raises(KeyError):
+            cards["card-1"]
@@ -0,0 +1,84 @@
+import json
+from metadata_cache import Metadata_cache
+
+
+class Fake_clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def create_action(action_type, data):
+    return {"id": "action-id", "type": action_type, "data": data}
+
+
+class Test_Metadata_cache:
+    def test_empty_without_cache_file(self):
+        metadata_cache = Metadata_cache(None)
+        assert metadata_cache.entries == {"member_boards": None, "boards": {}}
+        metadata_cache.save()
+
+    def test_empty_when_cache_file_missing(self, fs):
+        metadata_cache = Metadata_cache("/metadata_cache.json")
+        assert metadata_cache.get_member_boards() is None
+        assert metadata_cache.get_lists("board-id") is None
+
+    def test_save_and_load(self, fs):
+        clock = Fake_clock(1000.0)
+        metadata_cache = Metadata_cache("/metadata_cache.json", 60, clock)
+        metadata_cache.set_member_boards([{"id": "board-id"}])
+        metadata_cache.set_lists("board-id", [{"id": "list-id"}])
+        metadata_cache.save()
+
+        assert json.load(open("/metadata_cache.json"))["boards"] == {
+            "board-id": {"fetched_at": 1000.0, "lists": [{"id": "list-id"}]}}
+
+        loaded_cache = Metadata_cache("/metadata_cache.json", 60, clock)
+        assert loaded_cache.get_member_boards() == [{"id": "board-id"}]
+        assert loaded_cache.get_lists("board-id") == [{"id": "list-id"}]
+
+    def test_expire_after_ttl(self):
+        clock = Fake_clock(1000.0)
+        metadata_cache = Metadata_cache(None, 60, clock)
+        metadata_cache.set_member_boards([{"id": "board-id"}])
+        metadata_cache.set_lists("board-id", [{"id": "list-id"}])
+
+        clock.now = 1059.0
+        assert metadata_cache.get_lists("board-id") == [{"id": "list-id"}]
+        clock.now = 1060.0
+        assert metadata_cache.get_member_boards() is None
+        assert metadata_cache.get_lists("board-id") is None
+
+    def test_lists_since(self):
+        metadata_cache = Metadata_cache(None, 60, Fake_clock(0.0))
+        metadata_cache.set_lists("board-id", [])
+        assert metadata_cache.lists_since("board-id") == \
+            "1970-01-01T00:00:00.000Z"
+
+    def test_invalidate_from_structural_actions(self):
+        metadata_cache = Metadata_cache(None, 60, Fake_clock(0.0))
+        metadata_cache.set_member_boards([])
+        for board_id in ["board-a", "board-b", "board-c", "board-d"]:
+            metadata_cache.set_lists(board_id, [])
+
+        assert metadata_cache.invalidate_from_actions([
+            create_action("updateCard", {"board": {"id": "board-d"}}),
+            create_action("createList", {"board": {"id": "board-a"}}),
+            create_action("moveListToBoard", {
+                "board": {"id": "board-b"},
+                "boardSource": {"id": "board-c"}})]) == \
+            {"board-a", "board-b", "board-c"}
+
+        assert list(metadata_cache.entries["boards"].keys()) == ["board-d"]
+        assert metadata_cache.get_member_boards() == []
+
+    def test_invalidate_member_boards_on_update_board(self):
+        metadata_cache = Metadata_cache(None, 60, Fake_clock(0.0))
+        metadata_cache.set_member_boards([])
+
+        metadata_cache.invalidate_from_actions([
+            create_action("updateBoard", {"board": {"id": "board-a"}})])
+
+        assert metadata_cache.get_member_boards() is None
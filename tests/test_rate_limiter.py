@@ -0,0 +1,118 @@
+from rate_limiter import Token_bucket, Rate_limiter, parse_retry_after
+
+
+class Fake_clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def create_response(mocker, status_code=200, headers=None):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = headers if headers else {}
+    return response
+
+
+class Test_Token_bucket:
+    def test_full_bucket_has_no_wait(self):
+        bucket = Token_bucket(10, 10.0, 0.0)
+        assert bucket.wait_time(0.0) == 0
+
+    def test_empty_bucket_waits_for_one_token(self):
+        bucket = Token_bucket(10, 10.0, 0.0)
+        for _ in range(10):
+            bucket.take()
+        assert bucket.wait_time(0.0) == 1.0
+        assert bucket.wait_time(0.5) == 0.5
+        assert bucket.wait_time(1.0) == 0
+
+    def test_refill_does_not_exceed_capacity(self):
+        bucket = Token_bucket(10, 10.0, 0.0)
+        bucket.refill(100.0)
+        assert bucket.tokens == 10
+
+    def test_blocked_bucket_waits_until_unblocked(self):
+        bucket = Token_bucket(10, 10.0, 0.0)
+        bucket.block_until(5.0)
+        assert bucket.wait_time(1.0) == 4.0
+
+
+class Test_Rate_limiter:
+    def test_acquire_without_waiting_within_budget(self):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(
+            api_key_limit=300, token_limit=100, interval=10.0,
+            clock=clock, sleep=clock.sleep)
+        for _ in range(100):
+            rate_limiter.acquire("key", "token")
+        assert clock.sleeps == []
+
+    def test_acquire_waits_once_token_budget_is_spent(self):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(
+            api_key_limit=300, token_limit=100, interval=10.0,
+            clock=clock, sleep=clock.sleep)
+        for _ in range(101):
+            rate_limiter.acquire("key", "token")
+        assert clock.sleeps == [0.1]
+
+    def test_separate_budget_per_token(self):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(
+            api_key_limit=300, token_limit=1, interval=10.0,
+            clock=clock, sleep=clock.sleep)
+        rate_limiter.acquire("key", "token-one")
+        rate_limiter.acquire("key", "token-two")
+        assert clock.sleeps == []
+
+    def test_shared_budget_per_api_key(self):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(
+            api_key_limit=1, token_limit=100, interval=10.0,
+            clock=clock, sleep=clock.sleep)
+        rate_limiter.acquire("key", "token-one")
+        rate_limiter.acquire("key", "token-two")
+        assert clock.sleeps == [10.0]
+
+    def test_remaining_header_limits_budget(self, mocker):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(
+            api_key_limit=300, token_limit=100, interval=10.0,
+            clock=clock, sleep=clock.sleep)
+        rate_limiter.acquire("key", "token")
+        rate_limiter.update_from_response(
+            "key", "token", create_response(mocker, headers={
+                "x-rate-limit-api-token-max": "100",
+                "x-rate-limit-api-token-interval-ms": "10000",
+                "x-rate-limit-api-token-remaining": "0"}))
+        rate_limiter.acquire("key", "token")
+        assert clock.sleeps == [0.1]
+
+    def test_retry_after_blocks_all_requests(self, mocker):
+        clock = Fake_clock()
+        rate_limiter = Rate_limiter(clock=clock, sleep=clock.sleep)
+        rate_limiter.acquire("key", "token")
+        rate_limiter.update_from_response(
+            "key", "token",
+            create_response(mocker, 429, {"Retry-After": "3"}))
+        rate_limiter.acquire("key", "token")
+        assert clock.sleeps[0] == 3.0
+
+
+class Test_parse_retry_after:
+    def test_seconds(self):
+        assert parse_retry_after("2", 10.0) == 2.0
+
+    def test_missing(self):
+        assert parse_retry_after(None, 10.0) == 10.0
+
+    def test_invalid(self):
+        assert parse_retry_after("soon", 10.0) == 10.0
@@ -0,0 +1,40 @@
+from refresh_policy import Refresh_policy
+
+
+def create_action(action_type, data=None):
+    return {"type": action_type, "data": data if data is not None else {}}
+
+
+class Test_Refresh_policy:
+    def test_update_card_uses_old_keys(self):
+        refresh_policy = Refresh_policy(["name", "idList"])
+        assert refresh_policy.is_relevant(create_action(
+            "updateCard", {"old": {"name": "One"}}))
+        assert refresh_policy.is_relevant(create_action(
+            "updateCard", {"old": {"pos": 1}, "listAfter": {"id": "list"}}))
+        assert not refresh_policy.is_relevant(create_action(
+            "updateCard", {"old": {"pos": 1}}))
+
+    def test_action_type_fields(self):
+        refresh_policy = Refresh_policy(["idMembers"])
+        assert refresh_policy.is_relevant(create_action("addMemberToCard"))
+        assert not refresh_policy.is_relevant(create_action("commentCard"))
+        assert refresh_policy.is_relevant(create_action("copyCard"))
+        assert refresh_policy.is_relevant(create_action("unknownAction"))
+
+    def test_track_all_fields(self):
+        assert Refresh_policy(["*"]).is_relevant(create_action("commentCard"))
+
+    def test_override_action_fields(self):
+        refresh_policy = Refresh_policy(
+            ["badges"], {"commentCard": ["dateLastActivity"]})
+        assert not refresh_policy.is_relevant(create_action("commentCard"))
+        assert refresh_policy.is_relevant(
+            create_action("updateCheckItemStateOnCard"))
+
+    def test_default_tracked_fields(self):
+        refresh_policy = Refresh_policy()
+        assert not refresh_policy.is_relevant(
+            create_action("addChecklistToCard"))
+        assert refresh_policy.is_relevant(create_action(
+            "updateCard", {"old": {"desc": ""}}))
@@ -1,6 +1,7 @@
 import pytest
 import os
 import json
+import trello
 from sync_cards import \
     perform_sync_cards, \
     load_card_sync_lookup, \
@@ -14,7 +15,13 @@ from sync_cards import \
     get_card_status, \
     sync_one_card, \
     sync_all_cards, \
-    update_card_status
+    update_card_status, \
+    get_cards, \
+    status_from_board_index, \
+    compile_status_tables, \
+    ingest_card_movements
+from local_store import Local_store
+from trello_helper import Board_registry
 
 
 class Test_perform_sync_cards:
@@ -23,7 +30,10 @@ class Test_perform_sync_cards:
         updated_card_sync_lookup = {}
         mocked_config = mocker.Mock()
         context = {
-            "card_sync_lookup": None}
+            "card_sync_lookup": None,
+            "board_lookup": "board_lookup"}
+        mocked_compile_status_tables = mocker.patch(
+            "sync_cards.compile_status_tables", return_value="status_tables")
 
         mocked_load_card_sync_lookup = mocker.patch(
             "sync_cards.load_card_sync_lookup",
@@ -44,6 +54,9 @@ class Test_perform_sync_cards:
 
         mocked_load_card_sync_lookup.assert_called_once_with(
             mocked_config)
+        mocked_compile_status_tables.assert_called_once_with(
+            mocked_config, "board_lookup")
+        assert context["status_tables"] == "status_tables"
 
         mocked_add_new_sync_cards.assert_called_once_with(
             context,
@@ -151,6 +164,8 @@ class Test_add_new_sync_cards:
             }}
 
         context = {
+            "handle": "handle",
+            "card_index": {},
             "card_sync_lookup": {
                 "source": {},
                 "placeholder": {}
@@ -162,15 +177,16 @@ class Test_add_new_sync_cards:
         }
 
         source_list_on_trello = mocker.Mock()
-        source_list_on_trello.list_cards.return_value = []
 
         destination_list_on_trello = mocker.Mock()
-        destination_list_on_trello.list_cards.return_value = []
 
         mocked_find_list = mocker.patch(
             "sync_cards.find_list")
         mocked_find_list.side_effect = [
             source_list_on_trello, destination_list_on_trello]
+        mocked_list_cards_from_index = mocker.patch(
+            "sync_cards.list_cards_from_index",
+            return_value=[])
         mocked_find_new_cards = mocker.patch(
             "sync_cards.find_new_cards",
             return_value=[]
@@ -188,9 +204,10 @@ class Test_add_new_sync_cards:
                 destination_board["name"],
                 mocked_config.root["tasks"]["card_sync"]["destination_board"]["list_names"]["todo"])
         ])
+        mocked_list_cards_from_index.assert_called_once_with(
+            "handle", context["card_index"], source_list_on_trello.id)
         mocked_find_new_cards.assert_called_once_with(
-            context["card_sync_lookup"],
-            source_list_on_trello.list_cards())
+            context["card_sync_lookup"], [])
 
     def test_find_single_source_board_with_two_cards(self, mocker):
         source_boards = json.loads(json.dumps([{
@@ -220,6 +237,8 @@ class Test_add_new_sync_cards:
             }}
 
         context = {
+            "handle": "handle",
+            "card_index": {},
             "card_sync_lookup": {
                 "source": {},
                 "placeholder": {}
@@ -241,16 +260,16 @@ class Test_add_new_sync_cards:
         mocked_placeholder_card_b.id = "p456"
 
         destination_list_on_trello = mocker.Mock()
-        destination_list_on_trello.list_cards.return_value = []
 
         source_list_on_trello = mocker.Mock()
-        source_list_on_trello.list_cards.return_value = [
-            mocked_card_a, mocked_card_b]
 
         mocked_find_list = mocker.patch(
             "sync_cards.find_list")
         mocked_find_list.side_effect = [
             source_list_on_trello, destination_list_on_trello]
+        mocked_list_cards_from_index = mocker.patch(
+            "sync_cards.list_cards_from_index",
+            return_value=[mocked_card_a, mocked_card_b])
         mocked_find_new_cards = mocker.patch(
             "sync_cards.find_new_cards",
             return_value=[mocked_card_a, mocked_card_b]
@@ -279,9 +298,11 @@ class Test_add_new_sync_cards:
                 destination_board["name"],
                 mocked_config.root["tasks"]["card_sync"]["destination_board"]["list_names"]["todo"])
         ])
+        mocked_list_cards_from_index.assert_called_once_with(
+            "handle", context["card_index"], source_list_on_trello.id)
         mocked_find_new_cards.assert_called_once_with(
             context["card_sync_lookup"],
-            source_list_on_trello.list_cards())
+            [mocked_card_a, mocked_card_b])
         mocked_create_placeholder_card.assert_has_calls([
             mocker.call(mocked_card_a, destination_list_on_trello),
             mocker.call(mocked_card_b, destination_list_on_trello)])
@@ -323,6 +344,8 @@ class Test_add_new_sync_cards:
             }}
 
         context = {
+            "handle": "handle",
+            "card_index": {},
             "card_sync_lookup": {
                 "source": {},
                 "placeholder": {}
@@ -345,22 +368,18 @@ class Test_add_new_sync_cards:
         mocked_placeholder_card_b.id = "p456"
 
         destination_list_on_trello = mocker.Mock()
-        destination_list_on_trello.list_cards.return_value = []
 
         source_list_a_on_trello = mocker.Mock()
-        source_list_a_on_trello.list_cards.side_effect = [
-            [mocked_card_a]
-        ]
 
         source_list_b_on_trello = mocker.Mock()
-        source_list_b_on_trello.list_cards.side_effect = [
-            [mocked_card_b]
-        ]
 
         mocked_find_list = mocker.patch(
             "sync_cards.find_list")
         mocked_find_list.side_effect = [
             source_list_a_on_trello, source_list_b_on_trello, destination_list_on_trello]
+        mocked_list_cards_from_index = mocker.patch(
+            "sync_cards.list_cards_from_index",
+            side_effect=[[mocked_card_a], [mocked_card_b]])
         mocked_find_new_cards = mocker.patch(
             "sync_cards.find_new_cards",
             return_value=[mocked_card_a, mocked_card_b]
@@ -393,6 +412,9 @@ class Test_add_new_sync_cards:
                 destination_board["name"],
                 mocked_config.root["tasks"]["card_sync"]["destination_board"]["list_names"]["todo"])
         ])
+        mocked_list_cards_from_index.assert_has_calls([
+            mocker.call("handle", context["card_index"], source_list_a_on_trello.id),
+            mocker.call("handle", context["card_index"], source_list_b_on_trello.id)])
         mocked_find_new_cards.assert_called_once_with(
             context["card_sync_lookup"],
             [mocked_card_a, mocked_card_b])
@@ -400,6 +422,46 @@ class Test_add_new_sync_cards:
             mocker.call(mocked_card_a, destination_list_on_trello),
             mocker.call(mocked_card_b, destination_list_on_trello)])
 
+    def test_index_new_placeholder_for_status_from_board_index(
+            self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.root = {"tasks": {"card_sync": {
+            "status_from_board_index": True,
+            "source_boards": [{"name": "board_a", "list_names": {
+                "todo": "todo_list_name"}}],
+            "destination_board": {"name": "board_c", "list_names": {
+                "todo": "todo_list_name"}}}}}
+        source_card = mocker.Mock()
+        source_card.id = "src1"
+        placeholder_card = mocker.Mock()
+        placeholder_card.id = "ph1"
+        placeholder_card._json_obj = {
+            "id": "ph1", "idList": "list-c", "idBoard": "board-c-id",
+            "name": "Card", "shortUrl": "url", "desc": "",
+            "dateLastActivity": "2023-08-02T00:00:00.000Z"}
+        context = {
+            "handle": mocker.Mock(),
+            "card_index": {"src1": {"id": "src1", "idList": "list-a"}},
+            "card_sync_lookup": {"source": {}, "placeholder": {}},
+            "board_lookup": {"board_a": None, "board_c": None}
+        }
+        mocker.patch("sync_cards.find_list")
+        mocker.patch("sync_cards.list_cards_from_index",
+                     return_value=[source_card])
+        mocker.patch("sync_cards.create_placeholder_card",
+                     return_value=placeholder_card)
+        mocker.patch("sync_cards.get_card_status", return_value="todo")
+        mocker.patch("sync_cards.find_latest_card_movement")
+
+        add_new_sync_cards(context, mocked_config)
+
+        assert context["card_index"]["ph1"] == {
+            "id": "ph1", "idList": "list-c", "idBoard": "board-c-id",
+            "name": "Card", "shortUrl": "url",
+            "dateLastActivity": "2023-08-02T00:00:00.000Z"}
+        assert sync_one_card(context, mocked_config, "src1", "ph1") is None
+        context["handle"].fetch_json.assert_not_called()
+
 
 class Test_find_new_cards:
     def test_no_cards_on_list(self, mocker):
@@ -518,7 +580,116 @@ class Test_sync_one_card:
     pass
 
 
+class Test_ingest_card_movements:
+    def test_ingest_history_then_since_cursor(self, mocker):
+        destination_board = mocker.Mock()
+        destination_board.id = "board-c-id"
+        destination_board.name = "board_c"
+        source_board = mocker.Mock()
+        source_board.id = "board-a-id"
+        source_board.name = "board_a"
+        local_store = Local_store(":memory:")
+        local_store.add_card_movements("board-a-id", [{"id": "action-1"}])
+        context = {
+            "board_lookup": {"board_c": destination_board,
+                             "board_a": source_board},
+            "local_store": local_store
+        }
+        mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 2
+        mocked_config.root = {"tasks": {"card_sync": {
+            "destination_board": {"name": "board_c"},
+            "source_boards": [{"name": "board_a"}]}}}
+        move = {"id": "action-2", "type": "updateCard",
+                "date": "2023-08-02T00:00:00.000Z",
+                "memberCreator": {"username": "user"},
+                "data": {"card": {"id": "card-1"},
+                         "listAfter": {"id": "list-1"}}}
+        mocked_fetch_actions_window = mocker.patch(
+            "sync_cards.fetch_actions_window", return_value=[])
+        mocked_fetch_actions_since = mocker.patch(
+            "sync_cards.fetch_actions_since", return_value=[move])
+
+        ingest_card_movements(context, mocked_config)
+
+        mocked_fetch_actions_window.assert_called_once_with(
+            destination_board.client, "board-c-id",
+            "moveCardFromBoard,moveCardToBoard,updateCard", None, None)
+        mocked_fetch_actions_since.assert_called_once_with(
+            source_board.client, "board-a-id",
+            "moveCardFromBoard,moveCardToBoard,updateCard", "action-1")
+        assert local_store.find_latest_movement(["card-1"]) == move
+        assert local_store.find_board_cursor("board-a-id") == "action-2"
+
+    def test_skip_without_local_store(self, mocker):
+        mocked_fetch_actions_window = mocker.patch(
+            "sync_cards.fetch_actions_window")
+        ingest_card_movements({}, mocker.Mock())
+        mocked_fetch_actions_window.assert_not_called()
+
+
 class Test_find_latest_card_movement:
+    def test_use_local_movement_index(self, mocker):
+        local_store = mocker.Mock()
+        local_store.find_latest_movement.return_value = {
+            "id": "action-1", "memberCreator": {"username": "user"}}
+        source_card = mocker.Mock()
+        source_card.id = "source-id"
+        placeholder_card = mocker.Mock()
+        placeholder_card.id = "placeholder-id"
+        mocked_config = mocker.Mock()
+        mocked_config.automation_username = "automation"
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched")
+
+        assert find_latest_card_movement(
+            mocked_config, source_card, placeholder_card, local_store) == \
+            {"id": "action-1", "memberCreator": {"username": "user"}}
+
+        local_store.find_latest_movement.assert_called_once_with(
+            ["source-id", "placeholder-id"])
+        mocked_fetch_card_actions_batched.assert_not_called()
+
+    def test_refresh_cards_outside_ingested_boards(self, mocker):
+        local_store = Local_store(":memory:")
+        local_store.add_card_movements("board-a-id", [{"id": "action-0"}])
+        local_store.add_card_actions("placeholder-id", [{"id": "action-1"}])
+        source_card = mocker.Mock()
+        source_card.id = "source-id"
+        source_card.board_id = "board-a-id"
+        placeholder_card = mocker.Mock()
+        placeholder_card.id = "placeholder-id"
+        placeholder_card.board_id = "board-c-id"
+        mocked_config = mocker.Mock()
+        mocked_config.automation_username = "automation"
+        move = {"id": "action-2", "type": "updateCard",
+                "date": "2023-08-02T00:00:00.000Z",
+                "memberCreator": {"username": "user"},
+                "data": {"card": {"id": "placeholder-id"},
+                         "listAfter": {"id": "list-1"}}}
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched", return_value=[[move]])
+
+        assert find_latest_card_movement(
+            mocked_config, source_card, placeholder_card, local_store) == \
+            move
+
+        mocked_fetch_card_actions_batched.assert_called_once_with(
+            placeholder_card.client, ["placeholder-id"],
+            "moveCardFromBoard,moveCardToBoard,updateCard",
+            since_ids=["action-1"])
+        assert local_store.find_card_cursor("placeholder-id") == "action-2"
+
+    def test_ignore_local_movement_by_automation(self, mocker):
+        local_store = mocker.Mock()
+        local_store.find_latest_movement.return_value = {
+            "id": "action-1", "memberCreator": {"username": "automation"}}
+        mocked_config = mocker.Mock()
+        mocked_config.automation_username = "automation"
+
+        assert find_latest_card_movement(
+            mocked_config, mocker.Mock(), mocker.Mock(), local_store) is None
+
     def test_return_latest_only_move_from_source(self, mocker):
         action_actual_update = {
             "id": "224b90",
@@ -577,20 +748,26 @@ class Test_find_latest_card_movement:
 
         source_card = mocker.Mock()
         source_card.id.side_effect = "123"
-        source_card.fetch_actions.return_value = source_card_actions
 
         placeholder_card_actions = [
             action_older_update
         ]
         placeholder_card = mocker.Mock()
         placeholder_card.id.side_effect = "456"
-        placeholder_card.fetch_actions.return_value = placeholder_card_actions
 
         mocked_config = mocker.Mock()
         mocked_config.automation_username = "automation"
 
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched",
+            return_value=[source_card_actions, placeholder_card_actions])
+
         assert find_latest_card_movement(
             mocked_config, source_card, placeholder_card) == action_actual_update
+        mocked_fetch_card_actions_batched.assert_called_once_with(
+            source_card.client,
+            [source_card.id, placeholder_card.id],
+            "moveCardFromBoard,moveCardToBoard,updateCard")
 
     def test_return_latest_only_move_from_placeholder(self, mocker):
         action_older_update = {
@@ -649,7 +826,6 @@ class Test_find_latest_card_movement:
 
         source_card = mocker.Mock()
         source_card.id.side_effect = "123"
-        source_card.fetch_actions.return_value = source_card_actions
 
         placeholder_card_actions = [
             action_newer_update,
@@ -658,11 +834,14 @@ class Test_find_latest_card_movement:
 
         placeholder_card = mocker.Mock()
         placeholder_card.id.side_effect = "456"
-        placeholder_card.fetch_actions.return_value = placeholder_card_actions
 
         mocked_config = mocker.Mock()
         mocked_config.automation_username = "automation"
 
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched",
+            return_value=[source_card_actions, placeholder_card_actions])
+
         assert find_latest_card_movement(
             mocked_config, source_card, placeholder_card) == action_newer_update
 
@@ -671,17 +850,19 @@ class Test_find_latest_card_movement:
 
         source_card = mocker.Mock()
         source_card.id.side_effect = "123"
-        source_card.fetch_actions.return_value = source_card_actions
 
         placeholder_card_actions = []
 
         placeholder_card = mocker.Mock()
         placeholder_card.id.side_effect = "456"
-        placeholder_card.fetch_actions.return_value = placeholder_card_actions
 
         mocked_config = mocker.Mock()
         mocked_config.automation_username = "automation"
 
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched",
+            return_value=[source_card_actions, placeholder_card_actions])
+
         assert find_latest_card_movement(
             mocked_config, source_card, placeholder_card) == None
 
@@ -715,20 +896,142 @@ class Test_find_latest_card_movement:
 
         source_card = mocker.Mock()
         source_card.id.side_effect = "123"
-        source_card.fetch_actions.return_value = source_card_actions
 
         placeholder_card_actions = [action_belongs_to_automation]
 
         placeholder_card = mocker.Mock()
         placeholder_card.id.side_effect = "456"
-        placeholder_card.fetch_actions.return_value = placeholder_card_actions
 
         mocked_config = mocker.Mock()
         mocked_config.automation_username = "automation"
 
+        mocked_fetch_card_actions_batched = mocker.patch(
+            "sync_cards.fetch_card_actions_batched",
+            return_value=[source_card_actions, placeholder_card_actions])
+
         assert find_latest_card_movement(
             mocked_config, source_card, placeholder_card) == None
 
+    def test_raise_if_actions_cannot_be_retrieved(self, mocker):
+        source_card = mocker.Mock()
+        placeholder_card = mocker.Mock()
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': 404}))
+        mocker.patch(
+            "sync_cards.fetch_card_actions_batched",
+            return_value=[[], error])
+
+        with pytest.raises(trello.ResourceUnavailable):
+            find_latest_card_movement(
+                mocker.Mock(), source_card, placeholder_card)
+
+
+class Test_get_cards:
+    def test_create_cards_from_batch(self, mocker):
+        handle = mocker.Mock()
+        mocked_fetch_cards_batched = mocker.patch(
+            "sync_cards.fetch_cards_batched",
+            return_value=[{"id": "a"}, {"id": "b"}])
+        mocked_from_projection = mocker.patch(
+            "sync_cards.Projected_card.from_projection",
+            side_effect=["card-a", "card-b"])
+
+        assert get_cards(handle, ["a", "b"]) == ["card-a", "card-b"]
+
+        mocked_fetch_cards_batched.assert_called_once_with(
+            handle, ["a", "b"], query_params={
+                "fields": "id,idList,idBoard,name,shortUrl,dateLastActivity",
+                "attachments": "false",
+                "checklists": "none"})
+        mocked_from_projection.assert_has_calls([
+            mocker.call(handle, {"id": "a"}),
+            mocker.call(handle, {"id": "b"})])
+
+    def test_missing_card_is_none(self, mocker):
+        handle = mocker.Mock()
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': 404}))
+        mocker.patch(
+            "sync_cards.fetch_cards_batched",
+            return_value=[{"id": "a"}, error])
+        mocker.patch(
+            "sync_cards.Projected_card.from_projection",
+            return_value="card-a")
+
+        assert get_cards(handle, ["a", "b"]) == ["card-a", None]
+
+    def test_raise_on_other_errors(self, mocker):
+        handle = mocker.Mock()
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': 503}))
+        mocker.patch(
+            "sync_cards.fetch_cards_batched",
+            return_value=[error, error])
+
+        with pytest.raises(trello.ResourceUnavailable):
+            get_cards(handle, ["a", "b"])
+
+    def test_use_card_index_before_fetching(self, mocker):
+        handle = mocker.Mock()
+        card_index = {"a": {"id": "a"}}
+        mocked_fetch_cards_batched = mocker.patch(
+            "sync_cards.fetch_cards_batched",
+            return_value=[{"id": "b"}])
+        mocked_from_projection = mocker.patch(
+            "sync_cards.Projected_card.from_projection",
+            side_effect=["card-a", "card-b"])
+
+        assert get_cards(handle, ["a", "b"], card_index) == \
+            ["card-a", "card-b"]
+
+        assert mocked_fetch_cards_batched.call_args.args == (handle, ["b"])
+        mocked_from_projection.assert_has_calls([
+            mocker.call(handle, {"id": "a"}),
+            mocker.call(handle, {"id": "b"})])
+
+    def test_all_cards_in_index(self, mocker):
+        handle = mocker.Mock()
+        mocked_fetch_cards_batched = mocker.patch(
+            "sync_cards.fetch_cards_batched")
+        mocker.patch(
+            "sync_cards.Projected_card.from_projection",
+            side_effect=["card-a"])
+
+        assert get_cards(handle, ["a"], {"a": {"id": "a"}}) == ["card-a"]
+        mocked_fetch_cards_batched.assert_not_called()
+
+
+class Test_compile_status_tables:
+    def test_map_list_ids_and_board_statuses(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.root = {"tasks": {"card_sync": {
+            "destination_board": {"name": "board_c", "list_names": {
+                "todo": "Todo", "in_progress": "Doing", "done": "Done"}},
+            "source_boards": [{"name": "board_a", "list_names": {
+                "todo": "A Todo", "in_progress": "A Doing",
+                "done": "A Done"}}]}}}
+        lists = {}
+        board_lookup = Board_registry(mocker.Mock(), {})
+        for board_name, list_name in [
+                ("board_c", "Todo"), ("board_c", "Done"),
+                ("board_c", "Backlog"), ("board_a", "A Doing")]:
+            list = mocker.Mock()
+            list.id = f"{board_name}-{list_name}"
+            list.name = list_name
+            lists[list.id] = list
+            board_lookup.add_list(board_name, list)
+
+        status_tables = compile_status_tables(mocked_config, board_lookup)
+
+        assert status_tables["list_id"] == {
+            "board_c-Todo": ("board_c", "todo"),
+            "board_c-Done": ("board_c", "done"),
+            "board_a-A Doing": ("board_a", "in_progress")}
+        assert status_tables["board_status"] == {
+            ("board_c", "todo"): lists["board_c-Todo"],
+            ("board_c", "done"): lists["board_c-Done"],
+            ("board_a", "in_progress"): lists["board_a-A Doing"]}
+
 
 class Test_get_card_status:
     @pytest.fixture
@@ -811,40 +1114,19 @@ class Test_get_card_status:
             unrelated_list.id = "unrelated_list_id"
             unrelated_list.name = "board_c_unrelated_list_name"
 
-            context = {
-                "board_lookup": {
-                    "board_a": source_board,
-                    "board_c": destination_board
-                },
-                "list_lookup": {
-                    "board_name": {
-                        "board_a": {
-                            source_todo_list.name: (source_todo_list, "board_a", source_todo_list.name),
-                            source_in_progress_list.name: (source_in_progress_list, "board_a", source_in_progress_list.name),
-                            source_done_list.name: (
-                                source_done_list, "board_a", source_done_list.name)
-                        },
-                        "board_c": {
-                            destination_todo_list.name: (destination_todo_list, "board_c", destination_todo_list.name),
-                            destination_in_progress_list.name: (destination_in_progress_list, "board_c", destination_in_progress_list.name),
-                            destination_done_list.name: (
-                                destination_done_list, "board_c", destination_done_list.name),
-                            unrelated_list.name: (
-                                unrelated_list, "board_c", unrelated_list.name)
-                        }
-                    },
-                    "list_id": {
-                        source_todo_list.id: (source_todo_list, "board_a", source_todo_list.name),
-                        source_in_progress_list.id: (source_in_progress_list, "board_a", source_in_progress_list.name),
-                        source_done_list.id: (source_done_list, "board_a", source_done_list.name),
-                        destination_todo_list.id: (destination_todo_list, "board_c", destination_todo_list.name),
-                        destination_in_progress_list.id: (destination_in_progress_list, "board_c", destination_in_progress_list.name),
-                        destination_done_list.id: (destination_done_list, "board_c", destination_done_list.name),
-                        unrelated_list.id: (
-                            unrelated_list, "board_c", unrelated_list.name)
-                    }
-                }
-            }
+            board_lookup = Board_registry(mocker.Mock(), {})
+            board_lookup["board_a"] = source_board
+            board_lookup["board_c"] = destination_board
+            board_lookup.load_board_lists("board_a", [
+                source_todo_list,
+                source_in_progress_list,
+                source_done_list])
+            board_lookup.load_board_lists("board_c", [
+                destination_todo_list,
+                destination_in_progress_list,
+                destination_done_list,
+                unrelated_list])
+            context = {"board_lookup": board_lookup}
             return context
         return _create_context
 
@@ -1003,36 +1285,18 @@ class Test_update_card_status:
             destination_done_list.id = "destination_done_list_id"
             destination_done_list.name = "board_c_done_list_name"
 
-            context = {
-                "board_lookup": {
-                    "board_a": source_board,
-                    "board_c": destination_board
-                },
-                "list_lookup": {
-                    "board_name": {
-                        "board_a": {
-                            source_todo_list.name: (source_todo_list, "board_a", source_todo_list.name),
-                            source_in_progress_list.name: (source_in_progress_list, "board_a", source_in_progress_list.name),
-                            source_done_list.name: (
-                                source_done_list, "board_a", source_done_list.name)
-                        },
-                        "board_c": {
-                            destination_todo_list.name: (destination_todo_list, "board_c", destination_todo_list.name),
-                            destination_in_progress_list.name: (destination_in_progress_list, "board_c", destination_in_progress_list.name),
-                            destination_done_list.name: (
-                                destination_done_list, "board_c", destination_done_list.name)
-                        }
-                    },
-                    "list_id": {
-                        source_todo_list.id: (source_todo_list, "board_a", source_todo_list.name),
-                        source_in_progress_list.id: (source_in_progress_list, "board_a", source_in_progress_list.name),
-                        source_done_list.id: (source_done_list, "board_a", source_done_list.name),
-                        destination_todo_list.id: (destination_todo_list, "board_c", destination_todo_list.name),
-                        destination_in_progress_list.id: (destination_in_progress_list, "board_c", destination_in_progress_list.name),
-                        destination_done_list.id: (destination_done_list, "board_c", destination_done_list.name),
-                    }
-                }
-            }
+            board_lookup = Board_registry(mocker.Mock(), {})
+            board_lookup["board_a"] = source_board
+            board_lookup["board_c"] = destination_board
+            board_lookup.load_board_lists("board_a", [
+                source_todo_list,
+                source_in_progress_list,
+                source_done_list])
+            board_lookup.load_board_lists("board_c", [
+                destination_todo_list,
+                destination_in_progress_list,
+                destination_done_list])
+            context = {"board_lookup": board_lookup}
             return context
         return _create_context
 
@@ -1169,6 +1433,11 @@ class Test_remove_card_sync:
 
 
 class Test_sync_one_card:
+    @pytest.fixture(autouse=True)
+    def fetch_cards_for_status(self, mocker):
+        return mocker.patch(
+            "sync_cards.status_from_board_index", return_value=False)
+
     @pytest.fixture
     def source_board(self, mocker):
         source_board = mocker.Mock()
@@ -1219,9 +1488,9 @@ class Test_sync_one_card:
         }
 
         mocked_handle = mocker.Mock()
-        mocked_handle.get_card.side_effect = [
-            source_card, placeholder_card
-        ]
+        mocked_get_cards = mocker.patch(
+            "sync_cards.get_cards",
+            return_value=[source_card, placeholder_card])
 
         mocked_get_card_status = mocker.patch(
             "sync_cards.get_card_status", side_effect=["todo", "todo"]
@@ -1232,7 +1501,8 @@ class Test_sync_one_card:
         )
 
         mocked_context = {
-            "handle": mocked_handle
+            "handle": mocked_handle,
+            "card_index": "card_index"
         }
 
         mocked_config = mocker.Mock()
@@ -1240,10 +1510,9 @@ class Test_sync_one_card:
         assert sync_one_card(mocked_context, mocked_config,
                              source_card.id, placeholder_card.id) == None
 
-        mocked_handle.get_card.assert_has_calls([
-            mocker.call(source_card.id),
-            mocker.call(placeholder_card.id)
-        ])
+        mocked_get_cards.assert_called_once_with(
+            mocked_handle, [source_card.id, placeholder_card.id],
+            "card_index")
 
         mocked_get_card_status.assert_has_calls([
             mocker.call(mocked_context, mocked_config, source_card),
@@ -1251,7 +1520,7 @@ class Test_sync_one_card:
         ])
 
         mocked_find_latest_card_movement.assert_called_with(
-            mocked_config, source_card, placeholder_card
+            mocked_config, source_card, placeholder_card, None
         )
 
     def test_returns_job_when_status_is_different_and_last_move_was_source(self, mocker,
@@ -1281,9 +1550,9 @@ class Test_sync_one_card:
         }
 
         mocked_handle = mocker.Mock()
-        mocked_handle.get_card.side_effect = [
-            source_card, placeholder_card
-        ]
+        mocked_get_cards = mocker.patch(
+            "sync_cards.get_cards",
+            return_value=[source_card, placeholder_card])
 
         mocked_get_card_status = mocker.patch(
             "sync_cards.get_card_status", side_effect=["todo", "in_progress"]
@@ -1294,7 +1563,8 @@ class Test_sync_one_card:
         )
 
         mocked_context = {
-            "handle": mocked_handle
+            "handle": mocked_handle,
+            "card_index": "card_index"
         }
 
         mocked_config = mocker.Mock()
@@ -1302,10 +1572,9 @@ class Test_sync_one_card:
         assert sync_one_card(mocked_context, mocked_config, source_card.id,
                              placeholder_card.id) == (placeholder_card, "todo")
 
-        mocked_handle.get_card.assert_has_calls([
-            mocker.call(source_card.id),
-            mocker.call(placeholder_card.id)
-        ])
+        mocked_get_cards.assert_called_once_with(
+            mocked_handle, [source_card.id, placeholder_card.id],
+            "card_index")
 
         mocked_get_card_status.assert_has_calls([
             mocker.call(mocked_context, mocked_config, source_card),
@@ -1313,7 +1582,7 @@ class Test_sync_one_card:
         ])
 
         mocked_find_latest_card_movement.assert_called_with(
-            mocked_config, source_card, placeholder_card
+            mocked_config, source_card, placeholder_card, None
         )
 
     def test_returns_job_when_status_is_different_and_last_move_was_placeholder(self, mocker,
@@ -1343,9 +1612,9 @@ class Test_sync_one_card:
         }
 
         mocked_handle = mocker.Mock()
-        mocked_handle.get_card.side_effect = [
-            source_card, placeholder_card
-        ]
+        mocked_get_cards = mocker.patch(
+            "sync_cards.get_cards",
+            return_value=[source_card, placeholder_card])
 
         mocked_get_card_status = mocker.patch(
             "sync_cards.get_card_status", side_effect=["todo", "in_progress"]
@@ -1356,7 +1625,8 @@ class Test_sync_one_card:
         )
 
         mocked_context = {
-            "handle": mocked_handle
+            "handle": mocked_handle,
+            "card_index": "card_index"
         }
 
         mocked_config = mocker.Mock()
@@ -1364,10 +1634,9 @@ class Test_sync_one_card:
         assert sync_one_card(mocked_context, mocked_config, source_card.id,
                              placeholder_card.id) == (source_card, "in_progress")
 
-        mocked_handle.get_card.assert_has_calls([
-            mocker.call(source_card.id),
-            mocker.call(placeholder_card.id)
-        ])
+        mocked_get_cards.assert_called_once_with(
+            mocked_handle, [source_card.id, placeholder_card.id],
+            "card_index")
 
         mocked_get_card_status.assert_has_calls([
             mocker.call(mocked_context, mocked_config, source_card),
@@ -1375,7 +1644,7 @@ class Test_sync_one_card:
         ])
 
         mocked_find_latest_card_movement.assert_called_with(
-            mocked_config, source_card, placeholder_card
+            mocked_config, source_card, placeholder_card, None
         )
 
     def test_throw_exception_if_movement_not_found(self, mocker,
@@ -1388,9 +1657,9 @@ class Test_sync_one_card:
         latest_card_movement = None
 
         mocked_handle = mocker.Mock()
-        mocked_handle.get_card.side_effect = [
-            source_card, placeholder_card
-        ]
+        mocked_get_cards = mocker.patch(
+            "sync_cards.get_cards",
+            return_value=[source_card, placeholder_card])
 
         mocked_get_card_status = mocker.patch(
             "sync_cards.get_card_status", side_effect=["todo", "in_progress"]
@@ -1401,7 +1670,8 @@ class Test_sync_one_card:
         )
 
         mocked_context = {
-            "handle": mocked_handle
+            "handle": mocked_handle,
+            "card_index": "card_index"
         }
 
         mocked_config = mocker.Mock()
@@ -1412,10 +1682,9 @@ class Test_sync_one_card:
 
         assert str(excinfo.value) == "Movement action not found!"
 
-        mocked_handle.get_card.assert_has_calls([
-            mocker.call(source_card.id),
-            mocker.call(placeholder_card.id)
-        ])
+        mocked_get_cards.assert_called_once_with(
+            mocked_handle, [source_card.id, placeholder_card.id],
+            "card_index")
 
         mocked_get_card_status.assert_has_calls([
             mocker.call(mocked_context, mocked_config, source_card),
@@ -1423,9 +1692,58 @@ class Test_sync_one_card:
         ])
 
         mocked_find_latest_card_movement.assert_called_with(
-            mocked_config, source_card, placeholder_card
+            mocked_config, source_card, placeholder_card, None
         )
 
+    def test_returns_not_found_job_if_card_is_missing(self, mocker):
+        mocked_handle = mocker.Mock()
+        source_card = mocker.Mock()
+        mocker.patch(
+            "sync_cards.get_cards",
+            return_value=[source_card, None])
+        mocked_create_card_stub = mocker.patch(
+            "sync_cards.create_card_stub", return_value="card-stub")
+        mocked_find_latest_card_movement = mocker.patch(
+            "sync_cards.find_latest_card_movement")
+
+        assert sync_one_card({"handle": mocked_handle, "card_index": {}}, mocker.Mock(),
+                             "source-id", "placeholder-id") == \
+            ("card-stub", "not_found")
+
+        mocked_create_card_stub.assert_called_once_with(
+            mocked_handle, "source-id")
+        mocked_find_latest_card_movement.assert_not_called()
+
+    def test_unlink_card_missing_from_board_index(
+            self, mocker, fetch_cards_for_status):
+        fetch_cards_for_status.return_value = True
+        mocked_handle = mocker.Mock()
+        mocked_get_cards = mocker.patch("sync_cards.get_cards")
+        mocker.patch(
+            "sync_cards.create_card_stub", return_value="card-stub")
+
+        assert sync_one_card(
+            {"handle": mocked_handle,
+             "card_index": {"source-id": {"idList": "list-id"}}},
+            mocker.Mock(), "source-id", "placeholder-id") == \
+            ("card-stub", "not_found")
+
+        mocked_get_cards.assert_not_called()
+        mocked_handle.fetch_json.assert_not_called()
+
+
+class Test_status_from_board_index:
+    def test_default_to_fetching_cards(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.root = {"tasks": {"card_sync": {}}}
+        assert status_from_board_index(mocked_config) is False
+
+    def test_enabled_in_config(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.root = {"tasks": {"card_sync": {
+            "status_from_board_index": True}}}
+        assert status_from_board_index(mocked_config) is True
+
 
 class Test_sync_all_cards:
     def test_processing_jobs(self, mocker):
@@ -1455,10 +1773,13 @@ class Test_sync_all_cards:
         }
 
         mocked_context = {
-            "card_sync_lookup": card_sync_lookup
+            "card_sync_lookup": card_sync_lookup,
+            "card_index": {}
         }
 
         mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 1
+        mocked_config.root = {"tasks": {"card_sync": {}}}
 
         card1 = mocker.Mock()
         card1.name = "card1"
@@ -1495,3 +1816,108 @@ class Test_sync_all_cards:
         ])
 
         mocked_remove_card_sync.assert_called_with(mocked_context, card3)
+
+    def test_evaluate_pairs_concurrently_in_lookup_order(self, mocker):
+        card_sync_lookup = {
+            "source": {f"source-{index}": {"placeholder": f"placeholder-{index}"}
+                       for index in range(20)},
+            "placeholder": {}
+        }
+        mocked_context = {"card_sync_lookup": card_sync_lookup,
+                          "card_index": {}}
+        mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 4
+        mocked_config.root = {"tasks": {"card_sync": {}}}
+        cards = {f"source-{index}": mocker.Mock() for index in range(20)}
+
+        def sync_one_card(context, config, source_card_id,
+                          placeholder_card_id):
+            if source_card_id.endswith("5"):
+                return None
+            return (cards[source_card_id], "done")
+
+        mocker.patch("sync_cards.sync_one_card", side_effect=sync_one_card)
+        mocked_update_card_status = mocker.patch(
+            "sync_cards.update_card_status")
+
+        sync_all_cards(mocked_context, mocked_config)
+
+        assert mocked_update_card_status.call_args_list == [
+            mocker.call(mocked_context, mocked_config,
+                        cards[f"source-{index}"], "done")
+            for index in range(20) if index not in [5, 15]]
+
+    def test_skip_unchanged_pairs_until_full_sync_is_due(self, mocker):
+        card_sync_lookup = {
+            "source": {
+                "source-1": {"placeholder": "placeholder-1",
+                             "activity": ["2023-08-01", "2023-08-01"]},
+                "source-2": {"placeholder": "placeholder-2",
+                             "activity": ["2023-08-01", "2023-08-01"]},
+                "source-3": {"placeholder": "placeholder-3"}
+            },
+            "placeholder": {},
+            "last_full_sync": 1000.0
+        }
+        mocked_context = {
+            "card_sync_lookup": card_sync_lookup,
+            "card_index": {
+                "source-1": {"dateLastActivity": "2023-08-01"},
+                "placeholder-1": {"dateLastActivity": "2023-08-01"},
+                "source-2": {"dateLastActivity": "2023-08-01"},
+                "placeholder-2": {"dateLastActivity": "2023-08-02"},
+                "source-3": {"dateLastActivity": "2023-08-01"},
+                "placeholder-3": {"dateLastActivity": "2023-08-01"}
+            }
+        }
+        mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 1
+        mocked_config.root = {"tasks": {"card_sync": {
+            "full_sync_interval": 3600}}}
+        mocker.patch("sync_cards.time.time", return_value=2000.0)
+        mocked_sync_one_card = mocker.patch(
+            "sync_cards.sync_one_card", return_value=None)
+
+        sync_all_cards(mocked_context, mocked_config)
+
+        assert mocked_sync_one_card.call_args_list == [
+            mocker.call(mocked_context, mocked_config,
+                        "source-2", "placeholder-2"),
+            mocker.call(mocked_context, mocked_config,
+                        "source-3", "placeholder-3")]
+        assert card_sync_lookup["source"]["source-2"]["activity"] == \
+            ["2023-08-01", "2023-08-02"]
+        assert card_sync_lookup["source"]["source-3"]["activity"] == \
+            ["2023-08-01", "2023-08-01"]
+        assert card_sync_lookup["last_full_sync"] == 1000.0
+
+        mocker.patch("sync_cards.time.time", return_value=5000.0)
+        mocked_sync_one_card.reset_mock()
+
+        sync_all_cards(mocked_context, mocked_config)
+
+        assert mocked_sync_one_card.call_count == 3
+        assert card_sync_lookup["last_full_sync"] == 5000.0
+
+    def test_keep_watermark_of_pairs_with_jobs(self, mocker):
+        card_sync_lookup = {
+            "source": {"source-1": {"placeholder": "placeholder-1"}},
+            "placeholder": {}
+        }
+        mocked_context = {
+            "card_sync_lookup": card_sync_lookup,
+            "card_index": {
+                "source-1": {"dateLastActivity": "2023-08-01"},
+                "placeholder-1": {"dateLastActivity": "2023-08-01"}
+            }
+        }
+        mocked_config = mocker.Mock()
+        mocked_config.fetch_concurrency = 1
+        mocked_config.root = {"tasks": {"card_sync": {}}}
+        mocker.patch("sync_cards.sync_one_card",
+                     return_value=(mocker.Mock(), "done"))
+        mocker.patch("sync_cards.update_card_status")
+
+        sync_all_cards(mocked_context, mocked_config)
+
+        assert "activity" not in card_sync_lookup["source"]["source-1"]
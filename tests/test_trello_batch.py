@@ -0,0 +1,157 @@
+import trello
+from trello_batch import \
+    create_route, \
+    split_batch_item, \
+    chunk, \
+    fetch_batch, \
+    fetch_routes_batched, \
+    fetch_cards_batched, \
+    fetch_card_actions_batched
+
+
+class Test_create_route:
+    def test_route_without_query(self):
+        assert create_route("/cards/abc") == "/cards/abc"
+
+    def test_route_with_escaped_query(self):
+        assert create_route("/cards/abc/actions", {
+            "filter": "updateCard,moveCardToBoard",
+            "limit": 50}) == \
+            "/cards/abc/actions?filter=updateCard%2CmoveCardToBoard&limit=50"
+
+
+class Test_split_batch_item:
+    def test_success(self):
+        assert split_batch_item("/cards/abc", {"200": {"id": "abc"}}) == \
+            {"id": "abc"}
+
+    def test_error_keyed_by_status(self):
+        result = split_batch_item("/cards/abc", {"404": "not found"})
+        assert isinstance(result, trello.ResourceUnavailable)
+        assert result._status == 404
+
+    def test_error_with_status_code(self):
+        result = split_batch_item("/cards/abc", {
+            "name": "NotFound", "message": "not found", "statusCode": 404})
+        assert isinstance(result, trello.ResourceUnavailable)
+        assert result._status == 404
+
+
+class Test_chunk:
+    def test_chunk_by_ten(self):
+        items = list(range(23))
+        assert chunk(items) == [
+            list(range(10)), list(range(10, 20)), [20, 21, 22]]
+
+    def test_empty(self):
+        assert chunk([]) == []
+
+
+class Test_fetch_batch:
+    def test_fetch_batch_splits_results(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [
+            {"200": {"id": "a"}}, {"404": "not found"}]
+
+        results = fetch_batch(handle, ["/cards/a", "/cards/b"])
+
+        handle.fetch_json.assert_called_once_with(
+            '/batch', query_params={'urls': '/cards/a,/cards/b'})
+        assert results[0] == {"id": "a"}
+        assert results[1]._status == 404
+
+    def test_failed_batch_fails_every_route(self, mocker):
+        handle = mocker.Mock()
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': 503}))
+        handle.fetch_json.side_effect = error
+
+        assert fetch_batch(handle, ["/cards/a", "/cards/b"]) == [error, error]
+
+
+class Test_fetch_routes_batched:
+    def test_single_batch(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [{"200": {"id": "a"}}]
+        on_result = mocker.Mock()
+
+        assert fetch_routes_batched(
+            handle, ["/cards/a"], on_result=on_result) == [{"id": "a"}]
+        on_result.assert_called_once_with(["/cards/a"], [{"id": "a"}])
+
+    def test_many_batches_in_order(self, mocker):
+        handle = mocker.Mock()
+        routes = ["/cards/" + str(index) for index in range(25)]
+
+        def fetch_json(uri_path, query_params):
+            return [{"200": {"route": route}}
+                    for route in query_params["urls"].split(",")]
+
+        handle.fetch_json.side_effect = fetch_json
+        on_result = mocker.Mock()
+
+        results = fetch_routes_batched(handle, routes, 3, on_result)
+
+        assert results == [{"route": route} for route in routes]
+        assert handle.fetch_json.call_count == 3
+        assert on_result.call_count == 3
+
+    def test_failed_batch_among_many(self, mocker):
+        handle = mocker.Mock()
+        routes = ["/cards/" + str(index) for index in range(11)]
+        error = trello.ResourceUnavailable(
+            "error message", type('obj', (object,), {'status_code': 503}))
+
+        def fetch_json(uri_path, query_params):
+            if query_params["urls"] == "/cards/10":
+                raise error
+            return [{"200": {}}] * 10
+
+        handle.fetch_json.side_effect = fetch_json
+
+        results = fetch_routes_batched(handle, routes, 2)
+
+        assert results == [{}] * 10 + [error]
+
+
+class Test_fetch_cards_batched:
+    def test_fetch_cards_with_query(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [
+            {"200": {"id": "a"}}, {"200": {"id": "b"}}]
+
+        assert fetch_cards_batched(
+            handle, ["a", "b"],
+            query_params={"customFieldItems": "true"}) == [
+            {"id": "a"}, {"id": "b"}]
+        handle.fetch_json.assert_called_once_with('/batch', query_params={
+            'urls': '/cards/a?customFieldItems=true,'
+                    '/cards/b?customFieldItems=true'})
+
+
+class Test_fetch_card_actions_batched:
+    def test_fetch_actions_of_cards(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [
+            {"200": [{"id": "action-a"}]}, {"200": []}]
+
+        assert fetch_card_actions_batched(
+            handle, ["a", "b"], "updateCard,moveCardToBoard") == [
+            [{"id": "action-a"}], []]
+        handle.fetch_json.assert_called_once_with('/batch', query_params={
+            'urls': '/cards/a/actions?filter=updateCard%2CmoveCardToBoard'
+                    '&limit=50,'
+                    '/cards/b/actions?filter=updateCard%2CmoveCardToBoard'
+                    '&limit=50'})
+
+    def test_fetch_actions_since_cursors(self, mocker):
+        handle = mocker.Mock()
+        handle.fetch_json.return_value = [{"200": []}, {"200": []}]
+
+        fetch_card_actions_batched(
+            handle, ["a", "b"], "updateCard", since_ids=["action-a", None])
+
+        handle.fetch_json.assert_called_once_with('/batch', query_params={
+            'urls': '/cards/a/actions?filter=updateCard&limit=50'
+                    '&since=action-a,'
+                    '/cards/b/actions?filter=updateCard&limit=50'})
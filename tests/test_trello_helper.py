@@ -1,4 +1,8 @@
-from trello_helper import get_card, get_card_actions, find_list, lookup_board_with_id
+import pytest
+import trello
+from trello_helper import get_card, get_card_actions, find_list, \
+    lookup_board_with_id, create_card_stub, Projected_card, \
+    card_projection_query, Board_lookup, Board_registry
 
 
 class Test_find_list:
@@ -13,12 +17,114 @@ class Test_find_list:
 
         board_one = mocker.Mock()
         board_name = "board-one-name"
-        board_lookup = {"board-one-name": board_one}
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup[board_name] = board_one
         board_one.get_lists.return_value = lists
 
         assert find_list(
             board_lookup, board_name, list_name) == list_two
 
+    def test_unknown_board(self, mocker):
+        assert find_list(
+            Board_registry(mocker.Mock(), {}), "board-one-name",
+            "list-name") is None
+
+    def test_find_list_from_registry(self, mocker):
+        board_registry, list_one = create_board_registry(mocker)
+        assert find_list(board_registry, "board_name", "list-name") == \
+            list_one
+        assert find_list(board_registry, "board_name", "other") is None
+        board_registry.handle.fetch_json.assert_not_called()
+
+    def test_cache_fetched_lists_in_registry(self, mocker):
+        board_registry = Board_registry(mocker.Mock(), {})
+        board_one = mocker.Mock()
+        list_one = mocker.Mock()
+        list_one.id = "list-id"
+        list_one.name = "list-name"
+        board_one.get_lists.return_value = [list_one]
+        board_registry["board_name"] = board_one
+
+        assert find_list(board_registry, "board_name", "list-name") == \
+            list_one
+        assert find_list(board_registry, "board_name", "other") is None
+        board_one.get_lists.assert_called_once_with("open")
+
+
+def create_board_registry(mocker):
+    list_one = mocker.Mock()
+    list_one.id = "list-id"
+    list_one.name = "list-name"
+    board_registry = Board_registry(mocker.Mock(), {
+        "board_name": {"id": "123", "name": "board_name",
+                       "closed": False, "url": "url"}})
+    board_registry.load_board_lists("board_name", [list_one])
+    return board_registry, list_one
+
+
+class Test_Board_lookup:
+    def test_resolve_board_once(self, mocker):
+        board_lookup = Board_lookup(mocker.Mock(), {
+            "board_name": {"id": "123", "name": "board_name",
+                           "closed": False, "url": "url"}})
+        assert list(board_lookup.keys()) == []
+
+        board = board_lookup.resolve("board_name")
+
+        assert board.id == "123"
+        assert list(board_lookup.keys()) == ["board_name"]
+        assert board_lookup.resolve("board_name") is board
+        assert board_lookup["board_name"] is board
+
+    def test_resolve_unknown_board(self, mocker):
+        with pytest.raises(KeyError):
+            Board_lookup(mocker.Mock(), {}).resolve("board_name")
+
+
+class Test_Board_registry:
+    def test_board_with_id(self, mocker):
+        board_registry, _ = create_board_registry(mocker)
+        assert board_registry.board_with_id("123").name == "board_name"
+        assert board_registry.board_with_id("456") is None
+
+    def test_index_added_board(self, mocker):
+        board_registry, _ = create_board_registry(mocker)
+        board_two = mocker.Mock()
+        board_two.id = "456"
+        board_registry["board_two"] = board_two
+        assert board_registry.board_with_id("456") == board_two
+
+    def test_find_list(self, mocker):
+        board_registry, list_one = create_board_registry(mocker)
+        assert board_registry.has_lists("board_name")
+        assert not board_registry.has_lists("board_two")
+        assert board_registry.find_list("board_name", "list-name") == \
+            list_one
+        assert board_registry.find_list("board_name", "other") is None
+        assert board_registry.list_entries() == [
+            (list_one, "board_name", "list-name")]
+
+    def test_add_list(self, mocker):
+        board_registry, _ = create_board_registry(mocker)
+        new_list = mocker.Mock()
+        new_list.id = "new-list-id"
+        new_list.name = "new-list"
+        board_registry.add_list("board_two", new_list)
+        assert board_registry.find_list("board_two", "new-list") == new_list
+        assert board_registry.list_entries()[-1] == \
+            (new_list, "board_two", "new-list")
+
+    def test_reload_board_lists(self, mocker):
+        board_registry, _ = create_board_registry(mocker)
+        new_list = mocker.Mock()
+        new_list.id = "new-list-id"
+        new_list.name = "new-list"
+        board_registry.load_board_lists("board_name", [new_list])
+        assert board_registry.find_list("board_name", "list-name") is None
+        assert board_registry.find_list("board_name", "new-list") == new_list
+        assert board_registry.list_entries() == [
+            (new_list, "board_name", "new-list")]
+
 
 class Test_get_card:
     def test_get_card(self, mocker):
@@ -47,15 +153,72 @@ class Test_lookup_board_with_id:
     def test_return_board_with_matching_id(self, mocker):
         board_one = mocker.Mock()
         board_one.id = "123"
-        board_lookup = {
-            "board_name": board_one
-        }
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup["board_name"] = board_one
         assert lookup_board_with_id(board_lookup, "123") == board_one
 
     def test_return_none_with_non_matching_id(self, mocker):
         board_one = mocker.Mock()
         board_one.id = "123"
-        board_lookup = {
-            "board_name": board_one
-        }
+        board_lookup = Board_registry(mocker.Mock(), {})
+        board_lookup["board_name"] = board_one
         assert lookup_board_with_id(board_lookup, "456") == None
+
+    def test_resolve_board_lazily(self, mocker):
+        board_lookup = Board_registry(mocker.Mock(), {
+            "board_name": {"id": "123", "name": "board_name",
+                           "closed": False, "url": "url"}})
+        assert list(board_lookup.keys()) == []
+        assert lookup_board_with_id(board_lookup, "123").name == "board_name"
+        assert list(board_lookup.keys()) == ["board_name"]
+
+
+class Test_Projected_card:
+    def test_from_projection(self, mocker):
+        handle = mocker.Mock()
+        card_json = {
+            "id": "card-id",
+            "name": "card-name",
+            "idBoard": "board-id",
+            "idList": "list-id",
+            "shortUrl": "https://trello.com/c/abc"
+        }
+
+        card = Projected_card.from_projection(handle, card_json)
+
+        assert isinstance(card, trello.Card)
+        assert card.id == "card-id"
+        assert card.name == "card-name"
+        assert card.list_id == "list-id"
+        assert card.board_id == "board-id"
+        assert card.shortUrl == "https://trello.com/c/abc"
+        assert card.board.id == "board-id"
+        assert card.client == handle
+        assert card._json_obj == card_json
+
+    def test_change_list_uses_client(self, mocker):
+        handle = mocker.Mock()
+        card = Projected_card.from_projection(handle, {"id": "card-id"})
+        card.change_list("list-id")
+        handle.fetch_json.assert_called_once_with(
+            '/cards/card-id/idList',
+            http_method='PUT',
+            post_args={'value': 'list-id'})
+
+
+class Test_card_projection_query:
+    def test_sync_profile(self):
+        assert card_projection_query("sync") == {
+            "fields": "id,idList,idBoard,name,shortUrl,dateLastActivity",
+            "attachments": "false",
+            "checklists": "none"
+        }
+
+
+class Test_create_card_stub:
+    def test_create_card_with_id_only(self, mocker):
+        handle = mocker.Mock()
+        card = create_card_stub(handle, "card-id")
+        assert isinstance(card, trello.Card)
+        assert card.id == "card-id"
+        assert card.client == handle
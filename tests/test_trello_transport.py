@@ -0,0 +1,305 @@
+import pytest
+import requests
+import trello
+import trello_transport
+from trello_transport import \
+    Retry_policy, \
+    Trello_transport, \
+    fetch_json, \
+    create_transport, \
+    install_transport, \
+    report_transport_stats
+
+
+def create_client(mocker, status_code=200, json_body=None):
+    client = mocker.Mock()
+    client.oauth = None
+    client.api_key = "key-123"
+    client.api_secret = "secret-456"
+    client.resource_owner_key = None
+    client.proxies = {}
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.text = "response-text"
+    response.json.return_value = json_body
+    client.transport.request.return_value = response
+    return client
+
+
+def create_response(mocker, status_code):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = {}
+    return response
+
+
+class Fake_clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Test_Retry_policy:
+    def test_backoff_doubles_with_full_jitter(self):
+        policy = Retry_policy(backoff_base=0.5, backoff_max=30.0,
+                              random=lambda: 0.5)
+        assert policy.backoff(1) == 0.25
+        assert policy.backoff(2) == 0.5
+        assert policy.backoff(3) == 1.0
+
+    def test_backoff_is_capped(self):
+        policy = Retry_policy(backoff_base=0.5, backoff_max=2.0,
+                              random=lambda: 1.0)
+        assert policy.backoff(10) == 2.0
+
+
+class Test_Trello_transport_retry:
+    def create_transport(self, mocker, responses, policy):
+        clock = Fake_clock()
+        transport = Trello_transport(
+            rate_limiter=mocker.Mock(),
+            retry_policies={"GET": policy},
+            clock=clock,
+            sleep=clock.sleep)
+        mocked_request = mocker.patch.object(
+            transport.session, "request", side_effect=responses)
+        return transport, mocked_request, clock
+
+    def test_retry_get_until_success(self, mocker):
+        responses = [create_response(mocker, 503),
+                     create_response(mocker, 429),
+                     create_response(mocker, 200)]
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses,
+            Retry_policy(max_attempts=5, random=lambda: 1.0))
+
+        assert transport.request("GET", "url") == responses[2]
+
+        assert mocked_request.call_count == 3
+        assert clock.sleeps == [0.5, 1.0]
+        assert transport.retry_counters == {"retries": 2, "give_ups": 0}
+
+    def test_give_up_after_max_attempts(self, mocker):
+        responses = [create_response(mocker, 502)] * 3
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses,
+            Retry_policy(max_attempts=3, random=lambda: 1.0))
+
+        assert transport.request("GET", "url").status_code == 502
+
+        assert mocked_request.call_count == 3
+        assert transport.retry_counters == {"retries": 2, "give_ups": 1}
+
+    def test_give_up_after_deadline(self, mocker):
+        responses = [create_response(mocker, 502)] * 5
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses,
+            Retry_policy(max_attempts=5, backoff_base=4.0,
+                         deadline=5.0, random=lambda: 1.0))
+
+        assert transport.request("GET", "url").status_code == 502
+
+        assert mocked_request.call_count == 3
+        assert clock.sleeps == [4.0, 1.0]
+        assert transport.retry_counters == {"retries": 2, "give_ups": 1}
+
+    def test_do_not_retry_other_status_codes(self, mocker):
+        responses = [create_response(mocker, 404)]
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses, Retry_policy(max_attempts=5))
+
+        assert transport.request("GET", "url").status_code == 404
+
+        assert mocked_request.call_count == 1
+        assert transport.retry_counters == {"retries": 0, "give_ups": 0}
+
+    def test_do_not_retry_methods_without_policy(self, mocker):
+        responses = [create_response(mocker, 503)]
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses, Retry_policy(max_attempts=5))
+
+        assert transport.request("PUT", "url").status_code == 503
+
+        assert mocked_request.call_count == 1
+        assert transport.retry_counters == {"retries": 0, "give_ups": 0}
+
+    def test_retry_connection_errors(self, mocker):
+        responses = [requests.ConnectionError(),
+                     create_response(mocker, 200)]
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses, Retry_policy(max_attempts=2))
+
+        assert transport.request("GET", "url") == responses[1]
+        assert transport.retry_counters == {"retries": 1, "give_ups": 0}
+
+    def test_raise_connection_error_after_giving_up(self, mocker):
+        responses = [requests.Timeout(), requests.Timeout()]
+        transport, mocked_request, clock = self.create_transport(
+            mocker, responses, Retry_policy(max_attempts=2))
+
+        with pytest.raises(requests.Timeout):
+            transport.request("GET", "url")
+        assert transport.retry_counters == {"retries": 1, "give_ups": 1}
+
+
+class Test_Trello_transport:
+    def test_request_uses_session_with_timeouts(self, mocker):
+        transport = Trello_transport(
+            pool_size=3, connect_timeout=1.5, read_timeout=7)
+        response = create_response(mocker, 200)
+        mocked_request = mocker.patch.object(
+            transport.session, "request", return_value=response)
+
+        assert transport.request(
+            "GET", "https://api.trello.com/1/cards/abc",
+            params={"a": 1}) == response
+
+        mocked_request.assert_called_once_with(
+            "GET", "https://api.trello.com/1/cards/abc",
+            timeout=(1.5, 7), params={"a": 1})
+
+    def test_request_within_rate_budget(self, mocker):
+        rate_limiter = mocker.Mock()
+        transport = Trello_transport(rate_limiter=rate_limiter)
+        response = create_response(mocker, 200)
+        mocker.patch.object(
+            transport.session, "request", return_value=response)
+
+        assert transport.request(
+            "GET", "https://api.trello.com/1/cards/abc",
+            credentials=("key", "token")) == response
+
+        rate_limiter.acquire.assert_called_once_with("key", "token")
+        rate_limiter.update_from_response.assert_called_once_with(
+            "key", "token", response)
+
+    def test_session_mounts_sized_pool(self):
+        transport = Trello_transport(pool_size=3)
+        assert transport.session.get_adapter(
+            "https://api.trello.com") == transport.adapter
+        assert transport.adapter._pool_connections == 3
+        assert transport.adapter._pool_maxsize == 3
+
+    def test_connection_stats_counts_reused_connections(self, mocker):
+        transport = Trello_transport()
+        pool = mocker.Mock()
+        pool.num_requests = 10
+        pool.num_connections = 2
+        transport.adapter.poolmanager.pools = {"api.trello.com": pool}
+
+        assert transport.connection_stats() == {
+            "requests": 10,
+            "connections": 2,
+            "reused": 8
+        }
+
+    def test_connection_stats_without_requests(self):
+        transport = Trello_transport()
+        assert transport.connection_stats() == {
+            "requests": 0,
+            "connections": 0,
+            "reused": 0
+        }
+
+
+class Test_fetch_json:
+    def test_get_returns_json_with_credentials(self, mocker):
+        client = create_client(mocker, json_body={"id": "abc"})
+
+        assert fetch_json(client, "/cards/abc") == {"id": "abc"}
+
+        client.transport.request.assert_called_once_with(
+            "GET", "https://api.trello.com/1/cards/abc",
+            params={"key": "key-123", "token": "secret-456"},
+            headers={"Accept": "application/json"},
+            data=None, auth=None, files=None, proxies={},
+            credentials=("key-123", "secret-456"))
+
+    def test_put_sends_json_body(self, mocker):
+        client = create_client(mocker, json_body={})
+
+        fetch_json(client, "cards/abc/idList", http_method="PUT",
+                   post_args={"value": "list-id"})
+
+        client.transport.request.assert_called_once_with(
+            "PUT", "https://api.trello.com/1/cards/abc/idList",
+            params={"key": "key-123", "token": "secret-456"},
+            headers={
+                "Content-Type": "application/json; charset=utf-8",
+                "Accept": "application/json"},
+            data='{"value": "list-id"}', auth=None, files=None, proxies={},
+            credentials=("key-123", "secret-456"))
+
+    def test_unauthorized(self, mocker):
+        client = create_client(mocker, status_code=401)
+        with pytest.raises(trello.Unauthorized):
+            fetch_json(client, "/cards/abc")
+
+    def test_resource_unavailable(self, mocker):
+        client = create_client(mocker, status_code=404)
+        with pytest.raises(trello.ResourceUnavailable):
+            fetch_json(client, "/cards/abc")
+
+
+class Test_create_transport:
+    def test_create_transport_from_config(self, mocker):
+        mocked_config = mocker.Mock()
+        mocked_config.http_pool_size = 4
+        mocked_config.http_connect_timeout = 2.0
+        mocked_config.http_read_timeout = 9.0
+        mocked_config.rate_limit_per_api_key = 30
+        mocked_config.rate_limit_per_token = 10
+        mocked_config.rate_limit_interval = 1.0
+        mocked_config.retry_methods = ["GET", "DELETE"]
+        mocked_config.retry_max_attempts = 3
+        mocked_config.retry_backoff_base = 0.1
+        mocked_config.retry_backoff_max = 2.0
+        mocked_config.retry_deadline = 10.0
+
+        transport = create_transport(mocked_config)
+
+        assert transport.timeout == (2.0, 9.0)
+        assert transport.adapter._pool_maxsize == 4
+        assert transport.rate_limiter.limits == {
+            "api_key": 30, "token": 10}
+        assert transport.rate_limiter.interval == 1.0
+        assert sorted(transport.retry_policies.keys()) == ["DELETE", "GET"]
+        assert transport.retry_policies["GET"].max_attempts == 3
+        assert transport.retry_policies["GET"].backoff_base == 0.1
+        assert transport.retry_policies["GET"].backoff_max == 2.0
+        assert transport.retry_policies["GET"].deadline == 10.0
+
+
+class Test_install_transport:
+    def test_install_on_trello_client(self, mocker):
+        mocker.patch.object(trello.TrelloClient, "fetch_json")
+        mocker.patch.object(trello.TrelloClient, "transport", None,
+                            create=True)
+        transport = mocker.Mock()
+
+        assert install_transport(transport) == transport
+
+        assert trello.TrelloClient.transport == transport
+        assert trello.TrelloClient.fetch_json == trello_transport.fetch_json
+
+
+class Test_report_transport_stats:
+    def test_report_transport_stats(self, mocker):
+        handle = mocker.Mock()
+        handle.transport.connection_stats.return_value = {
+            "requests": 3, "connections": 1, "reused": 2}
+        handle.transport.retry_counters = {"retries": 4, "give_ups": 1}
+        assert report_transport_stats(handle) == {
+            "requests": 3,
+            "connections": 1,
+            "reused": 2,
+            "retries": 4,
+            "give_ups": 1
+        }
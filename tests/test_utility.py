@@ -1,3 +1,4 @@
+from trello_helper import Board_registry
 from utility import pretty_print_card_by_name
 
 
@@ -24,22 +25,10 @@ class Test_get_pretty_card:
         board = mocker.Mock()
         board.get_cards.return_value = [card1, card2]
         context = {
-            "board_lookup": {
-                board.name: board
-            },
-            "list_lookup": {
-                "board_name": {
-                    board.name: {
-                        list1.name: (list1, board.name, list1.name),
-                        list2.name: (list2, board.name, list2.name)
-                    }
-                },
-                "list_id": {
-                    list1.id: (list1, board.name, list1.name),
-                    list2.id: (list2, board.name, list2.name)
-                }
-            }
+            "board_lookup": Board_registry(mocker.Mock(), {})
         }
+        context["board_lookup"][board.name] = board
+        context["board_lookup"].load_board_lists(board.name, [list1, list2])
 
         assert pretty_print_card_by_name(
             context, board.name, list2.name, card2.name) == [card2]
@@ -66,22 +55,10 @@ class Test_get_pretty_card:
         board = mocker.Mock()
         board.get_cards.return_value = [card1, card2]
         context = {
-            "board_lookup": {
-                board.name: board
-            },
-            "list_lookup": {
-                "board_name": {
-                    board.name: {
-                        list1.name: (list1, board.name, list1.name),
-                        list2.name: (list2, board.name, list2.name)
-                    }
-                },
-                "list_id": {
-                    list1.id: (list1, board.name, list1.name),
-                    list2.id: (list2, board.name, list2.name)
-                }
-            }
+            "board_lookup": Board_registry(mocker.Mock(), {})
         }
+        context["board_lookup"][board.name] = board
+        context["board_lookup"].load_board_lists(board.name, [list1, list2])
 
         assert pretty_print_card_by_name(
             context, board.name, list1.name, card1.name) == []